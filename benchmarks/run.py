@@ -0,0 +1,157 @@
+"""Benchmark zenkins commands against the fake Jenkins server.
+
+Each scenario runs the real CLI in a subprocess with its own config and
+cache directories, pointed at a tests.fakejenkins server in this
+process, and reports wall time, HTTP requests, bytes served and the
+peak RSS of the CLI process. Scenarios marked "warm" run right after
+their cold counterpart and reuse its cache.
+
+    python benchmarks/run.py                   # small preset
+    python benchmarks/run.py --preset large    # thousands of jobs, 100k cases, 2 GB log
+    python benchmarks/run.py --latency 0.02 --repeat 5 --json results.json
+
+Linux and macOS only (config and cache are redirected via XDG variables
+and the RSS comes from wait4()).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from tests.fakejenkins import KB, MB, FakeJenkins, Spec, spec_arguments, spec_from_args  # noqa: E402
+
+PRESETS = {
+    "small": Spec(jobs=200, folder_depth=2, builds=40, cases=2_000, log_bytes=16 * MB,
+                  artifacts=20, artifact_bytes=256 * KB),
+    "large": Spec(jobs=5_000, folder_depth=3, builds=200, cases=100_000, log_bytes=2048 * MB,
+                  artifacts=200, artifact_bytes=1 * MB),
+}
+
+
+@dataclass
+class Result:
+    name: str
+    wall: float
+    requests: int
+    bytes: int
+    peak_rss_mb: float
+    exit_code: int
+
+
+def scenarios(job: str, n: int) -> list[tuple[str, list[str], bool]]:
+    """(name, zenkins arguments, keep the cache of the previous scenario)."""
+    return [
+        ("startup", ["--version"], False),
+        ("jobs", ["jobs"], False),
+        ("jobs -r", ["jobs", "-r"], False),
+        (f"failures -n {n}", ["failures", job, "-n", str(n)], False),
+        (f"failures -n {n} (warm)", ["failures", job, "-n", str(n)], True),
+        ("artifacts -n 3", ["artifacts", job, "-n", "3", "-d", "{tmp}/artifacts", "--sync"], False),
+        ("artifacts -n 3 (warm)", ["artifacts", job, "-n", "3", "-d", "{tmp}/artifacts", "--sync"], True),
+        ("log", ["log", job], False),
+        ("log --tail 100", ["log", job, "--tail", "100"], False),
+        (f"grep -n {n}", ["grep", job, "ERROR", "-n", str(n)], False),
+    ]
+
+
+def _write_config(home: Path, url: str) -> None:
+    config = home / "config" / "zenkins"
+    config.mkdir(parents=True, exist_ok=True)
+    (config / "config.toml").write_text(f'url = "{url}"\nuser = "bench"\ntoken = "bench"\n')
+
+
+def run_zenkins(argv: list[str], home: Path) -> tuple[float, float, int]:
+    """Run the CLI; returns (wall seconds, peak RSS in MB, exit code)."""
+    env = {
+        **os.environ,
+        "XDG_CONFIG_HOME": str(home / "config"),
+        "XDG_CACHE_HOME": str(home / "cache"),
+        "HOME": str(home),
+    }
+    env.pop("ZENKINS_TRACE", None)
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "zenkins", *argv],
+        env=env, cwd=home, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    stderr = proc.stderr.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss = usage.ru_maxrss / (MB if sys.platform == "darwin" else KB)
+    if proc.returncode not in (0, 1):
+        sys.stderr.write(stderr.decode(errors="replace"))
+    return wall, rss, proc.returncode
+
+
+def run_all(server: FakeJenkins, repeat: int, only: list[str] | None, n: int) -> list[Result]:
+    job = server.instance.job_names[0]
+    by_name: dict[str, list[Result]] = {}
+    with tempfile.TemporaryDirectory(prefix="zenkins-bench-") as tmp:
+        home = Path(tmp)
+        for i in range(repeat):
+            for k, (name, argv, warm) in enumerate(scenarios(job, n)):
+                if only and not any(o in name for o in only):
+                    continue
+                if not warm:
+                    home = Path(tmp) / f"{i}-{k}"
+                    _write_config(home, server.url)
+                argv = [a.replace("{tmp}", str(home)) for a in argv]
+                server.reset_stats()
+                wall, rss, code = run_zenkins(argv, home)
+                by_name.setdefault(name, []).append(
+                    Result(name, wall, server.total_requests, server.bytes_sent, rss, code)
+                )
+    results = []
+    for rs in by_name.values():
+        median = statistics.median_low([r.wall for r in rs])
+        results.append(next(r for r in rs if r.wall == median))
+    return results
+
+
+def report(results: list[Result], spec: Spec) -> None:
+    print(f"Instance: {spec.jobs} jobs (folder depth {spec.folder_depth}), {spec.builds} builds/job, "
+          f"{spec.cases} cases/report, {spec.log_bytes / MB:.0f} MB logs, "
+          f"{spec.artifacts} x {spec.artifact_bytes / KB:.0f} KB artifacts, "
+          f"latency {spec.latency * 1000:.0f} ms, error rate {spec.error_rate:.0%}\n")
+    width = max(len(r.name) for r in results)
+    print(f"{'scenario'.ljust(width)}  {'wall':>8}  {'requests':>8}  {'served':>10}  {'peak RSS':>9}")
+    for r in results:
+        flag = "" if r.exit_code in (0, 1) else f"  (exit {r.exit_code})"
+        print(f"{r.name.ljust(width)}  {r.wall:7.2f}s  {r.requests:8}  {r.bytes / MB:7.1f} MB  "
+              f"{r.peak_rss_mb:6.1f} MB{flag}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark zenkins against a fake Jenkins")
+    parser.add_argument("--preset", choices=PRESETS, default="small")
+    spec_arguments(parser)
+    parser.add_argument("-n", type=int, default=20, help="Builds for failures/grep (default: 20)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the median is reported")
+    parser.add_argument("--only", action="append", help="Run scenarios whose name contains this")
+    parser.add_argument("--json", metavar="FILE", help="Also write results as JSON")
+    args = parser.parse_args()
+
+    spec = spec_from_args(args, Spec(**asdict(PRESETS[args.preset])))
+    with FakeJenkins(spec) as server:
+        results = run_all(server, args.repeat, args.only, args.n)
+    report(results, spec)
+    if args.json:
+        Path(args.json).write_text(json.dumps(
+            {"spec": asdict(spec), "results": [asdict(r) for r in results]}, indent=2,
+        ))
+
+
+if __name__ == "__main__":
+    main()
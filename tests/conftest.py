@@ -3,9 +3,24 @@
 import pytest
 from unittest.mock import MagicMock
 
+from zenkins import conditional, publishers
 from zenkins.client import set_session, reset_session
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the on-disk build cache inside the test's temp directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setattr("zenkins.cache.CACHE_DIR", path)
+    monkeypatch.setattr("zenkins.ratelimit.LOCK_DIR", tmp_path / "ratelimit")
+    monkeypatch.setattr("zenkins.conditional.VALIDATOR_DIR", tmp_path / "validators")
+    monkeypatch.setattr("zenkins.history.HISTORY_DB", tmp_path / "history.sqlite3")
+    monkeypatch.setattr("zenkins.publishers.PUBLISHERS_FILE", tmp_path / "publishers.json")
+    yield path
+    conditional.clear()
+    publishers.clear()
+
+
 @pytest.fixture
 def mock_session():
     """Provide a mock requests session.
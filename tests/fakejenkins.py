@@ -0,0 +1,597 @@
+"""A fake Jenkins controller for integration tests and benchmarks.
+
+Stdlib only. The instance is synthetic and generated on demand from a
+``Spec``: jobs spread over nested folders, finished builds with JUnit
+test reports, fixed-width console logs and artifacts. Nothing is kept
+in memory beyond a few recently generated responses, so multi-GB logs
+and 100k-case reports are cheap to serve.
+
+Supported endpoints are the ones zenkins uses:
+
+- ``/api/json``, ``/job/.../api/json`` (``tree`` filtering with ranges),
+  including ``builds`` capped at 100 entries like Jenkins (``allBuilds`` is not)
+- ``/job/.../N/api/json``, ``/job/.../N/testReport/api/json``
+- ``/job/.../N/consoleText``, ``/job/.../N/logText/progressiveText?start=``
+- ``/job/.../N/artifact/<path>`` with HEAD, ETag and Range
+- ``/queue/api/json``
+
+Latency and a rate of 503 responses can be injected. Run standalone with
+``python -m tests.fakejenkins --jobs 2000 --folder-depth 2 ...``.
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+KB = 1024
+MB = 1024 * KB
+
+# Jenkins lists at most this many entries under a job's "builds"
+BUILDS_LIMIT = 100
+LINE_WIDTH = 80
+LINES_PER_BLOCK = 819
+CASES_PER_SUITE = 1000
+# Every Nth log block contains an ERROR line
+ERROR_EVERY = 16
+TIMESTAMP = 1_700_000_000_000
+
+
+@dataclass
+class Spec:
+    """Size and behaviour of the synthetic instance."""
+
+    jobs: int = 20
+    folder_depth: int = 0
+    folder_fanout: int = 4
+    builds: int = 30
+    cases: int = 200
+    # Share of cases failing per build; half of them fail in every build
+    fail_rate: float = 0.02
+    log_bytes: int = 1 * MB
+    artifacts: int = 4
+    artifact_bytes: int = 64 * KB
+    # Seconds added to every response
+    latency: float = 0.0
+    # Share of requests answered with 503
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+# -- tree parameter -----------------------------------------------------------
+
+def parse_tree(text: str, i: int = 0) -> tuple[dict, int]:
+    """Parse a ``tree`` query into {field: (subfields | None, range | None)}."""
+    fields: dict[str, tuple[dict | None, str | None]] = {}
+    while i < len(text):
+        j = i
+        while j < len(text) and text[j] not in ",[]{}":
+            j += 1
+        name, sub, rng, i = text[i:j], None, None, j
+        if i < len(text) and text[i] == "[":
+            sub, i = parse_tree(text, i + 1)
+        if i < len(text) and text[i] == "{":
+            end = text.index("}", i)
+            rng, i = text[i + 1:end], end + 1
+        if name:
+            fields[name] = (sub, rng)
+        if i < len(text) and text[i] == ",":
+            i += 1
+        elif i < len(text) and text[i] == "]":
+            return fields, i + 1
+    return fields, i
+
+
+def _slice(items: list, rng: str) -> list:
+    start, comma, end = rng.partition(",")
+    lo = int(start) if start else 0
+    if not comma:
+        return items[lo:lo + 1]
+    return items[lo:int(end) if end else None]
+
+
+def apply_tree(obj, fields: dict | None):
+    """Filter *obj* down to the fields of a parsed tree.
+
+    Without a tree, lazily generated fields (callables) are left out,
+    much like Jenkins keeps nested objects shallow.
+    """
+    if fields is None:
+        if isinstance(obj, list):
+            return [apply_tree(o, None) for o in obj]
+        if isinstance(obj, dict):
+            return {k: apply_tree(v, None) for k, v in obj.items() if not callable(v)}
+        return obj
+    if isinstance(obj, list):
+        return [apply_tree(o, fields) for o in obj]
+    if not isinstance(obj, dict):
+        return obj
+    out = {}
+    for name, (sub, rng) in fields.items():
+        if name not in obj:
+            continue
+        value = obj[name]
+        if callable(value):
+            value = value()
+        if rng is not None and isinstance(value, list):
+            value = _slice(value, rng)
+        out[name] = apply_tree(value, sub)
+    return out
+
+
+# -- synthetic instance -------------------------------------------------------
+
+def _url(name: str) -> str:
+    return "/job/" + "/job/".join(name.split("/")) + "/"
+
+
+class Instance:
+    """Deterministic Jenkins data generated from a Spec."""
+
+    def __init__(self, spec: Spec) -> None:
+        self.spec = spec
+        self.folders: dict[str, list[str]] = {"": []}
+        self.jobs: dict[str, list[str]] = {"": []}
+        leaves = [""]
+        for _ in range(spec.folder_depth):
+            next_leaves = []
+            for parent in leaves:
+                for k in range(spec.folder_fanout):
+                    path = f"{parent}/folder-{k}" if parent else f"folder-{k}"
+                    self.folders[parent].append(path)
+                    self.folders[path] = []
+                    self.jobs[path] = []
+                    next_leaves.append(path)
+            leaves = next_leaves
+        self.job_names = []
+        for i in range(spec.jobs):
+            folder = leaves[i % len(leaves)]
+            name = f"{folder}/job-{i}" if folder else f"job-{i}"
+            self.jobs[folder].append(name)
+            self.job_names.append(name)
+        self._job_set = set(self.job_names)
+        self._log_blocks = (self._log_block(False), self._log_block(True))
+
+    def is_job(self, name: str) -> bool:
+        return name in self._job_set
+
+    def is_folder(self, name: str) -> bool:
+        return name in self.folders
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(":".join(map(str, (self.spec.seed, *key))))
+
+    # jobs and builds
+
+    def failing_cases(self, job: str, number: int) -> set[int]:
+        spec = self.spec
+        n = int(spec.cases * spec.fail_rate)
+        persistent = set(range(n // 2))
+        flaky = self._rng(job, number).sample(range(spec.cases), n - len(persistent))
+        return persistent | set(flaky)
+
+    def build(self, job: str, number: int) -> dict:
+        failed = len(self.failing_cases(job, number))
+        return {
+            "_class": "hudson.model.FreeStyleBuild",
+            "number": number,
+            "displayName": f"#{number}",
+            "description": None,
+            "building": False,
+            "result": "UNSTABLE" if failed else "SUCCESS",
+            "timestamp": TIMESTAMP + number * 3_600_000,
+            "duration": 600_000 + number,
+            "url": f"{_url(job)}{number}/",
+            "artifacts": [
+                {"fileName": f"part-{k:04d}.bin", "relativePath": f"dist/part-{k:04d}.bin"}
+                for k in range(self.spec.artifacts)
+            ],
+            "fingerprint": lambda: [
+                {"fileName": f"part-{k:04d}.bin", "hash": self.artifact_md5(job, number, k)}
+                for k in range(self.spec.artifacts)
+            ],
+            "actions": [
+                {"_class": "hudson.tasks.junit.TestResultAction", "failCount": failed,
+                 "skipCount": 0, "totalCount": self.spec.cases, "urlName": "testReport"},
+            ],
+        }
+
+    def job(self, name: str) -> dict:
+        last = self.spec.builds
+        return {
+            "_class": "hudson.model.FreeStyleProject",
+            "name": name.rsplit("/", 1)[-1],
+            "fullName": name,
+            "color": "yellow" if self.failing_cases(name, last) else "blue",
+            "url": _url(name),
+            "buildable": True,
+            "lastBuild": lambda: self.build(name, last) if last else None,
+            "builds": lambda: [self.build(name, n) for n in range(last, max(0, last - BUILDS_LIMIT), -1)],
+            "allBuilds": lambda: [self.build(name, n) for n in range(last, 0, -1)],
+            "property": [],
+        }
+
+    def folder(self, path: str) -> dict:
+        children = [
+            {"_class": "com.cloudbees.hudson.plugins.folder.Folder", "name": f.rsplit("/", 1)[-1],
+             "url": _url(f), "jobs": lambda f=f: [self.listing(c) for c in self._children(f)]}
+            for f in self.folders[path]
+        ] + [self.listing(j) for j in self.jobs[path]]
+        return {"_class": "hudson.model.Hudson", "mode": "NORMAL", "nodeDescription": "fake",
+                "useSecurity": True, "jobs": children}
+
+    def _children(self, path: str) -> list[str]:
+        return self.folders[path] + self.jobs[path]
+
+    def listing(self, name: str) -> dict:
+        if self.is_folder(name):
+            return {"name": name.rsplit("/", 1)[-1], "url": _url(name),
+                    "jobs": lambda: [self.listing(c) for c in self._children(name)]}
+        job = self.job(name)
+        return {"name": job["name"], "color": job["color"], "url": job["url"]}
+
+    def queue(self) -> dict:
+        return {"items": [
+            {"id": i, "task": {"name": name}, "why": "Waiting for next available executor",
+             "stuck": False, "blocked": False, "buildable": True}
+            for i, name in enumerate(self.job_names[:3])
+        ]}
+
+    def test_report(self, job: str, number: int) -> dict:
+        failing = self.failing_cases(job, number)
+        suites = []
+        for start in range(0, self.spec.cases, CASES_PER_SUITE):
+            cases = []
+            for i in range(start, min(start + CASES_PER_SUITE, self.spec.cases)):
+                fail = i in failing
+                cases.append({
+                    "className": f"pkg.module{i % 100}.Suite{i // CASES_PER_SUITE}",
+                    "name": f"test_case_{i:06d}",
+                    "status": "FAILED" if fail else "PASSED",
+                    "duration": 0.01,
+                    "errorDetails": f"AssertionError: expected {i}" if fail else None,
+                })
+            suites.append({"name": f"Suite{start // CASES_PER_SUITE}", "cases": cases})
+        return {"failCount": len(failing), "passCount": self.spec.cases - len(failing),
+                "skipCount": 0, "suites": suites}
+
+    # console logs
+
+    @staticmethod
+    def _log_block(with_error: bool) -> bytes:
+        lines = []
+        for j in range(LINES_PER_BLOCK):
+            if with_error and j == LINES_PER_BLOCK // 2:
+                text = f"BBBBBBBB.{j:03d} ERROR: step failed in module-{j % 97:02d}"
+            else:
+                text = f"BBBBBBBB.{j:03d} INFO  step output for module-{j % 97:02d}"
+            lines.append(text.ljust(LINE_WIDTH - 1, ".") + "\n")
+        return "".join(lines).encode()
+
+    def log_size(self) -> int:
+        return self.spec.log_bytes // LINE_WIDTH * LINE_WIDTH
+
+    def log_chunks(self, start: int = 0):
+        """Yield the console log from byte offset *start*."""
+        size = self.log_size()
+        block_size = LINE_WIDTH * LINES_PER_BLOCK
+        pos = start
+        while pos < size:
+            index, offset = divmod(pos, block_size)
+            template = self._log_blocks[index % ERROR_EVERY == 0]
+            block = template.replace(b"BBBBBBBB", b"%08d" % index)
+            chunk = block[offset:offset + size - pos]
+            pos += len(chunk)
+            yield chunk
+
+    # artifacts
+
+    def _artifact_block(self, job: str, number: int, k: int) -> bytes:
+        seed = hashlib.sha256(f"{self.spec.seed}:{job}:{number}:{k}".encode()).digest()
+        return seed * (64 * KB // len(seed))
+
+    def artifact_chunks(self, job: str, number: int, k: int, start: int = 0):
+        size = self.spec.artifact_bytes
+        block = self._artifact_block(job, number, k)
+        pos = start
+        while pos < size:
+            offset = pos % len(block)
+            chunk = block[offset:offset + size - pos]
+            pos += len(chunk)
+            yield chunk
+
+    @functools.lru_cache(maxsize=4096)
+    def artifact_md5(self, job: str, number: int, k: int) -> str:
+        md5 = hashlib.md5()
+        for chunk in self.artifact_chunks(job, number, k):
+            md5.update(chunk)
+        return md5.hexdigest()
+
+
+# -- HTTP server --------------------------------------------------------------
+
+_JOB_PATH = re.compile(r"^((?:/job/[^/]+)+)(?:/(\d+|lastBuild|lastCompletedBuild))?(/.*)?$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeJenkins"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self._handle(head=True)
+
+    def do_GET(self) -> None:
+        self._handle(head=False)
+
+    def do_POST(self) -> None:
+        self._handle(head=False)
+
+    def _handle(self, head: bool) -> None:
+        fake = self.server
+        fake.count(self.command, self.path)
+        if fake.spec.latency:
+            time.sleep(fake.spec.latency)
+        try:
+            if fake.inject_error():
+                return self._send(503, b"Service Unavailable", "text/plain", head)
+            self._route(head)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send(self, status: int, body: bytes, ctype: str, head: bool, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+            self.server.add_bytes(len(body))
+
+    def _send_stream(self, status: int, size: int, chunks, ctype: str, head: bool,
+                     headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(size))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if head:
+            return
+        for chunk in chunks:
+            self.wfile.write(chunk)
+            self.server.add_bytes(len(chunk))
+
+    def _not_found(self, head: bool) -> None:
+        self._send(404, b"Not Found", "text/plain", head)
+
+    def _json(self, obj, query: dict, head: bool) -> None:
+        tree = query.get("tree", [None])[0]
+        obj = apply_tree(obj, parse_tree(tree)[0] if tree else None)
+        self._send(200, json.dumps(obj).encode(), "application/json", head)
+
+    def _route(self, head: bool) -> None:
+        fake = self.server
+        inst = fake.instance
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        path = url.path.rstrip("/")
+
+        if path == "/api/json":
+            return self._json(inst.folder(""), query, head)
+        if path == "/queue/api/json":
+            return self._json(inst.queue(), query, head)
+
+        m = _JOB_PATH.match(path)
+        if not m:
+            return self._not_found(head)
+        name = "/".join(unquote(p) for p in m.group(1).split("/job/")[1:])
+        build, rest = m.group(2), m.group(3) or ""
+
+        if inst.is_folder(name) and not build:
+            if rest == "/api/json":
+                return self._json(inst.folder(name), query, head)
+            return self._not_found(head)
+        if not inst.is_job(name):
+            return self._not_found(head)
+        if not build:
+            if rest == "/api/json":
+                return self._json(inst.job(name), query, head)
+            if rest == "/build" and self.command == "POST":
+                return self._send(201, b"", "text/plain", head, {"Location": "/queue/item/1/"})
+            return self._not_found(head)
+
+        number = fake.spec.builds if not build.isdigit() else int(build)
+        if not 1 <= number <= fake.spec.builds:
+            return self._not_found(head)
+
+        if rest == "/api/json":
+            return self._json(inst.build(name, number), query, head)
+        if rest == "/testReport/api/json":
+            body = fake.cached_json(self.path, lambda: inst.test_report(name, number), query)
+            return self._send(200, body, "application/json", head)
+        if rest == "/consoleText":
+            return self._send_stream(200, inst.log_size(), inst.log_chunks(), "text/plain", head)
+        if rest == "/logText/progressiveText":
+            start = int(query.get("start", ["0"])[0])
+            # Like Jenkins, which takes a start past the end for a rotated log
+            if start > inst.log_size():
+                start = 0
+            headers = {"X-Text-Size": str(inst.log_size()), "X-More-Data": "false"}
+            return self._send_stream(200, inst.log_size() - start, inst.log_chunks(start),
+                                     "text/plain", head, headers)
+        if rest.startswith("/artifact/"):
+            return self._artifact(name, number, rest[len("/artifact/"):], head)
+        return self._not_found(head)
+
+    def _artifact(self, job: str, number: int, rel: str, head: bool) -> None:
+        inst = self.server.instance
+        m = re.fullmatch(r"dist/part-(\d{4})\.bin", rel)
+        if not m or int(m.group(1)) >= inst.spec.artifacts:
+            return self._not_found(head)
+        k = int(m.group(1))
+        size = inst.spec.artifact_bytes
+        headers = {
+            "ETag": f'"{job}-{number}-{k}"',
+            "Last-Modified": "Tue, 14 Nov 2023 22:13:20 GMT",
+            "Accept-Ranges": "bytes",
+        }
+        start = 0
+        rng = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if rng:
+            start = int(rng.group(1))
+            if start >= size:
+                return self._send(416, b"", "text/plain", head, {"Content-Range": f"bytes */{size}"})
+            headers["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+        self._send_stream(206 if rng else 200, size - start, inst.artifact_chunks(job, number, k, start),
+                          "application/octet-stream", head, headers)
+
+
+class FakeJenkins(ThreadingHTTPServer):
+    """Threaded HTTP server serving an Instance, with request statistics.
+
+    Usage:
+        with FakeJenkins(Spec(jobs=100)) as server:
+            ...  # talk to server.url
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, spec: Spec | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.spec = spec or Spec()
+        self.instance = Instance(self.spec)
+        self.requests: Counter[str] = Counter()
+        self.errors = 0
+        self.bytes_sent = 0
+        self._stats_lock = threading.Lock()
+        self._error_rng = random.Random(self.spec.seed)
+        self._thread: threading.Thread | None = None
+        self._json_cache: dict[str, bytes] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def count(self, method: str, path: str) -> None:
+        kind = re.sub(r"/\d+(?=/|$)", "/N", urlsplit(path).path)
+        kind = re.sub(r"/artifact/.*", "/artifact/*", kind)
+        with self._stats_lock:
+            self.requests[f"{method} {kind}"] += 1
+
+    def add_bytes(self, n: int) -> None:
+        with self._stats_lock:
+            self.bytes_sent += n
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients closing a connection mid-response (e.g. `log --head`) are normal
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def inject_error(self) -> bool:
+        with self._stats_lock:
+            fail = self._error_rng.random() < self.spec.error_rate
+            if fail:
+                self.errors += 1
+        return fail
+
+    def cached_json(self, key: str, make, query: dict) -> bytes:
+        """Encode a large generated document once per URL (a few kept)."""
+        with self._stats_lock:
+            body = self._json_cache.get(key)
+        if body is None:
+            tree = query.get("tree", [None])[0]
+            body = json.dumps(apply_tree(make(), parse_tree(tree)[0] if tree else None)).encode()
+            with self._stats_lock:
+                if len(self._json_cache) >= 8:
+                    self._json_cache.pop(next(iter(self._json_cache)))
+                self._json_cache[key] = body
+        return body
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.requests.clear()
+            self.errors = 0
+            self.bytes_sent = 0
+
+    def start(self) -> "FakeJenkins":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeJenkins":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add one option per Spec field (shared with the benchmark runner)."""
+    parser.add_argument("--jobs", type=int, help="Number of jobs")
+    parser.add_argument("--folder-depth", type=int, help="Folder nesting above the jobs")
+    parser.add_argument("--folder-fanout", type=int, help="Sub-folders per folder")
+    parser.add_argument("--builds", type=int, help="Builds per job")
+    parser.add_argument("--cases", type=int, help="Test cases per report")
+    parser.add_argument("--fail-rate", type=float, help="Share of failing cases per build")
+    parser.add_argument("--log-mb", type=float, help="Console log size in MB")
+    parser.add_argument("--artifacts", type=int, help="Artifacts per build")
+    parser.add_argument("--artifact-kb", type=int, help="Artifact size in KB")
+    parser.add_argument("--latency", type=float, help="Seconds added to every response")
+    parser.add_argument("--error-rate", type=float, help="Share of requests answered with 503")
+    parser.add_argument("--seed", type=int, help="Seed for generated data")
+
+
+def spec_from_args(args: argparse.Namespace, base: Spec | None = None) -> Spec:
+    spec = base or Spec()
+    for field in ("jobs", "folder_depth", "folder_fanout", "builds", "cases", "fail_rate",
+                  "artifacts", "latency", "error_rate", "seed"):
+        value = getattr(args, field, None)
+        if value is not None:
+            setattr(spec, field, value)
+    if getattr(args, "log_mb", None) is not None:
+        spec.log_bytes = int(args.log_mb * MB)
+    if getattr(args, "artifact_kb", None) is not None:
+        spec.artifact_bytes = args.artifact_kb * KB
+    return spec
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a fake Jenkins instance")
+    parser.add_argument("--port", type=int, default=8080)
+    spec_arguments(parser)
+    args = parser.parse_args()
+    server = FakeJenkins(spec_from_args(args), port=args.port)
+    print(f"Fake Jenkins at {server.url} (any user/token), e.g. job {server.instance.job_names[0]!r}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
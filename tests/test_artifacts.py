@@ -0,0 +1,231 @@
+"""Tests for zenkins.artifacts."""
+
+import argparse
+import hashlib
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from zenkins.artifacts import _select_artifacts, artifacts_command
+
+
+def _artifact_session(mock_session, files: dict[str, list[bytes]], fail: str | None = None,
+                      fingerprints: list[dict] | None = None):
+    fingerprints = fingerprints or []
+
+    def get(url, **kw):
+        resp = MagicMock()
+        resp.__enter__.return_value = resp
+        if "tree=lastBuild[number]" in url:
+            resp.json.return_value = {"lastBuild": {"number": 8}}
+            return resp
+        if "tree=allBuilds[" in url:
+            start, end = map(int, url.rsplit("{", 1)[1].rstrip("}").split(","))
+            paths = [{"relativePath": p} for p in files]
+            resp.json.return_value = {"allBuilds": [
+                {"number": n, "building": False, "artifacts": paths, "fingerprint": fingerprints}
+                for n in (8, 7, 6)
+            ][start:end]}
+            return resp
+        if "tree=artifacts" in url:
+            paths = [{"relativePath": p} for p in files]
+            resp.content = json.dumps({"artifacts": paths, "fingerprint": fingerprints}).encode()
+            resp.json.return_value = {"building": False}
+            return resp
+        if url.endswith("tree=building"):
+            resp.json.return_value = {"building": False}
+            return resp
+        rel = url.split("/artifact/", 1)[1]
+
+        def chunks(size):
+            yield from files[rel]
+            if rel == fail:
+                raise ConnectionError("reset")
+
+        resp.iter_content.side_effect = chunks
+        return resp
+
+    mock_session.get.side_effect = get
+
+
+def test_artifacts_download(mock_session, tmp_path, capsys):
+    """Artifacts are streamed to disk in chunks."""
+    _artifact_session(mock_session, {"out/a.txt": [b"hello ", b"world"]})
+
+    args = argparse.Namespace(job="my-job", build="5", n=None, dir=str(tmp_path),
+                              glob=None, list=False)
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.artifacts.get_base_url", return_value="http://j"):
+        artifacts_command(args)
+
+    assert (tmp_path / "out" / "a.txt").read_bytes() == b"hello world"
+    assert "1 artifact(s) downloaded" in capsys.readouterr().out
+
+
+def test_artifacts_interrupted_download(mock_session, tmp_path):
+    """A failed download leaves neither a truncated file nor a temp file."""
+    _artifact_session(mock_session, {"big.bin": [b"x" * 10]}, fail="big.bin")
+
+    dest = tmp_path / "out"
+    dest.mkdir()
+    args = argparse.Namespace(job="my-job", build="5", n=None, dir=str(dest),
+                              glob=None, list=False)
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.artifacts.get_base_url", return_value="http://j"):
+        with pytest.raises(ConnectionError):
+            artifacts_command(args)
+
+    assert list(dest.iterdir()) == []
+
+
+def test_artifacts_multi_build_download(mock_session, tmp_path, capsys):
+    """Downloads across a build range share one pool and report totals."""
+    _artifact_session(mock_session, {"a.png": [b"12"], "b.png": [b"345"]})
+
+    args = argparse.Namespace(job="my-job", build="7..8", n=None, dir=str(tmp_path / "out"),
+                              glob="*.png", list=False, jobs=3)
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.artifacts.get_base_url", return_value="http://j"):
+        artifacts_command(args)
+
+    for build in ("7", "8"):
+        assert (tmp_path / "out" / build / "a.png").read_bytes() == b"12"
+        assert (tmp_path / "out" / build / "b.png").read_bytes() == b"345"
+    assert not (tmp_path / "out" / "6").exists()
+    out = capsys.readouterr().out
+    assert "4 artifact(s) downloaded" in out
+    assert "4/4 files" in out
+    listings = [c.args[0] for c in mock_session.get.call_args_list if "/artifact/" not in c.args[0]]
+    assert listings == [
+        "http://j/job/my-job/api/json?tree=lastBuild[number]",
+        "http://j/job/my-job/api/json?tree=allBuilds[number,building,"
+        "artifacts[relativePath],fingerprint[fileName,hash]]{0,2}",
+    ]
+
+
+def _sync_args(dest) -> argparse.Namespace:
+    return argparse.Namespace(job="my-job", build="5", n=None, dir=str(dest),
+                              glob=None, list=False, jobs=2, sync=True)
+
+
+def test_artifacts_sync_skips_fingerprinted(mock_session, tmp_path, capsys):
+    """Files whose MD5 matches the Jenkins fingerprint are not downloaded."""
+    dest = tmp_path / "out"
+    dest.mkdir()
+    (dest / "same.bin").write_bytes(b"same")
+    (dest / "old.bin").write_bytes(b"old")
+    fingerprints = [
+        {"fileName": "same.bin", "hash": hashlib.md5(b"same").hexdigest()},
+        {"fileName": "old.bin", "hash": hashlib.md5(b"new").hexdigest()},
+    ]
+    _artifact_session(mock_session, {"same.bin": [b"same"], "old.bin": [b"new"]},
+                      fingerprints=fingerprints)
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.artifacts.get_base_url", return_value="http://j"):
+        artifacts_command(_sync_args(dest))
+
+    assert (dest / "old.bin").read_bytes() == b"new"
+    downloads = [c.args[0] for c in mock_session.get.call_args_list if "/artifact/" in c.args[0]]
+    assert downloads == ["http://j/job/my-job/5/artifact/old.bin"]
+    assert "1 artifact(s) downloaded to" in capsys.readouterr().out
+    assert set(json.loads((dest / ".zenkins-manifest.json").read_text())) == {"same.bin", "old.bin"}
+
+
+def test_artifacts_sync_manifest(mock_session, tmp_path):
+    """Without fingerprints the manifest's remote validator decides."""
+    dest = tmp_path / "out"
+    _artifact_session(mock_session, {"a.bin": [b"hello"]})
+    mock_session.head.return_value = MagicMock(headers={"Content-Length": "5", "ETag": '"v1"'})
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.artifacts.get_base_url", return_value="http://j"):
+        artifacts_command(_sync_args(dest))
+        calls = mock_session.get.call_count
+        artifacts_command(_sync_args(dest))
+        assert mock_session.get.call_count == calls
+
+        # A new remote version is downloaded again
+        mock_session.head.return_value = MagicMock(headers={"Content-Length": "5", "ETag": '"v2"'})
+        artifacts_command(_sync_args(dest))
+        assert mock_session.get.call_count > calls
+        assert list(dest.glob(".a.bin.*.part")) == []
+
+
+def test_artifacts_sync_resumes_part(mock_session, tmp_path):
+    """An existing .part file for the same remote version is resumed with Range."""
+    dest = tmp_path / "out"
+    dest.mkdir()
+    mock_session.head.return_value = MagicMock(headers={"Content-Length": "11", "ETag": '"v2"'})
+    _artifact_session(mock_session, {"a.bin": [b" world"]})
+    version = hashlib.sha1(b'11:"v2"').hexdigest()[:12]
+    (dest / f".a.bin.{version}.part").write_bytes(b"hello")
+    inner = mock_session.get.side_effect
+
+    def get(url, **kw):
+        resp = inner(url, **kw)
+        resp.status_code = 206 if kw.get("headers", {}).get("Range") == "bytes=5-" else 200
+        return resp
+
+    mock_session.get.side_effect = get
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.artifacts.get_base_url", return_value="http://j"):
+        artifacts_command(_sync_args(dest))
+
+    assert (dest / "a.bin").read_bytes() == b"hello world"
+
+
+def test_fingerprints_need_unique_name_and_hash():
+    """Hashes attach only to names unique in the build and fingerprinted once."""
+    data = {
+        "artifacts": [{"relativePath": "linux/app.bin"}, {"relativePath": "win/app.bin"},
+                      {"relativePath": "lib.so"}, {"relativePath": "notes.txt"}],
+        "fingerprint": [
+            {"fileName": "app.bin", "hash": "a1"}, {"fileName": "app.bin", "hash": "a2"},
+            {"fileName": "lib.so", "hash": "l1"}, {"fileName": "lib.so", "hash": "l2"},
+            {"fileName": "notes.txt", "hash": "n1"},
+        ],
+    }
+
+    assert _select_artifacts(data, "linux/*") == [{"relativePath": "linux/app.bin"}]
+    assert [a.get("md5") for a in _select_artifacts(data, None)] == [None, None, None, "n1"]
+
+
+def test_artifacts_sync_checksum_mismatch(mock_session, tmp_path, capsys):
+    """A file that keeps failing its checksum is reported; the others are synced."""
+    dest = tmp_path / "out"
+    fingerprints = [
+        {"fileName": "bad.bin", "hash": hashlib.md5(b"expected").hexdigest()},
+        {"fileName": "good.bin", "hash": hashlib.md5(b"good").hexdigest()},
+    ]
+    _artifact_session(mock_session, {"bad.bin": [b"corrupt"], "good.bin": [b"good"]},
+                      fingerprints=fingerprints)
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.artifacts.get_base_url", return_value="http://j"), \
+            pytest.raises(SystemExit) as exc:
+        artifacts_command(_sync_args(dest))
+
+    assert exc.value.code == 1
+    assert (dest / "good.bin").read_bytes() == b"good"
+    assert not (dest / "bad.bin").exists()
+    downloads = [c.args[0] for c in mock_session.get.call_args_list if "/artifact/bad.bin" in c.args[0]]
+    assert len(downloads) == 2
+    out, err = capsys.readouterr()
+    assert "1 artifact(s) downloaded to" in out and "1 failed" in out
+    assert "Checksum mismatch" in err
+
+
+def test_artifacts_range_past_last_build(mock_session, tmp_path, capsys):
+    """A range entirely after the last build says so instead of printing nothing."""
+    _artifact_session(mock_session, {"a.txt": [b"a"]})
+
+    args = argparse.Namespace(job="my-job", build="20..25", n=None, dir=str(tmp_path),
+                              glob=None, list=True)
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        artifacts_command(args)
+
+    assert capsys.readouterr().out == "No builds of my-job in 20..25\n"
+    assert mock_session.get.call_count == 1
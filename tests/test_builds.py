@@ -1,6 +1,7 @@
 """Tests for zenkins.builds and zenkins.status."""
 
 import argparse
+import json
 from unittest.mock import MagicMock, patch
 
 from zenkins.builds import builds_command, format_duration
@@ -74,6 +75,8 @@ def test_status_command(mock_session, capsys):
             "description": None,
         }
     }
+    mock_resp.content = json.dumps(mock_resp.json.return_value).encode()
+    mock_resp.headers = {}
     mock_session.get.return_value = mock_resp
 
     args = argparse.Namespace(job="my-job")
@@ -84,3 +87,39 @@ def test_status_command(mock_session, capsys):
     assert "my-job" in out
     assert "#99" in out
     assert "SUCCESS" in out
+
+
+def test_status_multiple_jobs(mock_session, capsys):
+    """Several jobs are fetched concurrently and printed in argument order."""
+    def get(url, **kwargs):
+        resp = MagicMock()
+        job = url.split("/")[4]
+        resp.json.return_value = {"lastBuild": {
+            "number": len(job), "result": "FAILURE" if job == "b" else "SUCCESS",
+            "timestamp": 1700000000000, "duration": 1000, "building": False,
+        }} if job != "c" else {"lastBuild": None}
+        return resp
+
+    mock_session.get.side_effect = get
+
+    args = argparse.Namespace(job=["a", "b", "c"], wait=False)
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        status_command(args)
+
+    out = capsys.readouterr().out
+    assert out.index("a\033") < out.index("b\033")
+    assert "FAILURE" in out
+    assert "No builds found for c" in out
+
+
+def test_status_many_jobs_bounded_concurrency(mock_session):
+    """Long job lists are fetched by at most --jobs workers."""
+    mock_session.get.return_value.json.return_value = {"lastBuild": None}
+
+    args = argparse.Namespace(job=[f"job-{i}" for i in range(50)], wait=False, jobs=4)
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.aclient.set_pool_size") as set_pool_size:
+        status_command(args)
+
+    assert set_pool_size.call_args.args[0] == 4
+    assert mock_session.get.call_count == 50
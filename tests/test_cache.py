@@ -0,0 +1,112 @@
+"""Tests for zenkins.cache."""
+
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from zenkins import cache
+
+
+def _response(url, building=False, status=200):
+    resp = MagicMock()
+    resp.content = f"body of {url}".encode()
+    resp.json.return_value = {"building": building}
+    if status != 200:
+        error_resp = MagicMock(status_code=status)
+        resp.raise_for_status.side_effect = requests.HTTPError(response=error_resp)
+    return resp
+
+
+def test_finished_build_is_cached(mock_session):
+    """Second fetch of a finished build is served from disk."""
+    mock_session.get.side_effect = lambda url, **kw: _response(url)
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        first = cache.fetch("my-job", "7", "consoleText")
+        calls = mock_session.get.call_count
+        second = cache.fetch("my-job", "7", "consoleText")
+
+    assert first == second == b"body of http://j/job/my-job/7/consoleText"
+    assert mock_session.get.call_count == calls
+
+
+def test_running_build_is_not_cached(mock_session):
+    """Responses for builds still running are always refetched."""
+    mock_session.get.side_effect = lambda url, **kw: _response(url, building=True)
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        cache.fetch("my-job", "7", "consoleText")
+        calls = mock_session.get.call_count
+        cache.fetch("my-job", "7", "consoleText")
+
+    assert mock_session.get.call_count > calls
+
+
+def test_missing_endpoint_returns_none(mock_session):
+    """A 404 is reported as None and remembered for finished builds."""
+    def get(url, **kw):
+        return _response(url, status=404 if "robot" in url else 200)
+
+    mock_session.get.side_effect = get
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        assert cache.fetch("my-job", "7", "robot/api/json") is None
+        calls = mock_session.get.call_count
+        assert cache.fetch("my-job", "7", "robot/api/json") is None
+
+    assert mock_session.get.call_count == calls
+
+
+def test_disabled_cache_bypasses_disk(mock_session, cache_dir):
+    """--no-cache fetches directly and writes nothing."""
+    mock_session.get.side_effect = lambda url, **kw: _response(url)
+
+    cache.set_enabled(False)
+    try:
+        with patch("zenkins.client.get_base_url", return_value="http://j"):
+            cache.fetch("my-job", "7", "consoleText")
+    finally:
+        cache.set_enabled(True)
+
+    assert mock_session.get.call_count == 1
+    assert not cache_dir.exists()
+
+
+def test_eviction_keeps_cache_under_budget(mock_session, cache_dir, monkeypatch):
+    """Least recently used entries are evicted once over budget."""
+    monkeypatch.setattr(cache, "MAX_CACHE_BYTES", 200)
+    mock_session.get.side_effect = lambda url, **kw: _response(url)
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        for n in range(10):
+            cache.fetch("my-job", str(n), "consoleText")
+
+    total = sum(p.stat().st_size for p in cache_dir.rglob("*") if p.is_file())
+    assert total <= 200
+
+
+def test_writes_scan_only_when_over_budget(mock_session, cache_dir, monkeypatch):
+    """A running total spares a directory scan per write; markers never scan."""
+    monkeypatch.setattr(cache, "MAX_CACHE_BYTES", 10_000)
+    mock_session.get.side_effect = lambda url, **kw: _response(url)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda *args: scans.append(1) or evict(*args))
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        for n in range(100):
+            cache.mark_finished("my-job", str(n))
+        assert scans == []
+        for n in range(20):
+            cache.fetch("my-job", str(n), "consoleText")
+        # Only the first write, which finds no running total yet, scans
+        assert scans == [1]
+
+        monkeypatch.setattr(cache, "MAX_CACHE_BYTES", 300)
+        cache.fetch("my-job", "50", "consoleText")
+
+    assert scans == [1, 1]
+    entries = [p for p in cache_dir.rglob("*") if p.is_file() and p.name != cache.SIZE_FILE]
+    total = sum(p.stat().st_size for p in entries)
+    assert total <= 300
+    assert int((cache_dir / cache.SIZE_FILE).read_text()) == total
@@ -0,0 +1,42 @@
+"""Tests for zenkins.cassette (recorded against the fake Jenkins server)."""
+
+import argparse
+
+import pytest
+
+from tests.fakejenkins import FakeJenkins, Spec
+from zenkins import cassette
+from zenkins.client import ClientContext, api_get, reset_session, use_context
+from zenkins.failures import failures_command
+from zenkins.jobs import jobs_command
+from zenkins.log import log_command
+
+
+def _run(capsys) -> str:
+    jobs_command(argparse.Namespace(folder=None, recursive=True, jobs=4))
+    failures_command(argparse.Namespace(job="job-1", build=None, n=5, jobs=1))
+    log_command(argparse.Namespace(job="job-1", build="3", follow=False, tail=None, head=5))
+    return capsys.readouterr().out
+
+
+def test_record_and_replay(tmp_path, capsys):
+    """Replay reproduces the recorded output without the server or credentials."""
+    path = tmp_path / "cassette"
+    with FakeJenkins(Spec(jobs=3, builds=8, log_bytes=20_000)) as server:
+        with use_context(ClientContext(server.url, ("user", "secret-token"))):
+            with cassette.record(path):
+                recorded = _run(capsys)
+                api_get("/job/job-1/1/api/json?tree=number")
+                api_get("/job/job-1/1/api/json?tree=number")
+    reset_session()
+
+    index = (path / "index.jsonl").read_text()
+    assert "Authorization" not in index
+    # Identical bodies are stored once
+    assert len(list((path / "bodies").iterdir())) < len(index.splitlines())
+
+    with cassette.replay(path):
+        assert _run(capsys) == recorded
+        with pytest.raises(cassette.CassetteMiss):
+            api_get("/job/unknown/api/json")
+    reset_session()
@@ -1,9 +1,17 @@
 """Tests for zenkins.client."""
 
+import os
+import tomllib
 from unittest.mock import MagicMock, patch
 from pathlib import Path
 
-from zenkins.client import load_credentials, api_get, api_post
+import pytest
+import requests
+
+from zenkins.client import (
+    AdaptiveLimiter, load_credentials, api_get, api_post, get_base_url, get_limiter, get_session,
+    reset_session, resolve_context, use_context,
+)
 
 
 def test_load_credentials(tmp_path):
@@ -72,3 +80,132 @@ def test_api_post(mock_session):
 
     mock_session.post.assert_called_once_with("http://jenkins.example.com/job/test/build")
     mock_resp.raise_for_status.assert_called_once()
+
+
+def test_config_parsed_once(tmp_path):
+    """config.toml is parsed once and re-read only after it changes."""
+    config = tmp_path / "config.toml"
+    config.write_text('url = "http://a"\nuser = "u"\ntoken = "t"\n')
+
+    with patch("zenkins.client.CONFIG_FILE", config), \
+            patch("zenkins.client.tomllib.loads", wraps=tomllib.loads) as loads:
+        for _ in range(5):
+            assert resolve_context().base_url == "http://a"
+        assert loads.call_count == 1
+
+        config.write_text('url = "http://b"\nuser = "u"\ntoken = "t"\n')
+        st = config.stat()
+        os.utime(config, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert resolve_context().base_url == "http://b"
+        assert loads.call_count == 2
+
+
+def test_context_resolved_once_per_command(tmp_path, mock_session, capsys):
+    """cli.run() binds the profile's context instead of resolving it per request."""
+    from zenkins import cli
+
+    config = tmp_path / "config.toml"
+    config.write_text('url = "http://a"\nuser = "u"\ntoken = "t"\n')
+    mock_session.get.return_value = MagicMock(status_code=200, headers={}, content=b'{"items": []}')
+    args = cli.make_parser().parse_args(["jobs"])
+
+    with patch("zenkins.client.CONFIG_FILE", config), \
+            patch("zenkins.client.resolve_context", wraps=resolve_context) as resolve:
+        cli.run(args)
+
+    assert resolve.call_count == 1
+    assert mock_session.get.call_args.args[0].startswith("http://a/api/json")
+
+
+def test_profiles_coexist(tmp_path):
+    """Explicit contexts for different profiles can be used side by side."""
+    config = tmp_path / "config.toml"
+    config.write_text(
+        'url = "http://main"\nuser = "u"\ntoken = "t"\n'
+        '[profile.other]\nurl = "http://other/"\nuser = "v"\ntoken = "s"\n'
+    )
+
+    with patch("zenkins.client.CONFIG_FILE", config):
+        main, other = resolve_context(), resolve_context("other")
+        assert other.base_url == "http://other"
+        assert get_session(main).auth == ("u", "t")
+        assert get_session(other).auth == ("v", "s")
+        with use_context(other):
+            assert get_base_url() == "http://other"
+        assert get_base_url() == "http://main"
+    reset_session()
+
+
+def _status(code: int, headers: dict | None = None) -> MagicMock:
+    resp = MagicMock(status_code=code, headers=headers or {})
+    if code >= 400:
+        resp.raise_for_status.side_effect = requests.HTTPError(response=resp)
+    return resp
+
+
+def test_api_get_retries_overload(mock_session):
+    """429/503 responses are retried, honoring Retry-After."""
+    mock_session.get.side_effect = [
+        _status(503), _status(429, {"Retry-After": "7"}), _status(200),
+    ]
+
+    with patch("zenkins.client.get_base_url", return_value="http://jenkins.example.com"), \
+            patch("zenkins.client.time.sleep") as sleep:
+        resp = api_get("/api/json")
+
+    assert resp.status_code == 200
+    assert mock_session.get.call_count == 3
+    assert sleep.call_args_list[1].args == (7.0,)
+
+
+def test_api_get_gives_up_after_max_retries(mock_session):
+    mock_session.get.return_value = _status(502)
+
+    with patch("zenkins.client.get_base_url", return_value="http://jenkins.example.com"), \
+            patch("zenkins.client.time.sleep"), \
+            pytest.raises(requests.HTTPError):
+        api_get("/api/json")
+
+    assert mock_session.get.call_count == 6
+
+
+def test_api_post_not_retried_on_server_error(mock_session):
+    mock_session.post.return_value = _status(503)
+
+    with patch("zenkins.client.get_base_url", return_value="http://jenkins.example.com"), \
+            pytest.raises(requests.HTTPError):
+        api_post("/job/test/build")
+
+    assert mock_session.post.call_count == 1
+
+
+def test_adaptive_limiter():
+    """The limit halves on pushback and grows back additively."""
+    limiter = AdaptiveLimiter(maximum=8)
+    limiter.acquire()
+    limiter.release(healthy=False)
+    assert limiter.limit == 4
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(healthy=True)
+    assert 4.9 < limiter.limit < 5
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release(healthy=True)
+    assert limiter.limit == 8
+
+
+def test_limiter_released_on_unexpected_errors(mock_session):
+    """Errors other than connection failures don't leak limiter slots."""
+    url = "http://leaky.example.com"
+    mock_session.get.side_effect = requests.exceptions.ChunkedEncodingError()
+
+    with patch("zenkins.client.get_base_url", return_value=url):
+        for _ in range(get_limiter(url).maximum + 1):
+            with pytest.raises(requests.exceptions.ChunkedEncodingError):
+                api_get("/api/json")
+        assert get_limiter(url).in_flight == 0
+
+        mock_session.get.side_effect = None
+        mock_session.get.return_value = _status(200)
+        assert api_get("/api/json").status_code == 200
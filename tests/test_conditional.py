@@ -0,0 +1,79 @@
+"""Tests for zenkins.conditional."""
+
+from unittest.mock import MagicMock, patch
+
+from zenkins import conditional
+
+
+def _response(body=b"", status=200, headers=None):
+    return MagicMock(status_code=status, content=body, headers=headers or {})
+
+
+def test_not_modified_reuses_body(mock_session):
+    """Validators are sent back and a 304 returns the remembered body."""
+    mock_session.get.side_effect = [
+        _response(b'{"a": 1}', headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        _response(status=304),
+    ]
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        first, changed1 = conditional.get_json("/queue/api/json")
+        second, changed2 = conditional.get_json("/queue/api/json")
+
+    assert (changed1, changed2) == (True, False)
+    assert second is first == {"a": 1}
+    headers = mock_session.get.call_args.kwargs["headers"]
+    assert headers == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+
+def test_unchanged_body_without_validators(mock_session):
+    """Without validators an identical body is detected by its hash."""
+    mock_session.get.side_effect = [
+        _response(b'{"a": 1}'), _response(b'{"a": 1}'), _response(b'{"a": 2}'),
+    ]
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        first, _ = conditional.get_json("/api/json")
+        with patch("zenkins.conditional.json.loads") as loads:
+            same, changed = conditional.get_json("/api/json")
+        assert not loads.called
+        new, changed2 = conditional.get_json("/api/json")
+
+    assert same is first and not changed
+    assert new == {"a": 2} and changed2
+    mock_session.get.assert_called_with("http://j/api/json")
+
+
+def test_persisted_validators(mock_session):
+    """With persist=True a later process revalidates the copy on disk."""
+    mock_session.get.side_effect = [
+        _response(b'{"jobs": []}', headers={"ETag": '"v1"'}),
+        _response(status=304),
+    ]
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        conditional.get("/api/json", persist=True)
+        conditional.clear()
+        body, changed = conditional.get("/api/json", persist=True)
+
+    assert body == b'{"jobs": []}'
+    assert not changed
+    assert mock_session.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+
+
+def test_only_validated_responses_persisted(mock_session, monkeypatch, tmp_path):
+    """Bodies without validators stay in memory; the directory is bounded."""
+    monkeypatch.setattr("zenkins.conditional.MAX_VALIDATOR_BYTES", 100)
+    mock_session.get.side_effect = lambda url, **kw: _response(
+        b'{"jobs": []}', headers={"ETag": '"v1"'} if "tagged" in url else {}
+    )
+    validators = tmp_path / "validators"
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        conditional.get("/plain/api/json", persist=True)
+        assert not validators.exists()
+        for n in range(20):
+            conditional.get(f"/tagged/{n}/api/json", persist=True)
+
+    entries = [p for p in validators.iterdir() if p.name != "size"]
+    assert 0 < sum(p.stat().st_size for p in entries) <= 100
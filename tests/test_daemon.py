@@ -0,0 +1,136 @@
+"""Tests for zenkins.daemon."""
+
+import io
+import json
+import threading
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from zenkins import daemon
+from zenkins.parallel import parallel_map
+
+
+@contextmanager
+def running(path):
+    """A daemon serving on *path*, stopped on exit."""
+    ready = threading.Event()
+    thread = threading.Thread(target=daemon.serve, args=(path, ready), daemon=True)
+    thread.start()
+    assert ready.wait(10)
+    try:
+        yield
+    finally:
+        daemon.stop(path)
+        thread.join(10)
+
+
+@pytest.fixture
+def socket_path(tmp_path, monkeypatch):
+    path = tmp_path / "daemon.sock"
+    monkeypatch.setattr("zenkins.daemon.SOCKET_PATH", path)
+    return path
+
+
+def test_forward_without_daemon(socket_path):
+    assert daemon.forward(["queue"]) is None
+
+
+def test_forward_runs_command_in_daemon(socket_path, mock_session, tmp_path):
+    """Output and exit status come back from the daemon."""
+    config = tmp_path / "config.toml"
+    config.write_text('url = "http://j"\nuser = "u"\ntoken = "t"\n')
+    resp = MagicMock(status_code=200, headers={})
+    resp.content = json.dumps({"items": [{"task": {"name": "deploy"}, "why": "Waiting"}]}).encode()
+    mock_session.get.return_value = resp
+    out, err = io.BytesIO(), io.BytesIO()
+
+    with patch("zenkins.client.CONFIG_FILE", config), running(socket_path):
+        code = daemon.forward(["queue"], out, err)
+
+    assert code == 0
+    assert "deploy" in out.getvalue().decode()
+    assert "Waiting" in out.getvalue().decode()
+
+
+def test_daemon_refuses_other_commands(socket_path):
+    out, err = io.BytesIO(), io.BytesIO()
+
+    with running(socket_path):
+        assert daemon.forward(["build", "deploy"], out, err) == 2
+    assert b"not served by the daemon" in err.getvalue()
+    assert out.getvalue() == b""
+
+
+@pytest.mark.parametrize("argv", [["status", "deploy", "--wait"], ["log", "deploy", "-f"]])
+def test_daemon_refuses_polling_commands(socket_path, argv):
+    """Polling commands would outlive a client that went away."""
+    out, err = io.BytesIO(), io.BytesIO()
+
+    with running(socket_path):
+        assert daemon.forward(argv, out, err) == 2
+    assert b"not served by the daemon" in err.getvalue()
+
+
+def test_write_stream_broken_pipe_without_fileno(monkeypatch):
+    """A client that hung up doesn't cost the daemon a file descriptor."""
+    from zenkins import log
+
+    class Gone(io.StringIO):
+        def write(self, s):
+            raise BrokenPipeError
+
+        def fileno(self):
+            raise io.UnsupportedOperation("fileno")
+
+    monkeypatch.setattr("sys.stdout", Gone())
+    with patch("os.open") as os_open, pytest.raises(SystemExit):
+        log.write_stream(iter([b"line\n"]))
+    os_open.assert_not_called()
+
+
+def test_redirect_reaches_worker_threads():
+    """Output of a command's worker threads goes to its client too."""
+    default, client = io.StringIO(), io.StringIO()
+    redirect = daemon._Redirect(default, "stdout")
+
+    token = redirect.set(client)
+    parallel_map(lambda i: redirect.write(f"{i}\n"), range(4), 2)
+    redirect.reset(token)
+    redirect.write("daemon\n")
+
+    assert sorted(client.getvalue().split()) == ["0", "1", "2", "3"]
+    assert default.getvalue() == "daemon\n"
+
+
+def test_client_disconnect_cancels_command(socket_path, mock_session, tmp_path):
+    """Once the client hangs up, the command makes no further requests."""
+    config = tmp_path / "config.toml"
+    config.write_text('url = "http://j"\nuser = "u"\ntoken = "t"\n')
+    hung_up = threading.Event()
+    urls = []
+
+    def get(url, **kw):
+        urls.append(url)
+        hung_up.wait(5)
+        # Give the daemon a moment to notice
+        time.sleep(0.2)
+        resp = MagicMock(status_code=200, headers={})
+        resp.json.return_value = {"building": False}
+        return resp
+
+    mock_session.get.side_effect = get
+
+    with patch("zenkins.client.CONFIG_FILE", config), running(socket_path):
+        sock = daemon._connect(socket_path)
+        daemon._send(sock, daemon.REQUEST, json.dumps({"argv": ["log", "deploy", "5"]}).encode())
+        while not urls:
+            time.sleep(0.01)
+        sock.close()
+        hung_up.set()
+        time.sleep(0.5)
+
+    # The build's status was being fetched; its console log never is
+    assert urls == ["http://j/job/deploy/5/api/json?tree=building"]
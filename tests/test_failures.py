@@ -0,0 +1,233 @@
+"""Tests for zenkins.failures."""
+
+import argparse
+import json
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from zenkins.failures import failures_command
+
+
+JUNIT_ACTION = {"_class": "hudson.tasks.junit.TestResultAction"}
+
+
+def _report(*names: str) -> dict:
+    return {"suites": [{"cases": [
+        {"className": "pkg.Test", "name": n, "status": "FAILED"} for n in names
+    ]}]}
+
+
+def _api(url: str, reports: dict[str, dict]) -> dict:
+    """Job listing or build JSON for builds with *reports*."""
+    if "tree=lastBuild[number]" in url:
+        return {"lastBuild": {"number": int(max(reports))}}
+    if "tree=allBuilds[" in url:
+        start, end = map(int, url.rsplit("{", 1)[1].rstrip("}").split(","))
+        return {"allBuilds": [
+            {"number": int(b), "building": False,
+             "actions": [dict(JUNIT_ACTION, failCount=sum(len(s["cases"]) for s in r["suites"]))]}
+            for b, r in sorted(reports.items(), reverse=True)
+        ][start:end]}
+    return {"building": False, "actions": [JUNIT_ACTION]}
+
+
+def test_failures_range_summary(mock_session, capsys):
+    """Range summaries classify failures independent of fetch order."""
+    reports = {
+        "40": _report("a", "b"),
+        "41": _report("a", "c"),
+        "42": _report("a", "b"),
+    }
+
+    def get(url, **kwargs):
+        resp = MagicMock()
+        build = url.split("/")[5]
+        if "/testReport/" in url:
+            resp.content = json.dumps(reports[build]).encode()
+        else:
+            resp.content = b"{}"
+        resp.iter_content.return_value = iter([resp.content])
+        resp.json.return_value = _api(url, reports)
+        return resp
+
+    mock_session.get.side_effect = get
+
+    args = argparse.Namespace(job="my-job", build="40..42", n=None, jobs=4)
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        failures_command(args)
+
+    out = capsys.readouterr().out.split("\r\033[K")[-1]
+    assert "3 builds, #40-#42" in out
+    assert "Persistent (3/3 builds):\n  pkg.Test.a\n" in out
+    assert "pkg.Test.b (2/3)" in out
+    assert "pkg.Test.c (#41)" in out
+
+
+def _listing(numbers: list[int]):
+    """Mock GET for a job whose history holds builds *numbers*, newest first."""
+    def get(url, **kwargs):
+        resp = MagicMock()
+        if "tree=lastBuild[number]" in url:
+            resp.json.return_value = {"lastBuild": {"number": numbers[0]}}
+        else:
+            start, end = map(int, url.rsplit("{", 1)[1].rstrip("}").split(","))
+            resp.json.return_value = {"allBuilds": [
+                {"number": n, "building": False} for n in numbers[start:end]
+            ]}
+        return resp
+    return get
+
+
+def test_query_builds_pages_range(mock_session):
+    """Ranges are resolved from allBuilds pages at the positions of the builds."""
+    from zenkins.failures import _query_builds
+
+    mock_session.get.side_effect = _listing([12, 11, 10, 8, 7, 6, 5, 4])
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.failures.BUILDS_PAGE", 2):
+        builds = _query_builds("my-job", "result", "6..10", None)
+
+    assert [b["number"] for b in builds] == [6, 7, 8, 10]
+    urls = [c.args[0] for c in mock_session.get.call_args_list]
+    assert urls == [
+        "http://j/job/my-job/api/json?tree=lastBuild[number]",
+        "http://j/job/my-job/api/json?tree=allBuilds[number,building,result]{2,4}",
+        "http://j/job/my-job/api/json?tree=allBuilds[number,building,result]{4,6}",
+        "http://j/job/my-job/api/json?tree=allBuilds[number,building,result]{6,7}",
+    ]
+
+
+def test_query_builds_range_after_deleted_builds(mock_session):
+    """Builds moved forward by deleted newer ones are located by number."""
+    from zenkins.failures import _query_builds
+
+    mock_session.get.side_effect = _listing([12, 11, 10, 8, 7, 6, 5, 4])
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        builds = _query_builds("my-job", "result", "5..7", None)
+
+    assert [b["number"] for b in builds] == [5, 6, 7]
+    urls = [c.args[0] for c in mock_session.get.call_args_list]
+    assert urls[1:] == [
+        "http://j/job/my-job/api/json?tree=allBuilds[number,building,result]{5,8}",
+        "http://j/job/my-job/api/json?tree=allBuilds[number,building]{0,5}",
+        "http://j/job/my-job/api/json?tree=allBuilds[number,building,result]{4,5}",
+    ]
+
+
+def test_failures_reports_unfetchable_builds(mock_session, capsys):
+    """Builds that keep failing are reported instead of silently skipped."""
+    def get(url, **kwargs):
+        resp = MagicMock(status_code=200)
+        if "/41/" in url:
+            resp.status_code = 500
+            resp.raise_for_status.side_effect = requests.HTTPError("500 Server Error", response=resp)
+        resp.content = json.dumps(_report("a")).encode() if "/testReport/" in url else b"{}"
+        resp.iter_content.return_value = iter([resp.content])
+        resp.json.return_value = _api(url, {b: _report("a") for b in ("40", "41", "42")})
+        return resp
+
+    mock_session.get.side_effect = get
+
+    args = argparse.Namespace(job="my-job", build="40..42", n=None, jobs=4)
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        failures_command(args)
+
+    captured = capsys.readouterr()
+    assert "Persistent (2/2 builds):\n  pkg.Test.a\n" in captured.out
+    assert "1 build(s) could not be fetched" in captured.err
+    assert "#41: 500 Server Error" in captured.err
+
+
+def test_failures_history_syncs_only_new_builds(mock_session, cache_dir, capsys):
+    """Recorded builds are answered from the test history, not refetched."""
+    import shutil
+
+    reports = {"40": _report("a"), "41": _report("a", "b"), "42": _report("a")}
+    fetched = []
+
+    def get(url, **kwargs):
+        resp = MagicMock()
+        build = url.split("/")[5]
+        if "/testReport/" in url:
+            fetched.append(build)
+            resp.content = json.dumps(reports[build]).encode()
+        else:
+            resp.content = b"{}"
+        resp.iter_content.return_value = iter([resp.content])
+        resp.json.return_value = _api(url, reports)
+        return resp
+
+    mock_session.get.side_effect = get
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        failures_command(argparse.Namespace(job="my-job", build="40..41", n=None, jobs=4))
+        # Without the build cache, only the history can spare refetching 40-41
+        shutil.rmtree(cache_dir)
+        fetched.clear()
+        capsys.readouterr()
+        failures_command(argparse.Namespace(job="my-job", build="40..42", n=None, jobs=4))
+
+    assert fetched == ["42"]
+    out = capsys.readouterr().out.split("\r\033[K")[-1]
+    assert "3 builds, #40-#42" in out
+    assert "Persistent (3/3 builds):\n  pkg.Test.a\n" in out
+    assert "pkg.Test.b (#41)" in out
+
+
+def test_failures_flaky_report(mock_session, capsys):
+    """--flaky ranks flip-flopping tests and lists tests broken since a build."""
+    reports = {
+        "40": _report("flaky"),
+        "41": _report(),
+        "42": _report("flaky", "broken"),
+        "43": _report("broken"),
+        "44": _report("flaky", "broken"),
+    }
+
+    def get(url, **kwargs):
+        resp = MagicMock()
+        build = url.split("/")[5]
+        resp.content = json.dumps(reports[build]).encode() if "/testReport/" in url else b"{}"
+        resp.iter_content.return_value = iter([resp.content])
+        resp.json.return_value = _api(url, reports)
+        return resp
+
+    mock_session.get.side_effect = get
+
+    args = argparse.Namespace(job="my-job", build="40..44", n=None, jobs=4, flaky=True)
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        failures_command(args)
+
+    out = capsys.readouterr().out.split("\r\033[K")[-1]
+    assert "1.00      4        3/5       1  pkg.Test.flaky (failing since #44)" in out
+    assert "Failing since:\n  #42     pkg.Test.broken\n" in out
+
+
+def test_failures_skips_builds_without_failures(mock_session, capsys):
+    """Green builds count towards the totals without fetching their reports."""
+    reports = {"40": _report("a"), "41": _report(), "42": _report(), "43": _report("a")}
+
+    def get(url, **kwargs):
+        resp = MagicMock()
+        build = url.split("/")[5]
+        resp.content = json.dumps(reports[build]).encode() if "/testReport/" in url else b"{}"
+        resp.iter_content.return_value = iter([resp.content])
+        resp.json.return_value = _api(url, reports)
+        return resp
+
+    mock_session.get.side_effect = get
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        failures_command(argparse.Namespace(job="my-job", build=None, n=4, jobs=4))
+
+    urls = [c.args[0] for c in mock_session.get.call_args_list]
+    assert urls[0] == "http://j/job/my-job/api/json?tree=allBuilds[number,building,actions[_class,failCount]]{0,4}"
+    assert sorted(u.split("/")[5] for u in urls if "/testReport/" in u) == ["40", "43"]
+    # No separate publisher detection: the listing already showed JUnit
+    assert not any("/robot/" in u or "actions[_class]" in u for u in urls[1:])
+    out = capsys.readouterr().out.split("\r\033[K")[-1]
+    assert "4 builds, #40-#43" in out
+    assert "pkg.Test.a (2/4)" in out
@@ -0,0 +1,117 @@
+"""End-to-end tests against the fake Jenkins server (real HTTP, no mocks)."""
+
+import argparse
+import hashlib
+import socket
+import struct
+import time
+
+import pytest
+
+from tests.fakejenkins import FakeJenkins, Spec
+from zenkins.artifacts import artifacts_command
+from zenkins.client import ClientContext, api_get, reset_session, use_context
+from zenkins.failures import failures_command
+from zenkins.jobs import jobs_command
+from zenkins.log import TAIL_WINDOW, tail_log
+
+
+@pytest.fixture
+def jenkins():
+    """A small fake instance, with the client pointed at it."""
+    with FakeJenkins(Spec(jobs=6, folder_depth=1, folder_fanout=2, builds=120, cases=400,
+                          log_bytes=300_000)) as server:
+        with use_context(ClientContext(server.url, ("user", "token"))):
+            yield server
+    reset_session()
+
+
+def _summary(out: str) -> str:
+    """Drop the progress lines that precede a multi-build summary."""
+    return out.rsplit("\r\033[K", 1)[-1]
+
+
+def test_jobs_recursive(jenkins, capsys):
+    jobs_command(argparse.Namespace(folder=None, recursive=True, jobs=4))
+
+    out = capsys.readouterr().out
+    assert "folder-0/job-0" in out and "folder-1/job-5" in out
+
+
+def test_failures_range_past_builds_limit(jenkins, capsys):
+    """Builds older than the listed 100 come from allBuilds; the cache serves a re-run."""
+    args = argparse.Namespace(job="folder-0/job-0", build="15..25", n=None, jobs=4)
+    failures_command(args)
+    first = _summary(capsys.readouterr().out)
+    # lastBuild, then one allBuilds page for the range; no per-build lookups
+    assert jenkins.requests["GET /job/folder-0/job/job-0/api/json"] == 2
+    assert "GET /job/folder-0/job/job-0/N/api/json" not in jenkins.requests
+    requests_first = jenkins.total_requests
+
+    failures_command(args)
+    assert _summary(capsys.readouterr().out) == first
+    assert first.startswith("11 builds, #15-#25")
+    assert "Persistent (11/11 builds):" in first
+    # The re-run only lists builds; reports come from the history
+    assert jenkins.total_requests - requests_first == 2
+
+
+def test_tail_log(jenkins):
+    tail = tail_log("folder-0/job-0", "lastBuild", 3)
+
+    lines = tail.splitlines()
+    assert len(lines) == 3
+    assert all(len(line) == 79 for line in lines)
+    assert jenkins.requests["HEAD /job/folder-0/job/job-0/lastBuild/logText/progressiveText"] == 1
+    assert jenkins.requests["GET /job/folder-0/job/job-0/lastBuild/logText/progressiveText"] == 1
+    # Only the tail window of the 300 kB log is transferred
+    assert jenkins.bytes_sent <= TAIL_WINDOW
+
+
+def test_artifacts_sync(jenkins, tmp_path, capsys):
+    """Downloads match the fingerprints, and a second sync fetches nothing."""
+    args = argparse.Namespace(job="folder-1/job-1", build=None, n=2, dir=str(tmp_path / "out"),
+                              glob=None, list=False, jobs=4, sync=True)
+    artifacts_command(args)
+    files = sorted((tmp_path / "out").glob("*/dist/*.bin"))
+    assert len(files) == 8
+    expected = jenkins.instance.artifact_md5("folder-1/job-1", 120, 0)
+    assert hashlib.md5(files[-4].read_bytes()).hexdigest() == expected
+
+    jenkins.reset_stats()
+    artifacts_command(args)
+    assert "0 artifact(s) downloaded" in capsys.readouterr().out.splitlines()[-1]
+    assert not any("/artifact/" in kind for kind in jenkins.requests)
+
+
+def test_retries_injected_errors(jenkins, monkeypatch, capsys):
+    monkeypatch.setattr("zenkins.client._backoff", lambda attempt: 0)
+    jenkins.spec.error_rate = 0.3
+
+    failures_command(argparse.Namespace(job="folder-0/job-2", build=None, n=10, jobs=4))
+
+    assert _summary(capsys.readouterr().out).startswith("10 builds")
+    assert jenkins.errors > 0
+
+
+def test_progressive_start_past_end_resets(jenkins):
+    """Like Jenkins, a start offset past the end of the log serves it from 0."""
+    size = jenkins.instance.log_size()
+    path = "/job/folder-0/job/job-0/lastBuild/logText/progressiveText"
+
+    assert len(api_get(f"{path}?start={size - 10}").content) == 10
+    assert len(api_get(f"{path}?start={size + 10}").content) == size
+
+
+def test_client_reset_is_quiet(jenkins, capsys):
+    """Clients dropping a connection mid-response don't print tracebacks."""
+    host, port = jenkins.server_address[:2]
+    sock = socket.create_connection((host, port))
+    sock.sendall(b"GET /job/folder-0/job/job-0/1/consoleText HTTP/1.1\r\nHost: x\r\n\r\n")
+    sock.recv(1024)
+    # Close with a reset rather than a FIN
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    sock.close()
+    time.sleep(0.2)
+
+    assert "Traceback" not in capsys.readouterr().err
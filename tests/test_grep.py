@@ -0,0 +1,64 @@
+"""Tests for zenkins.grep."""
+
+import argparse
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from zenkins.grep import grep_command
+
+
+def _logs(logs: dict[str, list[bytes]]):
+    def get(url, **kw):
+        resp = MagicMock()
+        build = url.split("/")[5]
+        resp.iter_content.return_value = iter(logs[build])
+        resp.json.return_value = {"building": False}
+        return resp
+    return get
+
+
+def _args(**kw) -> argparse.Namespace:
+    defaults = dict(job="my-job", pattern="error", build="1..3", n=None,
+                    files_with_matches=False, ignore_case=False, jobs=4)
+    return argparse.Namespace(**{**defaults, **kw})
+
+
+def test_grep_range(mock_session, capsys):
+    """Matches are reported per build in build order, across chunk boundaries."""
+    mock_session.get.side_effect = _logs({
+        "1": [b"ok\nan err", b"or here\n"],
+        "2": [b"all good\n"],
+        "3": [b"error 1\nfine\nerror 2"],
+    })
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        grep_command(_args())
+
+    assert capsys.readouterr().out == (
+        "#1:2: an error here\n"
+        "#3:1: error 1\n"
+        "#3:3: error 2\n"
+    )
+
+
+def test_grep_list_builds(mock_session, capsys):
+    """-l lists matching builds only."""
+    mock_session.get.side_effect = _logs({
+        "1": [b"ERROR\n"], "2": [b"nothing\n"], "3": [b"Error\nerror\n"],
+    })
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        grep_command(_args(files_with_matches=True, ignore_case=True))
+
+    assert capsys.readouterr().out == "#1\n#3\n"
+
+
+def test_grep_no_match_exits_1(mock_session):
+    mock_session.get.side_effect = _logs({"1": [b"x\n"], "2": [b"y\n"], "3": [b"z\n"]})
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        with pytest.raises(SystemExit) as exc:
+            grep_command(_args())
+
+    assert exc.value.code == 1
@@ -1,6 +1,7 @@
 """Tests for zenkins.jobs."""
 
 import argparse
+import json
 from unittest.mock import MagicMock, patch
 
 from zenkins.jobs import jobs_command, STATUS_MAP, COLOR_MAP
@@ -15,6 +16,8 @@ def test_jobs_command(mock_session, capsys):
             {"name": "broken-job", "color": "red", "url": "http://j/job/broken-job/"},
         ]
     }
+    mock_resp.content = json.dumps(mock_resp.json.return_value).encode()
+    mock_resp.headers = {}
     mock_session.get.return_value = mock_resp
 
     with patch("zenkins.client.get_base_url", return_value="http://j"):
@@ -31,6 +34,8 @@ def test_jobs_empty(mock_session, capsys):
     """Test empty jobs list."""
     mock_resp = MagicMock()
     mock_resp.json.return_value = {"jobs": []}
+    mock_resp.content = json.dumps(mock_resp.json.return_value).encode()
+    mock_resp.headers = {}
     mock_session.get.return_value = mock_resp
 
     with patch("zenkins.client.get_base_url", return_value="http://j"):
@@ -44,3 +49,36 @@ def test_status_map_covers_colors():
     """All colors in COLOR_MAP should have a STATUS_MAP entry."""
     for color in COLOR_MAP:
         assert color in STATUS_MAP
+
+
+def test_jobs_recursive(mock_session, capsys):
+    """-r descends into folders and prints full job paths."""
+    listings = {
+        "http://j/api/json": {"jobs": [
+            {"name": "top", "color": "blue"},
+            {"name": "team", "jobs": [{"name": "svc"}]},
+        ]},
+        "http://j/job/team/api/json": {"jobs": [
+            {"name": "svc", "color": "red"},
+            {"name": "nested", "jobs": []},
+        ]},
+        "http://j/job/team/job/nested/api/json": {"jobs": [
+            {"name": "deep", "color": "yellow"},
+        ]},
+    }
+
+    def get(url, **kwargs):
+        resp = MagicMock()
+        resp.json.return_value = listings[url.split("?")[0]]
+        return resp
+
+    mock_session.get.side_effect = get
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        jobs_command(argparse.Namespace(folder=None, recursive=True, jobs=4))
+
+    out = capsys.readouterr().out
+    assert "top" in out
+    assert "team/svc" in out
+    assert "team/nested/deep" in out
+    assert "UNSTABLE" in out
@@ -0,0 +1,132 @@
+"""Tests for zenkins.log."""
+
+import argparse
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from zenkins.log import iter_lines, log_command
+
+
+def _log_response(chunks: list[bytes]) -> MagicMock:
+    resp = MagicMock()
+    resp.iter_content.return_value = iter(chunks)
+    resp.json.return_value = {"building": False}
+    return resp
+
+
+def test_log_streams_chunks(mock_session, capsys):
+    """Multi-byte characters split across chunks are decoded correctly."""
+    text = "Started ✓\nFinished: SUCCESS\n".encode()
+    split = text.index("✓".encode()) + 1
+    mock_session.get.side_effect = lambda url, **kw: _log_response([text[:split], text[split:]])
+
+    args = argparse.Namespace(job="my-job", build="12")
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        log_command(args)
+
+    assert capsys.readouterr().out == "Started ✓\nFinished: SUCCESS\n"
+    log_call = [c for c in mock_session.get.call_args_list if c.args[0].endswith("/consoleText")]
+    assert log_call[0].kwargs == {"stream": True}
+
+
+def test_log_served_from_cache(mock_session, capsys):
+    """A finished build's log is downloaded only once."""
+    mock_session.get.side_effect = lambda url, **kw: _log_response([b"line 1\n", b"line 2\n"])
+
+    args = argparse.Namespace(job="my-job", build="12")
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        log_command(args)
+        calls = mock_session.get.call_count
+        log_command(args)
+
+    assert mock_session.get.call_count == calls
+    assert capsys.readouterr().out == "line 1\nline 2\n" * 2
+
+
+def test_log_follow(mock_session, capsys):
+    """Follow mode polls from the last offset and exits with the result code."""
+    polls = [
+        ({"X-Text-Size": "6", "X-More-Data": "true"}, [b"step1\n"]),
+        ({"X-Text-Size": "12"}, [b"step2\n"]),
+    ]
+
+    def get(url, **kw):
+        resp = MagicMock()
+        if "progressiveText" in url:
+            headers, chunks = polls.pop(0)
+            resp.headers = headers
+            resp.iter_content.return_value = iter(chunks)
+        else:
+            resp.json.return_value = {"result": "UNSTABLE"}
+        return resp
+
+    mock_session.get.side_effect = get
+
+    args = argparse.Namespace(job="my-job", build="12", follow=True)
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.log.FOLLOW_INTERVAL", 0):
+        with pytest.raises(SystemExit) as exc:
+            log_command(args)
+
+    assert exc.value.code == 2
+    assert capsys.readouterr().out == "step1\nstep2\n"
+    urls = [c.args[0] for c in mock_session.get.call_args_list if "progressiveText" in c.args[0]]
+    assert urls == [
+        "http://j/job/my-job/12/logText/progressiveText?start=0",
+        "http://j/job/my-job/12/logText/progressiveText?start=6",
+    ]
+
+
+def test_log_head_stops_early(mock_session, capsys):
+    """Head mode stops reading once enough lines have been written."""
+    chunks = [b"a\nb\n", b"c\nd\n", b"e\n"]
+    resp = _log_response(chunks)
+    # The client wraps these to track the streamed body
+    iter_content, close = resp.iter_content, resp.close
+    mock_session.get.side_effect = lambda url, **kw: resp
+
+    args = argparse.Namespace(job="my-job", build="12", head=3)
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        log_command(args)
+
+    assert capsys.readouterr().out == "a\nb\nc\n"
+    assert next(iter_content.return_value) == b"e\n"
+    close.assert_called()
+
+
+def test_log_tail_fetches_only_the_end(mock_session, capsys):
+    """Tail mode widens a byte window until it holds N lines."""
+    log = b"".join(f"line {i}\n".encode() for i in range(1000))
+
+    def get(url, **kw):
+        resp = MagicMock()
+        start = int(url.rsplit("start=", 1)[1])
+        resp.headers = {"X-Text-Size": str(len(log))}
+        resp.content = log[start:] if start <= len(log) else log
+        return resp
+
+    mock_session.get.side_effect = get
+    mock_session.head.return_value = MagicMock(status_code=200, headers={"X-Text-Size": str(len(log))})
+
+    args = argparse.Namespace(job="my-job", build="12", tail=2)
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+            patch("zenkins.log.get_base_url", return_value="http://j"), \
+            patch("zenkins.log.TAIL_WINDOW", 16):
+        log_command(args)
+
+    assert capsys.readouterr().out == "line 998\nline 999\n"
+    # The size comes from a HEAD request, so no GET starts the whole log
+    assert mock_session.head.call_args.args[0].endswith("progressiveText?start=0")
+    starts = [c.args[0].rsplit("=", 1)[1] for c in mock_session.get.call_args_list]
+    assert starts == [str(len(log) - 16), str(len(log) - 32)]
+
+
+def test_iter_lines_bounds_long_lines():
+    """A log without newlines is yielded in pieces rather than buffered whole."""
+    chunks = [b"x" * 1000] * 10 + [b"\ndone\n"]
+
+    with patch("zenkins.log.MAX_LINE", 2500):
+        lines = list(iter_lines(iter(chunks)))
+
+    assert [len(line) for line in lines] == [2500, 2500, 2500, 2500, 4]
@@ -0,0 +1,46 @@
+"""Tests for zenkins.matrix."""
+
+import pytest
+
+from zenkins.matrix import OutcomeMatrix
+
+
+def _matrix(pattern: str, first: int = 10) -> OutcomeMatrix:
+    """Matrix of one test "t" failing where *pattern* has an "x" (oldest first)."""
+    builds = range(first, first + len(pattern))
+    return OutcomeMatrix.from_failures(builds, {"t": [b for b, c in zip(builds, pattern) if c == "x"]})
+
+
+@pytest.mark.parametrize("pattern, flips, streak, since", [
+    ("xxxxx", 0, 5, 10),
+    (".....", 0, 0, None),
+    ("..xxx", 1, 3, 12),
+    ("xx...", 1, 2, None),
+    ("x.x.x", 4, 1, 14),
+    (".xx.x", 3, 2, 14),
+])
+def test_queries(pattern, flips, streak, since):
+    m = _matrix(pattern)
+    assert m.failures("t") == pattern.count("x")
+    assert m.failing_builds("t") == [10 + i for i, c in enumerate(pattern) if c == "x"]
+    assert m.flips("t") == flips
+    assert m.flip_rate("t") == flips / 4
+    assert m.longest_streak("t") == streak
+    assert m.streak_start("t") == since
+    assert m.is_persistent("t") == (pattern == "xxxxx")
+
+
+def test_flakiness_weights_recent_flips():
+    assert _matrix("x.x.x").flakiness("t") == pytest.approx(1.0)
+    assert _matrix("xxxxx").flakiness("t") == 0.0
+    # Same number of flips, but the recent ones count more
+    assert _matrix("x.x......").flakiness("t") < _matrix("......x.x").flakiness("t")
+
+
+def test_large_window():
+    builds = range(1, 5001)
+    m = OutcomeMatrix.from_failures(builds, {"t": list(range(4001, 5001)) + [10, 20]})
+    assert m.failures("t") == 1002
+    assert m.longest_streak("t") == 1000
+    assert m.streak_start("t") == 4001
+    assert m.flips("t") == 5
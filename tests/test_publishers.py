@@ -0,0 +1,60 @@
+"""Tests for zenkins.publishers."""
+
+import argparse
+import json
+from unittest.mock import MagicMock, patch
+
+from zenkins import publishers
+from zenkins.failures import failures_command
+
+ROBOT_ACTION = {"_class": "hudson.plugins.robot.RobotBuildAction"}
+
+
+def _build(*actions) -> MagicMock:
+    resp = MagicMock()
+    resp.json.return_value = {"building": False, "actions": [None, {}, *actions]}
+    return resp
+
+
+def test_detect_remembers_per_job(mock_session):
+    mock_session.get.return_value = _build(ROBOT_ACTION)
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        assert publishers.detect("my-job", "7") == {"robot"}
+        publishers.clear()
+        # Served from disk after the in-memory entry is gone
+        assert publishers.detect("my-job", "8") == {"robot"}
+
+    mock_session.get.assert_called_once_with("http://j/job/my-job/7/api/json?tree=building,actions[_class]")
+
+
+def test_detect_expires_and_ignores_empty_builds(mock_session, monkeypatch):
+    mock_session.get.return_value = _build()
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        assert publishers.detect("my-job", "7") == frozenset()
+        mock_session.get.return_value = _build({"_class": "hudson.tasks.junit.TestResultAction"})
+        assert publishers.detect("my-job", "8") == {"junit"}
+        monkeypatch.setattr("zenkins.publishers.PUBLISHER_TTL", 0)
+        assert publishers.detect("my-job", "9") == {"junit"}
+
+    assert mock_session.get.call_count == 3
+
+
+def test_failures_queries_only_detected_publishers(mock_session, capsys):
+    def get(url, **kwargs):
+        if "/robot/" in url:
+            resp = MagicMock()
+            resp.content = json.dumps({"overallFailed": 1, "overallPassed": 2,
+                                       "failedCases": ["Suite.Login"]}).encode()
+            return resp
+        return _build(ROBOT_ACTION)
+
+    mock_session.get.side_effect = get
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"):
+        failures_command(argparse.Namespace(job="my-job", build="7", n=None, jobs=1))
+
+    assert "Robot: 1 failed, 2 passed" in capsys.readouterr().out
+    urls = [c.args[0] for c in mock_session.get.call_args_list]
+    assert not any("/testReport/" in u for u in urls)
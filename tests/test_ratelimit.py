@@ -0,0 +1,80 @@
+"""Tests for zenkins.ratelimit."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from zenkins.client import ClientContext, api_get
+from zenkins.ratelimit import HostBudget
+
+
+def test_token_bucket_shared_between_processes():
+    """Budgets for the same controller draw from one bucket on disk."""
+    a = HostBudget("http://j", rate=2)
+    b = HostBudget("http://j", rate=2)
+
+    assert a._take_token() == 0
+    assert b._take_token() == 0
+    assert a._take_token() > 0
+
+
+def test_in_flight_slots_shared_between_processes():
+    """With max_in_flight=1 a second holder waits for the first to finish."""
+    a = HostBudget("http://j", max_in_flight=1)
+    b = HostBudget("http://j", max_in_flight=1)
+    order = []
+
+    def second():
+        with b.request():
+            order.append("b")
+
+    with a.request():
+        t = threading.Thread(target=second)
+        t.start()
+        time.sleep(0.1)
+        order.append("a")
+    t.join()
+
+    assert order == ["a", "b"]
+
+
+def test_budget_applied_to_requests(mock_session):
+    """Profiles with limits route requests through the host budget."""
+    mock_session.get.return_value = MagicMock(status_code=200)
+    ctx = ClientContext("http://j", ("u", "t"), rate_limit=1)
+
+    clock = [1000.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    with patch("zenkins.ratelimit.time.time", lambda: clock[0]), \
+            patch("zenkins.ratelimit.time.sleep", sleep):
+        api_get("/api/json", ctx)
+        api_get("/api/json", ctx)
+
+    assert mock_session.get.call_count == 2
+    assert sleeps == [1.0]
+
+
+def test_streamed_body_holds_budget(mock_session):
+    """A streamed response keeps its in-flight slot until the body is closed."""
+    mock_session.get.side_effect = lambda url, **kw: MagicMock(status_code=200)
+    ctx = ClientContext("http://j", ("u", "t"), max_in_flight=1)
+    order = []
+
+    def second():
+        api_get("/api/json", ctx)
+        order.append("second")
+
+    resp = api_get("/artifact/big.bin", ctx, stream=True)
+    t = threading.Thread(target=second)
+    t.start()
+    time.sleep(0.1)
+    order.append("closed")
+    resp.close()
+    t.join()
+
+    assert order == ["closed", "second"]
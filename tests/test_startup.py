@@ -0,0 +1,51 @@
+"""CLI startup: lazy command loading and import-time budget."""
+
+import re
+import subprocess
+import sys
+
+import pytest
+
+from zenkins.cli import COMMANDS, load_command
+
+# Cumulative `python -X importtime` budget for `import zenkins.cli`; it is
+# well under 10ms when nothing heavy is imported, and ~200ms with requests
+IMPORT_BUDGET_US = 60_000
+
+
+def _python(code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args, "-c", code], capture_output=True, text=True)
+
+
+def test_help_imports_no_command_modules():
+    code = (
+        "import sys\n"
+        "from zenkins.cli import main\n"
+        "sys.argv = ['zenkins', '--help']\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in "
+        "('zenkins', 'requests', 'urllib3', 'platformdirs') or m == 'importlib.metadata'), file=sys.stderr)\n"
+    )
+    result = _python(code)
+    assert result.stderr.strip() == "['zenkins', 'zenkins.cli', 'zenkins.parallel']"
+    assert "usage: zenkins" in result.stdout
+
+
+def test_version_resolved_on_demand():
+    result = _python("import sys; from zenkins.cli import main; sys.argv = ['zenkins', '-V']; main()")
+    assert re.fullmatch(r"zenkins \S+\n", result.stdout)
+
+
+@pytest.mark.parametrize("name", sorted(COMMANDS))
+def test_registry_entries_resolve(name):
+    assert callable(load_command(name))
+
+
+def test_import_time_budget():
+    result = _python("import zenkins.cli", "-X", "importtime")
+    line = next(line for line in result.stderr.splitlines() if line.endswith("| zenkins.cli"))
+    cumulative = int(line.split("|")[1])
+    assert cumulative < IMPORT_BUDGET_US, result.stderr
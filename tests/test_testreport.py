@@ -0,0 +1,92 @@
+"""Tests for zenkins.testreport."""
+
+import json
+
+import pytest
+
+from zenkins import testreport
+
+
+def _report() -> dict:
+    return {
+        "_class": "hudson.tasks.junit.TestResult",
+        "failCount": 2,
+        "passCount": 3,
+        "suites": [
+            {"name": 'suite "cases":[ {1\\', "cases": [
+                {"className": "a.T", "name": "ok", "status": "PASSED", "errorDetails": None},
+                {"className": "a.T", "name": "bad", "status": "FAILED", "errorDetails": "boom ✗\n{]"},
+            ]},
+            {"name": "empty", "cases": []},
+            {"name": "s2", "cases": [
+                {"className": "b.T", "name": "ok", "status": "PASSED"},
+                {"className": "b.T", "name": "fixed", "status": "FIXED"},
+                {"className": "b.T", "name": "worse", "status": "REGRESSION", "duration": 1.5},
+            ]},
+        ],
+        "skipCount": 0,
+    }
+
+
+def _chunks(data: bytes, size: int):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 1 << 20])
+def test_parse_matches_full_decode(size):
+    report = _report()
+    body = json.dumps(report, ensure_ascii=False, separators=(",", ":")).encode()
+
+    skeleton, kept = testreport.parse(_chunks(body, size), testreport.failed)
+
+    expected = [c for s in report["suites"] for c in s["cases"] if testreport.failed(c)]
+    assert kept == expected
+    assert skeleton["failCount"] == 2 and skeleton["passCount"] == 3 and skeleton["skipCount"] == 0
+    assert skeleton["suites"] == [] and skeleton["_class"] == report["_class"]
+
+
+def test_parse_large_case_spanning_chunks():
+    big = "x" * 200_000
+    body = json.dumps({"suites": [{"cases": [{"status": "FAILED", "errorDetails": big}]}]}).encode()
+
+    _, kept = testreport.parse(_chunks(body, 1000), testreport.failed)
+
+    assert kept[0]["errorDetails"] == big
+
+
+def test_parse_truncated_report():
+    body = json.dumps(_report()).encode()
+    with pytest.raises(ValueError):
+        testreport.parse(_chunks(body[:-40], 16), testreport.failed)
+
+
+@pytest.mark.parametrize("suites, cases", [(600, 60), (6000, 6)])
+def test_parse_memory_is_bounded_with_many_small_suites(suites, cases):
+    """Peak memory follows the kept cases, not the size of the report."""
+    import tracemalloc
+
+    report = {"failCount": 1, "suites": [
+        {"name": f"pkg.Suite{s}", "cases": [
+            {"className": f"pkg.Suite{s}", "name": f"test_{c}", "status": "PASSED",
+             "errorDetails": None, "duration": 0.01}
+            for c in range(cases)
+        ]}
+        for s in range(suites)
+    ]}
+    report["suites"][suites // 2]["cases"][0]["status"] = "FAILED"
+    # Allocated before tracing starts, so only the parser's memory is measured
+    body = json.dumps(report).encode()
+    del report
+    assert len(body) > 3_000_000
+
+    tracemalloc.start()
+    try:
+        skeleton, kept = testreport.parse(_chunks(body, 65536), testreport.failed)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert [c["name"] for c in kept] == ["test_0"]
+    assert skeleton == {"failCount": 1, "suites": []}
+    # About one chunk of text plus the kept case, whatever the suite count
+    assert peak < 1_000_000
@@ -0,0 +1,60 @@
+"""Tests for zenkins.trace."""
+
+import json
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from zenkins import trace
+from zenkins.client import api_get
+from zenkins.trace import Tracer
+
+
+def _response(status=200, content=b"", chunks=()):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.content = content
+    resp.elapsed = timedelta(milliseconds=20)
+    resp.iter_content.return_value = iter(chunks)
+    return resp
+
+
+def test_requests_recorded(mock_session, capsys):
+    """Buffered and streamed requests are logged with their sizes."""
+    tracer = Tracer()
+    mock_session.get.side_effect = [
+        _response(content=b"x" * 10),
+        _response(chunks=[b"ab", b"cde"]),
+    ]
+
+    with patch("zenkins.client.get_base_url", return_value="http://j"), \
+         patch("zenkins.trace._tracer", tracer):
+        api_get("/job/a/api/json?tree=x")
+        resp = api_get("/job/a/42/consoleText", stream=True)
+        assert tracer.records[-1].path == "/job/a/api/json?tree=x"
+        assert b"".join(resp.iter_content(2)) == b"abcde"
+
+    first, second = tracer.records
+    assert (first.method, first.status, first.bytes) == ("GET", 200, 10)
+    assert (second.path, second.bytes) == ("/job/a/42/consoleText", 5)
+    assert first.ttfb == 0.02
+    err = capsys.readouterr().err
+    assert "[http] GET /job/a/42/consoleText 200 5 B ttfb=20ms" in err
+
+
+def test_summary_and_chrome_trace(tmp_path, capsys):
+    """The summary groups endpoints by path and the trace file is valid JSON."""
+    tracer = Tracer(chrome_file=str(tmp_path / "trace.json"), log=False)
+    for n, total in ((1, 0.1), (2, 0.3), (3, 0.2)):
+        tracer.records.append(trace.Record("GET", f"/job/a/{n}/testReport/api/json?tree=x",
+                                           200, 1024, n, 0.05, total, 1))
+    tracer.records.append(trace.Record("GET", "/api/json", 200, 10, 0, 0.01, 0.05, 1))
+
+    tracer.finish()
+
+    err = capsys.readouterr().err
+    assert "[http] 4 requests, 3.0 KB, p50 100ms, p95 300ms" in err
+    lines = err.splitlines()
+    assert lines[2].endswith("3x  max 0.30s  GET /job/a/N/testReport/api/json")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert len(events) == 4
+    assert events[0]["ph"] == "X" and events[0]["dur"] == 0.1 * 1e6
@@ -1,15 +1,23 @@
 """Zenkins - Jenkins CLI tool."""
 
-from importlib.metadata import version
 
-__version__ = version("zenkins")
+def __getattr__(name: str):
+    # Resolve __version__ on first access; importlib.metadata is slow to import
+    if name == "__version__":
+        from importlib.metadata import version
 
+        globals()["__version__"] = value = version("zenkins")
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def client() -> "requests.Session":
+
+def client(profile: str | None = None) -> "requests.Session":
     """Get an authenticated Jenkins session.
 
     Returns a requests.Session configured with Jenkins credentials
-    from ~/.config/jenkins/config.
+    from ~/.config/jenkins/config. Pass *profile* to use a named
+    ``[profile.NAME]`` section; sessions for different profiles can
+    be used side by side.
 
     Usage:
         import zenkins
@@ -19,6 +27,6 @@ def client() -> "requests.Session":
     Returns:
         requests.Session: Authenticated session
     """
-    from zenkins.client import get_session
+    from zenkins.client import get_session, resolve_context
 
-    return get_session()
+    return get_session(resolve_context(profile) if profile else None)
@@ -0,0 +1,85 @@
+"""Asyncio API layer for high fan-out commands.
+
+Requests still go through the shared ``requests`` session of the sync
+client (one connection pool per profile), executed on a bounded thread
+pool so that many coroutines can wait on Jenkins at once. The sync
+``api_get`` / ``zenkins.client()`` API is unchanged.
+"""
+
+import asyncio
+import contextvars
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Awaitable, Coroutine, Iterable, TypeVar
+
+from zenkins.client import ClientContext, api_get, set_pool_size
+from zenkins.parallel import DEFAULT_JOBS
+
+if TYPE_CHECKING:
+    import requests
+
+T = TypeVar("T")
+
+
+class AsyncClient:
+    """Coroutine-based Jenkins client with a concurrency limit.
+
+    Usage:
+        async with AsyncClient(limit=16) as client:
+            data = await client.get_json("/api/json?tree=jobs[name]")
+    """
+
+    def __init__(self, limit: int = DEFAULT_JOBS, context: ClientContext | None = None) -> None:
+        self.limit = max(1, limit)
+        self.context = context
+        self._pool = ThreadPoolExecutor(max_workers=self.limit, thread_name_prefix="zenkins")
+        set_pool_size(self.limit, context)
+
+    async def get(self, path: str, **kwargs) -> "requests.Response":
+        """GET a Jenkins API path (see client.api_get)."""
+        call = functools.partial(api_get, path, self.context, **kwargs)
+        loop = asyncio.get_running_loop()
+        # Run in a copy of this task's context so the active profile carries over
+        return await loop.run_in_executor(self._pool, contextvars.copy_context().run, call)
+
+    async def get_json(self, path: str) -> dict:
+        """GET a Jenkins API path and decode the JSON body."""
+        resp = await self.get(path)
+        return resp.json()
+
+    def close(self) -> None:
+        """Stop the worker threads, dropping requests not yet started."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+
+async def gather(aws: Iterable[Awaitable[T]]) -> list[T]:
+    """Await all of *aws* concurrently, returning results in order.
+
+    If one fails, the others are cancelled and the error is raised.
+    """
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(_wrap(a)) for a in aws]
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0]
+    return [t.result() for t in tasks]
+
+
+async def _wrap(aw: Awaitable[T]) -> T:
+    return await aw
+
+
+def run(main: Coroutine[None, None, T]) -> T:
+    """Run a coroutine from sync code; Ctrl-C cancels it and exits with 130."""
+    try:
+        return asyncio.run(main)
+    except KeyboardInterrupt:
+        print()
+        sys.exit(130)
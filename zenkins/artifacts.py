@@ -1,40 +1,326 @@
-"""zenkins artifacts <job> [build] [-d DIR] [--glob PATTERN] - download build artifacts."""
+"""zenkins artifacts <job> [build] [-d DIR] [--glob PATTERN] [--sync] - download build artifacts."""
 
 import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
 from fnmatch import fnmatch
 from pathlib import Path
+from typing import Callable
 
-from zenkins.client import api_get, get_base_url, get_session, job_path
-from zenkins.failures import _resolve_builds
+import requests
 
+from zenkins import cache
+from zenkins.client import get_base_url, job_path, request, set_pool_size
+from zenkins.failures import _query_builds
+from zenkins.parallel import DEFAULT_JOBS, parallel_map
 
-def _get_artifacts(job: str, build: str, pattern: str | None) -> list[str]:
-    """Get artifact paths for a build, optionally filtered by glob."""
-    resp = api_get(
-        f"{job_path(job)}/{build}/api/json?tree=artifacts[relativePath]"
-    )
-    artifacts = resp.json().get("artifacts", [])
+CHUNK_SIZE = 1024 * 1024
+MB = 1024 * 1024
+MANIFEST_NAME = ".zenkins-manifest.json"
+ARTIFACT_FIELDS = "artifacts[relativePath],fingerprint[fileName,hash]"
+
+
+def _get_artifacts(job: str, build: str, pattern: str | None) -> list[dict]:
+    """Get artifacts for a build, optionally filtered by glob."""
+    data = cache.fetch(job, build, f"api/json?tree={ARTIFACT_FIELDS}")
+    return _select_artifacts(json.loads(data) if data else {}, pattern)
+
+
+def _select_artifacts(data: dict, pattern: str | None) -> list[dict]:
+    """Pick artifacts out of a build's JSON, optionally filtered by glob.
+
+    Artifacts whose file name is fingerprinted get an ``md5`` key.
+    """
+    artifacts = data.get("artifacts", [])
+    # Before filtering: a name is only unique if it is unique in the build
+    _attach_fingerprints(artifacts, data.get("fingerprint", []))
     if pattern:
         artifacts = [a for a in artifacts if fnmatch(a["relativePath"], pattern)]
     return artifacts
 
 
-def _download_artifacts(
-    job: str, build: str, artifacts: list[dict], dest: Path,
+def _attach_fingerprints(artifacts: list[dict], fingerprints: list[dict]) -> None:
+    """Add MD5 hashes from build fingerprints to matching artifacts.
+
+    Fingerprints only carry the file name, so artifacts sharing a name
+    in different directories are left without a hash, and so are names
+    fingerprinted with several hashes (fingerprints also cover files
+    used by the build, e.g. from upstream jobs, not only its artifacts).
+    """
+    names = Counter(a["relativePath"].rsplit("/", 1)[-1] for a in artifacts)
+    hashes: dict[str, set[str]] = {}
+    for f in fingerprints:
+        if f.get("hash"):
+            hashes.setdefault(f["fileName"], set()).add(f["hash"])
+    for a in artifacts:
+        name = a["relativePath"].rsplit("/", 1)[-1]
+        if names[name] == 1 and len(hashes.get(name, ())) == 1:
+            a["md5"] = next(iter(hashes[name]))
+
+
+def _file_md5(path: Path) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _ChecksumError(ValueError):
+    """A downloaded artifact does not match its fingerprint."""
+
+
+class _Manifest:
+    """Record of synced files in a download directory.
+
+    Each entry holds the file's size and mtime when it was written, its
+    MD5 and the remote validator (ETag or Last-Modified) it came from,
+    so unchanged files can be recognized without hashing or downloading.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.path = root / MANIFEST_NAME
+        try:
+            self.entries: dict[str, dict] = json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+        self._lock = threading.Lock()
+
+    def _current(self, key: str, out: Path) -> dict:
+        """The entry for *key* if it still describes the file on disk."""
+        entry = self.entries.get(key, {})
+        st = out.stat()
+        if entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime_ns:
+            return entry
+        return {}
+
+    def local_md5(self, key: str, out: Path) -> str:
+        md5 = self._current(key, out).get("md5")
+        if not md5:
+            md5 = _file_md5(out)
+            self.record(key, out, md5, self.entries.get(key, {}).get("remote"))
+        return md5
+
+    def remote(self, key: str, out: Path) -> str | None:
+        return self._current(key, out).get("remote")
+
+    def record(self, key: str, out: Path, md5: str | None, remote: str | None) -> None:
+        st = out.stat()
+        with self._lock:
+            self.entries[key] = {
+                "size": st.st_size, "mtime": st.st_mtime_ns, "md5": md5, "remote": remote,
+            }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
+
+
+class _Progress:
+    """Thread-safe aggregate progress line for concurrent downloads."""
+
+    REDRAW_INTERVAL = 0.2
+
+    def __init__(self, total_files: int) -> None:
+        self.total_files = total_files
+        self.files = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._drawn = 0.0
+        self._lock = threading.Lock()
+
+    def rate(self) -> float:
+        """Average throughput so far, in MB/s."""
+        elapsed = time.monotonic() - self.started
+        return self.bytes / MB / elapsed if elapsed > 0 else 0.0
+
+    def add_bytes(self, n: int) -> None:
+        with self._lock:
+            self.bytes += n
+            self._draw()
+
+    def file_done(self) -> None:
+        with self._lock:
+            self.files += 1
+            self._draw(force=True)
+
+    def file_skipped(self) -> None:
+        """Count a file that was already up to date (file_done() follows)."""
+        with self._lock:
+            self.skipped += 1
+
+    def file_failed(self) -> None:
+        """Count a file that could not be synced (file_done() follows)."""
+        with self._lock:
+            self.failed += 1
+
+    def _draw(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._drawn < self.REDRAW_INTERVAL:
+            return
+        self._drawn = now
+        print(
+            f"\r\033[K  {self.files}/{self.total_files} files, "
+            f"{self.bytes / MB:.1f} MB, {self.rate():.1f} MB/s",
+            end="", flush=True,
+        )
+
+
+def _download(
+    url: str, out: Path,
+    on_chunk: Callable[[int], None] | None = None,
 ) -> int:
-    """Download artifacts for a single build. Returns count."""
+    """Stream *url* into *out*. Returns the number of bytes written.
+
+    Data goes to a temporary file next to *out*, which is renamed into
+    place only once the download is complete, so an interrupted download
+    never leaves a truncated file behind.
+    """
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out.parent, prefix=f".{out.name}.", suffix=".part")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            with request("get", url, stream=True) as resp:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+                    if on_chunk:
+                        on_chunk(len(chunk))
+        os.replace(tmp, out)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return size
+
+
+def _validator(headers) -> str | None:
+    """Identify a remote file version from its response headers."""
+    tag = headers.get("ETag") or headers.get("Last-Modified")
+    return f"{headers.get('Content-Length')}:{tag}" if tag else None
+
+
+def _fetch_part(
+    url: str, part: Path, offset: int,
+    on_chunk: Callable[[int], None] | None = None,
+) -> int:
+    """Download *url* into *part*, resuming from *offset* if the server allows.
+
+    Returns the number of bytes fetched.
+    """
+    size = 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    try:
+        resp = request("get", url, stream=True, headers=headers)
+    except requests.HTTPError as e:
+        # 416: the part already holds the whole file
+        if not offset or e.response is None or e.response.status_code != 416:
+            raise
+        return 0
+    with resp:
+        if resp.status_code != 206:
+            offset = 0
+        with open(part, "ab" if offset else "wb") as f:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+                if on_chunk:
+                    on_chunk(len(chunk))
+    return size
+
+
+def _sync(
+    url: str, out: Path, key: str, md5: str | None,
+    manifest: _Manifest, on_chunk: Callable[[int], None] | None = None,
+) -> int | None:
+    """Bring *out* up to date with *url*. Returns bytes fetched, or None if current.
+
+    With a fingerprint MD5 the local hash decides; otherwise a HEAD
+    request's size and ETag/Last-Modified are compared to the manifest.
+    Downloads go to a ``.part`` file named after the remote version, and
+    an existing one is resumed with an HTTP Range request. A file that
+    does not match its fingerprint is downloaded once more from scratch,
+    then _ChecksumError is raised.
+    """
+    remote = None
+    if not md5:
+        head = request("head", url, allow_redirects=True)
+        remote = _validator(head.headers)
+    if out.exists():
+        if md5 and manifest.local_md5(key, out) == md5:
+            return None
+        if not md5 and remote and manifest.remote(key, out) == remote:
+            return None
+
+    version = hashlib.sha1((md5 or remote or "").encode()).hexdigest()[:12]
+    part = out.with_name(f".{out.name}.{version}.part")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    for stale in out.parent.glob(f".{out.name}.*.part"):
+        if stale != part:
+            stale.unlink(missing_ok=True)
+    # Only resume when the version is known, otherwise the part may be stale
+    offset = part.stat().st_size if part.exists() and (md5 or remote) else 0
+
+    size = _fetch_part(url, part, offset, on_chunk)
+    local_md5 = _file_md5(part) if md5 else None
+    if md5 and local_md5 != md5:
+        # A resumed part may hold stale bytes, or the transfer was corrupted:
+        # download the whole file once more before giving up on it
+        part.unlink()
+        size += _fetch_part(url, part, 0, on_chunk)
+        local_md5 = _file_md5(part)
+        if local_md5 != md5:
+            part.unlink()
+            raise _ChecksumError(f"Checksum mismatch for {url}")
+    os.replace(part, out)
+    manifest.record(key, out, local_md5, remote)
+    return size
+
+
+def _download_all(
+    job: str, tasks: list[tuple[str, dict, Path]], jobs: int,
+    manifest: _Manifest | None = None,
+) -> _Progress:
+    """Download (build, artifact, destination) tasks through one shared pool.
+
+    With a *manifest*, files are synced: those already current are skipped.
+    """
     base = get_base_url()
-    session = get_session()
-    for a in artifacts:
-        rel = a["relativePath"]
-        url = f"{base}{job_path(job)}/{build}/artifact/{rel}"
-        out = dest / rel
-        out.parent.mkdir(parents=True, exist_ok=True)
-        resp = session.get(url)
-        resp.raise_for_status()
-        out.write_bytes(resp.content)
-        print(f"  {out}")
-    return len(artifacts)
+    progress = _Progress(len(tasks))
+
+    def download(task: tuple[str, dict, Path]) -> int | None:
+        build, artifact, out = task
+        url = f"{base}{job_path(job)}/{build}/artifact/{artifact['relativePath']}"
+        if manifest is None:
+            return _download(url, out, progress.add_bytes)
+        key = out.relative_to(manifest.path.parent).as_posix()
+        try:
+            size = _sync(url, out, key, artifact.get("md5"), manifest, progress.add_bytes)
+        except _ChecksumError as e:
+            # One bad file (or stale fingerprint) shouldn't abort the others
+            print(f"\r\033[KError: {e}", file=sys.stderr)
+            progress.file_failed()
+            return None
+        if size is None:
+            progress.file_skipped()
+        return size
+
+    try:
+        parallel_map(download, tasks, jobs, lambda task, done: progress.file_done())
+    finally:
+        if manifest is not None:
+            manifest.save()
+    return progress
 
 
 def artifacts_command(args: argparse.Namespace) -> None:
@@ -42,14 +328,23 @@ def artifacts_command(args: argparse.Namespace) -> None:
     job = args.job
     dest = Path(args.dir)
     pattern = args.glob
+    jobs = getattr(args, "jobs", DEFAULT_JOBS)
+    set_pool_size(jobs)
 
-    multi_builds = _resolve_builds(job, args.build, args.n)
-    builds = multi_builds if multi_builds else [args.build or "lastBuild"]
+    multi_builds = _query_builds(job, ARTIFACT_FIELDS, args.build, args.n)
+    if multi_builds == []:
+        print(f"No builds of {job} in {args.build}")
+        return
     multi = multi_builds is not None
+    if multi:
+        builds = [str(b["number"]) for b in multi_builds]
+        listings = [_select_artifacts(b, pattern) for b in multi_builds]
+    else:
+        builds = [args.build or "lastBuild"]
+        listings = [_get_artifacts(job, builds[0], pattern)]
 
-    total = 0
-    for build in builds:
-        artifacts = _get_artifacts(job, build, pattern)
+    tasks = []
+    for build, artifacts in zip(builds, listings):
         if not artifacts:
             if not multi:
                 print(f"No artifacts for {job} #{build}")
@@ -64,7 +359,20 @@ def artifacts_command(args: argparse.Namespace) -> None:
                     print(a["relativePath"])
         else:
             build_dest = dest / build if multi else dest
-            total += _download_artifacts(job, build, artifacts, build_dest)
+            tasks.extend((build, a, build_dest / a["relativePath"]) for a in artifacts)
+
+    if args.list or not tasks:
+        return
 
-    if not args.list and total:
-        print(f"\n{total} artifact(s) downloaded to {dest}")
+    manifest = _Manifest(dest) if getattr(args, "sync", False) else None
+    progress = _download_all(job, tasks, jobs, manifest)
+    elapsed = time.monotonic() - progress.started
+    downloaded = progress.files - progress.skipped - progress.failed
+    skipped = f", {progress.skipped} up to date" if manifest else ""
+    failed = f", {progress.failed} failed" if progress.failed else ""
+    print(
+        f"\r\033[K{downloaded} artifact(s) downloaded to {dest}{skipped}{failed} "
+        f"({progress.bytes / MB:.1f} MB in {elapsed:.1f}s, {progress.rate():.1f} MB/s)"
+    )
+    if progress.failed:
+        sys.exit(1)
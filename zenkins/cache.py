@@ -0,0 +1,276 @@
+"""On-disk cache for immutable data of finished builds.
+
+Once a build has finished, its test reports, artifact list and console
+text never change, so responses for numbered builds are stored under the
+user cache directory and served from there on later runs. Entries are
+keyed by Jenkins URL, job path, build number and endpoint. The cache is
+bounded in size and evicts least recently used entries first. A running
+total of the stored bytes is kept in SIZE_FILE, so the directory is only
+scanned when that total goes over the budget.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import platformdirs
+
+import zenkins.client as client
+
+if TYPE_CHECKING:
+    import requests
+
+CACHE_DIR = Path(platformdirs.user_cache_dir("zenkins", appauthor=False)) / "builds"
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+# Single responses larger than this are passed through without caching
+MAX_ENTRY_BYTES = MAX_CACHE_BYTES // 8
+CHUNK_SIZE = 64 * 1024
+# Running total of entry bytes, relative to CACHE_DIR
+SIZE_FILE = "size"
+
+_enabled = True
+_size_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool) -> None:
+    """Enable or disable the build cache (``--no-cache``)."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """Whether on-disk caching is enabled."""
+    return _enabled
+
+
+def _entry_path(job: str, build: str, endpoint: str) -> Path:
+    key = "\n".join((client.get_base_url(), client.job_path(job), build, endpoint))
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return CACHE_DIR / digest[:2] / digest
+
+
+def _read(entry: Path) -> bytes | None:
+    try:
+        data = entry.read_bytes()
+    except FileNotFoundError:
+        return None
+    # Bump mtime so eviction sees this entry as recently used
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+    return data
+
+
+def _write(entry: Path, data: bytes) -> None:
+    if len(data) > MAX_ENTRY_BYTES:
+        return
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=entry.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, entry)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    # Empty markers ("finished", ".404") take no space worth accounting for
+    if data:
+        _account(len(data))
+
+
+def _read_total(root: Path) -> int | None:
+    try:
+        return int((root / SIZE_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _store_total(root: Path, total: int) -> None:
+    fd, tmp = tempfile.mkstemp(dir=root, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(str(total))
+        os.replace(tmp, root / SIZE_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _account(size: int) -> None:
+    account(CACHE_DIR, size, MAX_CACHE_BYTES)
+
+
+def account(root: Path, size: int, limit: int) -> None:
+    """Add a new file's *size* to *root*'s running total, evicting if over *limit*.
+
+    Also used for other directories of files that may be dropped at any
+    time, like the build cache's entries. The total is approximate:
+    concurrent processes may lose an update, and rewriting an existing
+    file counts it twice. Each eviction scan replaces it with the exact
+    figure.
+    """
+    with _size_lock:
+        total = _read_total(root)
+        if total is None or total + size > limit:
+            _evict(root, limit)
+        else:
+            _store_total(root, total + size)
+
+
+def _evict(root: Path, limit: int) -> None:
+    """Remove least recently used files under *root* until they fit in *limit*.
+
+    Scans *root* and its subdirectories (one level deep) and records the
+    resulting total in SIZE_FILE.
+    """
+    entries = []
+    total = 0
+    for sub in os.scandir(root):
+        files = os.scandir(sub.path) if sub.is_dir() else [sub]
+        for e in files:
+            if e.name.startswith(".tmp-") or e.name == SIZE_FILE:
+                continue
+            try:
+                st = e.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, e.path))
+            total += st.st_size
+    if total > limit:
+        for _, size, path in sorted(entries):
+            Path(path).unlink(missing_ok=True)
+            total -= size
+            if total <= limit:
+                break
+    _store_total(root, total)
+
+
+def cacheable(build: str) -> bool:
+    """Whether responses for *build* may be cached (numbered builds only)."""
+    return _enabled and build.isdigit()
+
+
+def mark_finished(job: str, build: str) -> None:
+    """Record that *build* has finished, saving a lookup on first fetch."""
+    if cacheable(build):
+        entry = _entry_path(job, build, "finished")
+        if not entry.exists():
+            _write(entry, b"")
+
+
+def is_finished(job: str, build: str) -> bool:
+    """Check whether a numbered build has finished, remembering the answer."""
+    entry = _entry_path(job, build, "finished")
+    if entry.exists():
+        return True
+    resp = client.api_get(f"{client.job_path(job)}/{build}/api/json?tree=building")
+    if resp.json().get("building", False):
+        return False
+    _write(entry, b"")
+    return True
+
+
+def fetch(job: str, build: str, endpoint: str) -> bytes | None:
+    """GET ``<job>/<build>/<endpoint>``, served from the cache when possible.
+
+    Returns the response body, or None if Jenkins answers 404 (e.g. a
+    build without Robot results). Other HTTP errors are raised.
+    """
+    path = f"{client.job_path(job)}/{build}/{endpoint}"
+    entry = _entry_path(job, build, endpoint) if cacheable(build) else None
+    if entry:
+        data = _read(entry)
+        if data is not None:
+            return data
+        if _read(entry.with_suffix(".404")) is not None:
+            return None
+    # Check before fetching so a build finishing mid-request is not cached
+    store = entry is not None and is_finished(job, build)
+    import requests
+
+    try:
+        resp = client.api_get(path)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code != 404:
+            raise
+        if store:
+            _write(entry.with_suffix(".404"), b"")
+        return None
+
+    if store:
+        _write(entry, resp.content)
+    return resp.content
+
+
+def stream(job: str, build: str, endpoint: str) -> Iterator[bytes] | None:
+    """Like fetch(), but yield the body in chunks instead of buffering it.
+
+    A miss is streamed from Jenkins and copied into the cache on the fly;
+    the copy is only kept if the whole body was read and fits in an entry.
+    """
+    path = f"{client.job_path(job)}/{build}/{endpoint}"
+    entry = _entry_path(job, build, endpoint) if cacheable(build) else None
+    if entry:
+        if _read(entry.with_suffix(".404")) is not None:
+            return None
+        try:
+            f = open(entry, "rb")
+        except FileNotFoundError:
+            pass
+        else:
+            os.utime(entry)
+            return _iter_file(f)
+    store = entry is not None and is_finished(job, build)
+    import requests
+
+    try:
+        resp = client.api_get(path, stream=True)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code != 404:
+            raise
+        if store:
+            _write(entry.with_suffix(".404"), b"")
+        return None
+
+    return _tee(resp, entry if store else None)
+
+
+def _iter_file(f) -> Iterator[bytes]:
+    with f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def _tee(resp: "requests.Response", entry: Path | None) -> Iterator[bytes]:
+    """Yield response chunks, copying them into *entry* when given."""
+    out = tmp = None
+    if entry:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, prefix=".tmp-")
+        out = os.fdopen(fd, "wb")
+    size = 0
+    try:
+        for chunk in resp.iter_content(CHUNK_SIZE):
+            yield chunk
+            if out:
+                size += len(chunk)
+                if size > MAX_ENTRY_BYTES:
+                    out.close()
+                    out = None
+                    Path(tmp).unlink(missing_ok=True)
+                else:
+                    out.write(chunk)
+        if out:
+            out.close()
+            out = None
+            os.replace(tmp, entry)
+            _account(size)
+    finally:
+        resp.close()
+        if out:
+            out.close()
+            Path(tmp).unlink(missing_ok=True)
@@ -0,0 +1,208 @@
+"""Record and replay HTTP traffic (``--record DIR`` / ``--replay DIR``).
+
+A cassette is a directory holding:
+
+- ``cassette.json``: the controller URL it was recorded against
+- ``index.jsonl``: one line per request, with method, URL, request and
+  response headers, status, body digest and elapsed time
+- ``bodies/<sha256>.gz``: response bodies, compressed and deduplicated
+
+Credentials are never written: Authorization, Cookie and Set-Cookie
+headers are dropped. Recording goes through a transport adapter, so
+every request made by the client is captured; bodies are read in full,
+which makes recording multi-GB logs memory hungry. Replay serves the
+recorded responses without network access or credentials, either
+immediately or with their original latency.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import zenkins.client as client
+from zenkins import cache
+
+META_NAME = "cassette.json"
+INDEX_NAME = "index.jsonl"
+BODIES_DIR = "bodies"
+
+REDACTED_HEADERS = frozenset({"authorization", "proxy-authorization", "cookie", "set-cookie"})
+# Dropped from responses since bodies are stored decoded
+ENCODING_HEADERS = frozenset({"content-encoding", "transfer-encoding"})
+
+
+class CassetteMiss(requests.RequestException):
+    """A request with no recorded response was made during replay."""
+
+
+def _key(method: str, url: str, headers) -> str:
+    # Range matters for resumed artifact downloads; other headers are ignored
+    return f"{method.upper()} {url} {headers.get('Range', '')}".rstrip()
+
+
+class Cassette:
+    """Reads and writes one cassette directory."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return json.loads((self.path / META_NAME).read_text())["base_url"]
+
+    def start(self, base_url: str) -> None:
+        """Start a new recording, replacing an existing index."""
+        (self.path / BODIES_DIR).mkdir(parents=True, exist_ok=True)
+        (self.path / META_NAME).write_text(json.dumps({"version": 1, "base_url": base_url}))
+        (self.path / INDEX_NAME).write_text("")
+
+    def add(self, request: requests.PreparedRequest, resp: requests.Response, elapsed: float) -> None:
+        body = resp.content or b""
+        digest = hashlib.sha256(body).hexdigest()
+        headers = {k: v for k, v in resp.headers.items()
+                   if k.lower() not in REDACTED_HEADERS | ENCODING_HEADERS}
+        if len(headers) < len(resp.headers) and "Content-Length" in resp.headers:
+            headers["Content-Length"] = str(len(body))
+        entry = {
+            "key": _key(request.method, request.url, request.headers),
+            "request_headers": {k: v for k, v in request.headers.items()
+                                if k.lower() not in REDACTED_HEADERS},
+            "status": resp.status_code,
+            "reason": resp.reason,
+            "headers": headers,
+            "body": digest,
+            "elapsed": round(elapsed, 6),
+        }
+        blob = self.path / BODIES_DIR / f"{digest}.gz"
+        with self._lock:
+            if not blob.exists():
+                blob.write_bytes(gzip.compress(body, compresslevel=6))
+            with open(self.path / INDEX_NAME, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def load(self) -> dict[str, list[dict]]:
+        """Recorded responses by request key, in recording order."""
+        entries: dict[str, list[dict]] = {}
+        with open(self.path / INDEX_NAME) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries.setdefault(entry["key"], []).append(entry)
+        return entries
+
+    def body(self, digest: str) -> bytes:
+        return gzip.decompress((self.path / BODIES_DIR / f"{digest}.gz").read_bytes())
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter that also writes every response to a cassette."""
+
+    def __init__(self, cassette: Cassette, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        resp = super().send(request, **kwargs)
+        # Read the whole body; later iter_content() calls serve it from memory
+        resp.content
+        self.cassette.add(request, resp, time.perf_counter() - start)
+        return resp
+
+
+class ReplayAdapter(BaseAdapter):
+    """Adapter answering requests from a cassette instead of the network.
+
+    Repeated requests for the same URL get the recorded responses in
+    order; once those run out, the last one is repeated.
+    """
+
+    def __init__(self, cassette: Cassette, entries: dict[str, list[dict]],
+                 latency: bool = False, **kwargs) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.entries = entries
+        self.latency = latency
+        self._served: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, stream=False, **kwargs) -> requests.Response:
+        key = _key(request.method, request.url, request.headers)
+        with self._lock:
+            recorded = self.entries.get(key)
+            if not recorded:
+                raise CassetteMiss(f"No recorded response for {key}", request=request)
+            i = self._served.get(key, 0)
+            self._served[key] = i + 1
+        entry = recorded[min(i, len(recorded) - 1)]
+        if self.latency:
+            time.sleep(entry["elapsed"])
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.reason = entry["reason"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.raw = io.BytesIO(self.cassette.body(entry["body"]))
+        resp.url = request.url
+        resp.request = request
+        resp.elapsed = timedelta(seconds=entry["elapsed"])
+        resp.connection = self
+        return resp
+
+    def close(self) -> None:
+        pass
+
+
+@contextmanager
+def record(path: str | Path) -> Iterator[Cassette]:
+    """Record all requests made in this block into the cassette at *path*.
+
+    The build cache is bypassed so that every response the command needs
+    ends up in the cassette.
+    """
+    cassette = Cassette(path)
+    cassette.start(client.get_base_url())
+    was_enabled = cache.is_enabled()
+    cache.set_enabled(False)
+    client.set_transport(lambda **kwargs: RecordingAdapter(cassette, **kwargs))
+    try:
+        yield cassette
+    finally:
+        client.set_transport(None)
+        cache.set_enabled(was_enabled)
+
+
+@contextmanager
+def replay(path: str | Path, latency: bool = False) -> Iterator[Cassette]:
+    """Serve requests made in this block from the cassette at *path*.
+
+    No credentials are needed: the client is pointed at the recorded
+    controller URL. With *latency* each response is delayed by the time
+    it originally took.
+    """
+    cassette = Cassette(path)
+    entries = cassette.load()
+    context = client.ClientContext(cassette.base_url, ("", ""))
+    was_enabled = cache.is_enabled()
+    cache.set_enabled(False)
+    client.set_transport(lambda **kwargs: ReplayAdapter(cassette, entries, latency, **kwargs))
+    try:
+        with client.use_context(context):
+            yield cassette
+    finally:
+        client.set_transport(None)
+        cache.set_enabled(was_enabled)
@@ -1,23 +1,55 @@
-"""Zenkins CLI - Main entry point."""
+"""Zenkins CLI - Main entry point.
+
+Command modules (and with them ``requests``) are imported only once
+argparse has picked the subcommand, so ``--help``, ``--version`` and
+shell completion stay fast.
+"""
 
 import argparse
+import importlib
+import os
 import sys
+from typing import Callable
 
-from zenkins import __version__
-from zenkins.artifacts import artifacts_command
-from zenkins.build import build_command
-from zenkins.builds import builds_command
-from zenkins.client import set_profile
-from zenkins.failures import failures_command
-from zenkins.init import init_command
-from zenkins.jobs import jobs_command
-from zenkins.log import log_command
-from zenkins.params import params_command
-from zenkins.queue import queue_command
-from zenkins.status import status_command
+from zenkins.parallel import DEFAULT_JOBS
 
+# Subcommand -> "module:function", imported on use
+COMMANDS = {
+    "artifacts": "zenkins.artifacts:artifacts_command",
+    "failures": "zenkins.failures:failures_command",
+    "grep": "zenkins.grep:grep_command",
+    "init": "zenkins.init:init_command",
+    "jobs": "zenkins.jobs:jobs_command",
+    "status": "zenkins.status:status_command",
+    "builds": "zenkins.builds:builds_command",
+    "log": "zenkins.log:log_command",
+    "queue": "zenkins.queue:queue_command",
+    "build": "zenkins.build:build_command",
+    "params": "zenkins.params:params_command",
+    "daemon": "zenkins.daemon:daemon_command",
+}
 
-def main() -> None:
+
+def load_command(name: str) -> Callable[[argparse.Namespace], None]:
+    """Import the function implementing subcommand *name*."""
+    module, func = COMMANDS[name].split(":")
+    return getattr(importlib.import_module(module), func)
+
+
+class _VersionAction(argparse.Action):
+    """Like action="version", but looks the version up only when asked."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, help="show program's version number and exit"):
+        super().__init__(option_strings, dest, nargs=0, default=argparse.SUPPRESS, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from zenkins import __version__
+
+        print(f"{parser.prog} {__version__}")
+        parser.exit()
+
+
+def make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="zenkins",
         description="Jenkins CLI tool",
@@ -25,14 +57,45 @@ def main() -> None:
     parser.add_argument(
         "-V",
         "--version",
-        action="version",
-        version=f"%(prog)s {__version__}",
+        action=_VersionAction,
     )
     parser.add_argument(
         "--profile",
         metavar="NAME",
         help="Config profile to use (defined as [profile.NAME] in config.toml)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk cache of finished-build data",
+    )
+    parser.add_argument(
+        "--trace-http",
+        action="store_true",
+        help="Log every HTTP request and print request statistics at exit",
+    )
+    parser.add_argument(
+        "--trace-file",
+        metavar="PATH",
+        help="Also write a Chrome trace (JSON) of all requests to PATH; implies --trace-http",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Record all HTTP traffic of the command into a cassette in DIR (auth redacted)",
+    )
+    cassette_group.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="Serve HTTP traffic from the cassette in DIR instead of Jenkins",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        choices=["none", "original"],
+        default="none",
+        help="With --replay, answer immediately (default) or with the recorded latency",
+    )
 
     subparsers = parser.add_subparsers(dest="command", help="Commands")
 
@@ -42,12 +105,18 @@ def main() -> None:
     # jobs
     jobs_parser = subparsers.add_parser("jobs", help="List all jobs with status")
     jobs_parser.add_argument("folder", nargs="?", help="Folder path (e.g. my-project)")
+    jobs_parser.add_argument("-r", "--recursive", action="store_true",
+                             help="Include jobs in sub-folders (fetched concurrently)")
+    jobs_parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                             help=f"Folders to fetch concurrently with -r (default: {DEFAULT_JOBS})")
 
     # status
-    status_parser = subparsers.add_parser("status", help="Show last build info for a job")
-    status_parser.add_argument("job", help="Job name")
+    status_parser = subparsers.add_parser("status", help="Show last build info for jobs")
+    status_parser.add_argument("job", nargs="+", help="Job name(s), fetched concurrently")
     status_parser.add_argument("-w", "--wait", action="store_true",
                                help="Poll until the build finishes")
+    status_parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                               help=f"Jobs to query concurrently (default: {DEFAULT_JOBS})")
 
     # builds
     builds_parser = subparsers.add_parser("builds", help="List recent builds for a job")
@@ -58,6 +127,11 @@ def main() -> None:
     log_parser = subparsers.add_parser("log", help="Show console output for a build")
     log_parser.add_argument("job", help="Job name")
     log_parser.add_argument("build", nargs="?", help="Build number (default: last build)")
+    log_mode = log_parser.add_mutually_exclusive_group()
+    log_mode.add_argument("-f", "--follow", action="store_true",
+                          help="Follow a running build; exit with its result code")
+    log_mode.add_argument("--head", type=int, metavar="N", help="Show only the first N lines")
+    log_mode.add_argument("--tail", type=int, metavar="N", help="Show only the last N lines")
 
     # queue
     subparsers.add_parser("queue", help="Show build queue")
@@ -67,6 +141,22 @@ def main() -> None:
     failures_parser.add_argument("job", help="Job name")
     failures_parser.add_argument("build", nargs="?", help="Build number or range (e.g. 42, 40..45)")
     failures_parser.add_argument("-n", type=int, help="Summarize last N builds")
+    failures_parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                                 help=f"Builds to fetch concurrently (default: {DEFAULT_JOBS})")
+    failures_parser.add_argument("--flaky", action="store_true",
+                                 help="With a range or -n, rank tests by how often they flip between pass and fail")
+
+    # grep
+    grep_parser = subparsers.add_parser("grep", help="Search console logs of one or more builds")
+    grep_parser.add_argument("job", help="Job name")
+    grep_parser.add_argument("pattern", help="Regular expression to search for")
+    grep_parser.add_argument("build", nargs="?", help="Build number or range (e.g. 42, 40..45)")
+    grep_parser.add_argument("-n", type=int, help="Search last N builds")
+    grep_parser.add_argument("-l", "--files-with-matches", action="store_true",
+                             help="Only list builds with a match")
+    grep_parser.add_argument("-i", "--ignore-case", action="store_true", help="Case-insensitive match")
+    grep_parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                             help=f"Logs to search concurrently (default: {DEFAULT_JOBS})")
 
     # artifacts
     artifacts_parser = subparsers.add_parser("artifacts", help="List or download build artifacts")
@@ -76,6 +166,10 @@ def main() -> None:
     artifacts_parser.add_argument("-d", "--dir", default=".", help="Download directory (default: .)")
     artifacts_parser.add_argument("--glob", help="Filter artifacts by glob pattern")
     artifacts_parser.add_argument("-l", "--list", action="store_true", help="List artifacts without downloading")
+    artifacts_parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                                  help=f"Concurrent downloads (default: {DEFAULT_JOBS})")
+    artifacts_parser.add_argument("--sync", action="store_true",
+                                  help="Skip files already current in --dir, resume partial downloads")
 
     # params
     params_parser = subparsers.add_parser("params", help="List build parameters for a job")
@@ -87,25 +181,86 @@ def main() -> None:
     build_parser.add_argument("-p", "--param", action="append", metavar="KEY=VALUE",
                               help="Build parameter (repeatable, e.g. -p BRANCH=main -p CLEAN=true)")
 
+    # daemon
+    daemon_parser = subparsers.add_parser("daemon", help="Serve read-only commands from a warm background process")
+    daemon_parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+
+    return parser
+
+
+def _forwardable(args: argparse.Namespace) -> bool:
+    """Whether a command line may be run by the daemon instead of locally."""
+    from zenkins.daemon import servable
+
+    return (
+        servable(args)
+        and not (args.no_cache or args.trace_http or args.trace_file or args.record or args.replay)
+        and not os.environ.get("ZENKINS_TRACE")
+        and not os.environ.get("ZENKINS_NO_DAEMON")
+    )
+
+
+# Commands that don't talk to Jenkins through the configured profile
+# (init checks the configuration itself)
+_NO_CONTEXT_COMMANDS = frozenset({"daemon", "init"})
+
+
+def _bind_context(args: argparse.Namespace):
+    """Resolve the profile once for the whole command and route requests through it."""
+    from contextlib import nullcontext
+
+    from zenkins.client import resolve_context, use_context
+
+    if args.command in _NO_CONTEXT_COMMANDS:
+        return nullcontext()
+    return use_context(resolve_context(args.profile))
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run a parsed command line in this process (also used by the daemon)."""
+    from zenkins import cache, trace
+    from zenkins.client import set_profile
+
+    set_profile(args.profile)
+    cache.set_enabled(not args.no_cache)
+    trace.enable_from_env()
+    if args.trace_http or args.trace_file:
+        trace.enable(args.trace_file)
+
+    command = load_command(args.command)
+
+    if args.record or args.replay:
+        from zenkins import cassette
+
+    if args.record:
+        with cassette.record(args.record), _bind_context(args):
+            command(args)
+    elif args.replay:
+        try:
+            with cassette.replay(args.replay, latency=args.replay_latency == "original"):
+                command(args)
+        except cassette.CassetteMiss as e:
+            print(f"Error: {e} in cassette {args.replay}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        with _bind_context(args):
+            command(args)
+
+
+def main() -> None:
+    parser = make_parser()
     args = parser.parse_args()
 
     if not args.command:
         parser.print_help()
         sys.exit(1)
 
-    set_profile(args.profile)
+    # Hand read-only commands to a running `zenkins daemon`, if any
+    if _forwardable(args):
+        from zenkins.daemon import forward
+
+        code = forward(sys.argv[1:])
+        if code is not None:
+            sys.exit(code)
 
-    commands = {
-        "artifacts": artifacts_command,
-        "failures": failures_command,
-        "init": init_command,
-        "jobs": jobs_command,
-        "status": status_command,
-        "builds": builds_command,
-        "log": log_command,
-        "queue": queue_command,
-        "build": build_command,
-        "params": params_command,
-    }
-
-    commands[args.command](args)
+    run(args)
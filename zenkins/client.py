@@ -1,15 +1,32 @@
-"""Jenkins HTTP client - session management and credential loading."""
+"""Jenkins HTTP client - session management and credential loading.
 
+``requests`` is imported on first use rather than at import time, which
+keeps it out of CLI startup paths that never reach the network.
+"""
+
+import random
 import sys
+import threading
+import time
 import tomllib
-from functools import lru_cache
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator
+from urllib.parse import urlsplit
 
 import platformdirs
-import requests
 
+from zenkins import trace
+from zenkins.ratelimit import get_budget
 from zenkins.types import Credentials
 
+if TYPE_CHECKING:
+    import requests
+
 CONFIG_FILE = Path(platformdirs.user_config_dir("zenkins", appauthor=False)) / "config.toml"
 
 
@@ -25,13 +42,62 @@ def job_path(job: str) -> str:
     return "/job/" + "/job/".join(quote(p, safe="") for p in parts)
 
 
-_active_profile: str | None = None
+@dataclass(frozen=True)
+class ClientContext:
+    """Resolved connection settings for one Jenkins profile."""
+
+    base_url: str
+    auth: tuple[str, str]
+    profile: str | None = None
+    # Host-wide budget from config.toml (see zenkins.ratelimit)
+    rate_limit: float | None = None
+    max_in_flight: int | None = None
+
+
+# Profile / explicit context selected for the current thread or task.
+# Worker pools copy these into their threads (see zenkins.parallel).
+_profile: ContextVar[str | None] = ContextVar("zenkins_profile", default=None)
+_context: ContextVar[ClientContext | None] = ContextVar("zenkins_context", default=None)
+
+_config_lock = threading.Lock()
+_config_cache: tuple[tuple, dict] | None = None
+
+
+def _read_config() -> dict:
+    """Parse config.toml, re-reading it only when the file changes."""
+    global _config_cache
+    try:
+        st = CONFIG_FILE.stat()
+    except FileNotFoundError:
+        return {}
+    key = (str(CONFIG_FILE), st.st_mtime_ns, st.st_size)
+    with _config_lock:
+        if _config_cache is None or _config_cache[0] != key:
+            _config_cache = (key, tomllib.loads(CONFIG_FILE.read_text()))
+        return _config_cache[1]
 
 
 def set_profile(profile: str | None) -> None:
     """Set the active profile name."""
-    global _active_profile
-    _active_profile = profile
+    _profile.set(profile)
+
+
+def get_profile() -> str | None:
+    """Get the active profile name (None for the default profile)."""
+    ctx = _context.get()
+    return ctx.profile if ctx else _profile.get()
+
+
+def _profile_section(profile: str | None) -> dict:
+    """The config.toml table for *profile* (top level for the default)."""
+    data = _read_config()
+    if profile:
+        section = data.get("profile", {}).get(profile)
+        if section is None:
+            print(f"Error: profile '{profile}' not found in {CONFIG_FILE}", file=sys.stderr)
+            sys.exit(1)
+        return section
+    return data
 
 
 def load_credentials(profile: str | None = None) -> Credentials:
@@ -42,15 +108,7 @@ def load_credentials(profile: str | None = None) -> Credentials:
     """
     if not CONFIG_FILE.exists():
         return {}
-    data = tomllib.loads(CONFIG_FILE.read_text())
-    if profile:
-        section = data.get("profile", {}).get(profile)
-        if section is None:
-            print(f"Error: profile '{profile}' not found in {CONFIG_FILE}", file=sys.stderr)
-            sys.exit(1)
-        src = section
-    else:
-        src = data
+    src = _profile_section(profile)
     return {
         "url": src.get("url", ""),
         "user": src.get("user", ""),
@@ -58,13 +116,9 @@ def load_credentials(profile: str | None = None) -> Credentials:
     }
 
 
-def get_credentials() -> tuple[str, str, str]:
-    """Get Jenkins credentials.
-
-    Returns:
-        Tuple of (url, user, token)
-    """
-    creds = load_credentials(_active_profile)
+def resolve_context(profile: str | None = None) -> ClientContext:
+    """Resolve a profile from config.toml into a ClientContext."""
+    creds = load_credentials(profile)
     url = creds.get("url")
     user = creds.get("user")
     token = creds.get("token")
@@ -74,31 +128,350 @@ def get_credentials() -> tuple[str, str, str]:
         print("\nRun 'zenkins init' to check configuration.", file=sys.stderr)
         sys.exit(1)
 
-    return url.rstrip("/"), user, token
+    limits = _profile_section(profile)
+    return ClientContext(
+        url.rstrip("/"), (user, token), profile,
+        rate_limit=limits.get("rate_limit"), max_in_flight=limits.get("max_in_flight"),
+    )
+
+
+def current_context() -> ClientContext:
+    """The context in use: an explicit one, else the active profile's.
+
+    cli.run() binds the profile's context for the duration of a command,
+    so config.toml is only consulted here outside of one.
+    """
+    return _context.get() or resolve_context(_profile.get())
+
+
+@contextmanager
+def use_context(context: ClientContext) -> Iterator[ClientContext]:
+    """Route module-level calls (api_get etc.) through *context* in this block."""
+    token = _context.set(context)
+    try:
+        yield context
+    finally:
+        _context.reset(token)
+
+
+class Cancelled(Exception):
+    """Raised by requests of a command that was cancelled (see cancellable())."""
+
+
+# Set when the command making requests should stop, e.g. because the daemon
+# client it is running for went away
+_cancelled: ContextVar[threading.Event | None] = ContextVar("zenkins_cancelled", default=None)
+
+
+@contextmanager
+def cancellable(event: threading.Event) -> Iterator[None]:
+    """Stop requests in this block once *event* is set.
+
+    Requests then raise Cancelled before they are sent, and streamed
+    bodies between chunks. Worker threads started in the block inherit
+    this (see zenkins.parallel).
+    """
+    token = _cancelled.set(event)
+    try:
+        yield
+    finally:
+        _cancelled.reset(token)
+
+
+def _check(cancelled: threading.Event | None) -> None:
+    if cancelled is not None and cancelled.is_set():
+        raise Cancelled("command cancelled")
+
+
+def get_credentials() -> tuple[str, str, str]:
+    """Get Jenkins credentials.
+
+    Returns:
+        Tuple of (url, user, token)
+    """
+    ctx = current_context()
+    return ctx.base_url, ctx.auth[0], ctx.auth[1]
 
 
 # Injected session for testing
-_session: requests.Session | None = None
+_session: "requests.Session | None" = None
 
+_sessions: "dict[ClientContext, requests.Session]" = {}
+_sessions_lock = threading.Lock()
 
-def get_session() -> requests.Session:
-    """Get the requests session (cached or injected)."""
-    global _session
+# Transport adapter factory, e.g. for recording (see zenkins.cassette)
+_transport: "Callable[..., requests.adapters.BaseAdapter] | None" = None
+
+
+def set_transport(factory: "Callable[..., requests.adapters.BaseAdapter] | None") -> None:
+    """Route new sessions through adapters made by *factory* (None for plain HTTP).
+
+    The factory is called with HTTPAdapter keyword arguments such as
+    ``pool_maxsize``. Existing per-profile sessions are closed.
+    """
+    global _transport
+    _transport = factory
+    with _sessions_lock:
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
+
+
+def _mount(session: "requests.Session", **kwargs) -> None:
+    from requests.adapters import HTTPAdapter
+
+    adapter = (_transport or HTTPAdapter)(**kwargs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def get_session(context: ClientContext | None = None) -> "requests.Session":
+    """Get the requests session (injected, or one per context)."""
     if _session is not None:
         return _session
-    return _get_default_session()
+    import requests
+
+    context = context or current_context()
+    with _sessions_lock:
+        s = _sessions.get(context)
+        if s is None:
+            s = requests.Session()
+            s.auth = context.auth
+            if _transport:
+                _mount(s)
+            _sessions[context] = s
+    return s
 
 
-@lru_cache(maxsize=1)
-def _get_default_session() -> requests.Session:
-    """Create the default authenticated session."""
-    url, user, token = get_credentials()
-    s = requests.Session()
-    s.auth = (user, token)
-    return s
+def set_pool_size(size: int, context: ClientContext | None = None) -> None:
+    """Size the per-host connection pool for *size* concurrent requests.
+
+    requests keeps 10 connections per host by default; with more worker
+    threads than that, connections would be discarded after each use.
+    The adaptive limiter for the controller may grow up to *size*.
+    """
+    size = max(size, 10)
+    _mount(get_session(context), pool_maxsize=size)
+    base = context.base_url if context else get_base_url()
+    get_limiter(base).set_maximum(size)
+
+
+# Responses that mean "controller overloaded, try again later"
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+RETRY_AFTER_CAP = 120.0
 
 
-def set_session(session: requests.Session | None) -> None:
+class AdaptiveLimiter:
+    """AIMD limit on in-flight requests to one controller.
+
+    The limit grows by one per ``limit`` healthy responses (additive
+    increase) and halves when the controller pushes back with 429/5xx
+    or drops connections (multiplicative decrease). Decreases are spaced
+    by BACKOFF_BASE so a burst of failures counts as one signal.
+    """
+
+    def __init__(self, maximum: int = 10, minimum: int = 1) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    def set_maximum(self, maximum: int) -> None:
+        with self._cond:
+            grow = self.limit >= self.maximum
+            self.maximum = max(maximum, self.minimum)
+            self.limit = float(self.maximum) if grow else min(self.limit, self.maximum)
+            self._cond.notify_all()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, healthy: bool) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if healthy:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            else:
+                now = time.monotonic()
+                if now - self._last_decrease >= BACKOFF_BASE:
+                    self._last_decrease = now
+                    self.limit = max(self.minimum, self.limit / 2)
+            self._cond.notify_all()
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(url: str) -> AdaptiveLimiter:
+    """The adaptive limiter for the host of *url*."""
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = AdaptiveLimiter()
+    return limiter
+
+
+def _retry_after(resp: "requests.Response") -> float | None:
+    """Seconds to wait according to a Retry-After header, if any."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), RETRY_AFTER_CAP)
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def request(
+    method: str, url: str, context: ClientContext | None = None,
+    retry: bool = True, **kwargs,
+) -> "requests.Response":
+    """Send a request to a full Jenkins URL, retrying when overloaded.
+
+    429/502/503/504 responses and connection errors are retried up to
+    MAX_RETRIES times with jittered exponential backoff, honoring
+    Retry-After. With ``retry=False`` only 429 is retried, since the
+    controller did not act on the request. Raises for error statuses.
+
+    Requests also draw from the profile's host-wide budget, if one is
+    configured. An injected test session skips it unless *context* is given.
+    With ``stream=True`` the limiter slot and budget unit are held until
+    the body has been read or the response closed.
+    Every attempt is recorded when HTTP tracing is on (see zenkins.trace).
+    """
+    import requests
+
+    session = get_session(context)
+    limiter = get_limiter(url)
+    if context is None and _session is None:
+        context = current_context()
+    budget = context and get_budget(context.base_url, context.rate_limit, context.max_in_flight)
+    tracer = trace.active()
+    stream = kwargs.get("stream", False)
+    cancelled = _cancelled.get()
+    attempt = 0
+    while True:
+        _check(cancelled)
+        limiter.acquire()
+        try:
+            slot = budget.acquire() if budget else None
+        except BaseException:
+            limiter.release(healthy=False)
+            raise
+
+        def release(healthy: bool) -> None:
+            if budget:
+                budget.release(slot)
+            limiter.release(healthy)
+
+        start = time.perf_counter()
+        try:
+            resp = getattr(session, method)(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if tracer:
+                tracer.failed(method, url, start, e)
+            release(healthy=False)
+            if not retry or attempt >= MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+        except BaseException:
+            # Anything else (a broken body, a cassette miss, Ctrl-C) must
+            # still give the slot back, or the host's limiter runs dry
+            release(healthy=False)
+            raise
+        else:
+            if tracer:
+                tracer.observe(method, url, resp, start, stream)
+            if resp.status_code not in RETRY_STATUSES:
+                if not stream:
+                    release(healthy=True)
+                    resp.raise_for_status()
+                    return resp
+                try:
+                    resp.raise_for_status()
+                except BaseException:
+                    release(healthy=True)
+                    raise
+                # The body is still to come, and counts as in flight too
+                _release_when_done(resp, lambda: release(healthy=True), cancelled)
+                return resp
+            release(healthy=False)
+            if attempt >= MAX_RETRIES or (not retry and resp.status_code != 429):
+                resp.raise_for_status()
+                return resp
+            delay = _retry_after(resp)
+            if delay is None:
+                delay = _backoff(attempt)
+            resp.close()
+        if cancelled is not None:
+            cancelled.wait(delay)
+        else:
+            time.sleep(delay)
+        attempt += 1
+
+
+def _release_when_done(
+    resp: "requests.Response", release: Callable[[], None],
+    cancelled: threading.Event | None = None,
+) -> None:
+    """Call *release* once, when *resp*'s streamed body is read to the end or closed.
+
+    A response dropped without either is released when it is collected.
+    Reading the body raises Cancelled once *cancelled* is set.
+    """
+    lock = threading.Lock()
+    done = False
+
+    def once() -> None:
+        nonlocal done
+        with lock:
+            if done:
+                return
+            done = True
+        release()
+
+    iter_content = resp.iter_content
+    close = resp.close
+
+    def releasing_iter(*args, **kwargs):
+        try:
+            for chunk in iter_content(*args, **kwargs):
+                _check(cancelled)
+                yield chunk
+        finally:
+            once()
+
+    def releasing_close() -> None:
+        try:
+            close()
+        finally:
+            once()
+
+    resp.iter_content = releasing_iter
+    resp.close = releasing_close
+    weakref.finalize(resp, once)
+
+
+def set_session(session: "requests.Session | None") -> None:
     """Inject a session for testing. Pass None to reset."""
     global _session
     _session = session
@@ -108,42 +481,44 @@ def reset_session() -> None:
     """Reset to default session and clear cache."""
     global _session
     _session = None
-    _get_default_session.cache_clear()
+    with _sessions_lock:
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
 
 
 def get_base_url() -> str:
     """Get the Jenkins base URL."""
-    url, _, _ = get_credentials()
-    return url
+    return current_context().base_url
 
 
-def api_get(path: str, **kwargs) -> requests.Response:
+def api_get(path: str, context: ClientContext | None = None, **kwargs) -> "requests.Response":
     """GET a Jenkins API path.
 
     Args:
         path: API path (e.g., "/api/json" or "/job/foo/api/json")
+        context: Profile to use (default: the current context)
         **kwargs: Extra arguments passed to session.get()
 
+    Overloaded responses are retried, see request().
+
     Returns:
         Response object
     """
-    url = get_base_url() + path
-    resp = get_session().get(url, **kwargs)
-    resp.raise_for_status()
-    return resp
+    url = (context.base_url if context else get_base_url()) + path
+    return request("get", url, context, **kwargs)
 
 
-def api_post(path: str, **kwargs) -> requests.Response:
+def api_post(path: str, context: ClientContext | None = None, **kwargs) -> "requests.Response":
     """POST to a Jenkins API path.
 
     Args:
         path: API path (e.g., "/job/foo/build")
+        context: Profile to use (default: the current context)
         **kwargs: Extra arguments passed to session.post()
 
     Returns:
         Response object
     """
-    url = get_base_url() + path
-    resp = get_session().post(url, **kwargs)
-    resp.raise_for_status()
-    return resp
+    url = (context.base_url if context else get_base_url()) + path
+    return request("post", url, context, retry=False, **kwargs)
@@ -0,0 +1,152 @@
+"""Conditional GETs for endpoints that are polled repeatedly.
+
+Responses are remembered per URL together with their validators
+(``ETag`` / ``Last-Modified``). The next request for the URL is sent with
+``If-None-Match`` / ``If-Modified-Since`` and a 304 reuses the remembered
+body. Jenkins' JSON API often sends no validators, so the body's hash is
+compared as well: an unchanged body is reported as such and its already
+decoded JSON is returned without parsing it again.
+
+Entries live in memory for the life of the process (``status --wait``).
+Callers that run as separate processes in a loop (``jobs``, ``queue``)
+can ask for entries to be kept on disk as well. Only responses with
+validators are written there: without them a later process has to
+download the body anyway. The directory is bounded like the build cache,
+evicting least recently used entries beyond MAX_VALIDATOR_BYTES.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import platformdirs
+
+import zenkins.client as client
+from zenkins import cache
+
+VALIDATOR_DIR = Path(platformdirs.user_cache_dir("zenkins", appauthor=False)) / "validators"
+MAX_VALIDATOR_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class _Entry:
+    body: bytes
+    digest: str
+    etag: str | None = None
+    last_modified: str | None = None
+    # Decoded JSON, filled in on first use
+    data: Any = field(default=None, repr=False)
+
+
+_entries: dict[str, _Entry] = {}
+_lock = threading.Lock()
+
+
+def _disk_path(url: str) -> Path:
+    return VALIDATOR_DIR / hashlib.sha256(url.encode()).hexdigest()
+
+
+def _load(url: str) -> _Entry | None:
+    """Read a persisted entry: a JSON header line followed by the body."""
+    path = _disk_path(url)
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    # Bump mtime so eviction sees this entry as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    header, _, body = raw.partition(b"\n")
+    try:
+        meta = json.loads(header)
+    except ValueError:
+        return None
+    return _Entry(body, hashlib.sha256(body).hexdigest(), meta.get("etag"), meta.get("last_modified"))
+
+
+def _save(url: str, entry: _Entry) -> None:
+    VALIDATOR_DIR.mkdir(parents=True, exist_ok=True)
+    header = json.dumps({"etag": entry.etag, "last_modified": entry.last_modified}).encode()
+    data = header + b"\n" + entry.body
+    fd, tmp = tempfile.mkstemp(dir=VALIDATOR_DIR, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, _disk_path(url))
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    cache.account(VALIDATOR_DIR, len(data), MAX_VALIDATOR_BYTES)
+
+
+def _get(path: str, persist: bool) -> tuple[_Entry, bool]:
+    url = client.get_base_url() + path
+    persist = persist and cache.is_enabled()
+    with _lock:
+        entry = _entries.get(url)
+    if entry is None and persist:
+        entry = _load(url)
+
+    headers = {}
+    if entry and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    resp = client.api_get(path, headers=headers) if headers else client.api_get(path)
+
+    if resp.status_code == 304 and entry:
+        changed = False
+    else:
+        body = resp.content
+        digest = hashlib.sha256(body).hexdigest()
+        changed = entry is None or digest != entry.digest
+        if changed:
+            entry = _Entry(body, digest)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        validators_changed = (etag, last_modified) != (entry.etag, entry.last_modified)
+        entry.etag, entry.last_modified = etag, last_modified
+        if persist and (changed or validators_changed):
+            if etag or last_modified:
+                _save(url, entry)
+            else:
+                _disk_path(url).unlink(missing_ok=True)
+    with _lock:
+        _entries[url] = entry
+    return entry, changed
+
+
+def get(path: str, persist: bool = False) -> tuple[bytes, bool]:
+    """GET an API path conditionally.
+
+    Returns the body and whether it changed since the last request for
+    the same URL (True the first time). With *persist*, validators and
+    body are also kept on disk so later processes can revalidate them
+    (if the response has validators); ``--no-cache`` turns that off.
+    """
+    entry, changed = _get(path, persist)
+    return entry.body, changed
+
+
+def get_json(path: str, persist: bool = False) -> tuple[Any, bool]:
+    """Like get(), but decode the body, reusing the decoded value if unchanged.
+
+    The returned value is shared between calls and must not be modified.
+    """
+    entry, changed = _get(path, persist)
+    if entry.data is None:
+        entry.data = json.loads(entry.body)
+    return entry.data, changed
+
+
+def clear() -> None:
+    """Forget all in-memory entries."""
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,337 @@
+"""zenkins daemon - serve read-only commands from a warm process.
+
+``zenkins daemon`` listens on a per-user Unix socket. While it runs, the
+CLI forwards read-only commands (DAEMON_COMMANDS) to it and streams the
+output back, so repeated calls skip interpreter startup and imports and
+reuse the daemon's open connections (no new TLS handshakes), parsed
+config and in-memory response state. Without a daemon, or for any other
+command or flag that changes process-wide state (``--no-cache``,
+tracing, cassettes), the CLI runs the command itself, as it does for
+the polling ``status --wait`` and ``log -f``. Set ``ZENKINS_NO_DAEMON=1``
+to always run locally.
+
+Each request runs on its own thread with ``sys.stdout``/``sys.stderr``
+routed to that connection, including from the worker threads the command
+starts. When the client disconnects or is interrupted, the command's
+remaining requests are cancelled.
+"""
+
+import argparse
+import io
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import traceback
+from contextvars import ContextVar, Token
+from pathlib import Path
+
+import platformdirs
+
+from zenkins.client import Cancelled, cancellable
+
+# Per-user: $XDG_RUNTIME_DIR when set, else the user cache directory
+SOCKET_PATH = (
+    Path(os.environ["XDG_RUNTIME_DIR"]) / "zenkins" if os.environ.get("XDG_RUNTIME_DIR")
+    else Path(platformdirs.user_cache_dir("zenkins", appauthor=False))
+) / "daemon.sock"
+
+DAEMON_COMMANDS = frozenset({"builds", "failures", "grep", "jobs", "log", "params", "queue", "status"})
+
+# Frames: kind (1 byte), payload length (4 bytes), payload
+_HEADER = struct.Struct("!cI")
+REQUEST, STOP, STDOUT, STDERR, EXIT = b"R", b"S", b"O", b"E", b"X"
+# Forwarded stdout is sent in chunks of about this size unless it is a tty
+BUFFER_SIZE = 16 * 1024
+
+
+def _send(sock: socket.socket, kind: bytes, data: bytes) -> None:
+    sock.sendall(_HEADER.pack(kind, len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        buf += chunk
+    return bytes(buf)
+
+
+def _recv(sock: socket.socket) -> tuple[bytes, bytes]:
+    kind, size = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return kind, _recv_exact(sock, size)
+
+
+def _connect(path: Path) -> socket.socket | None:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def servable(args: argparse.Namespace) -> bool:
+    """Whether the daemon runs a parsed command line.
+
+    Polling modes (``status --wait``, ``log --follow``) run locally: the
+    daemon would only notice that their client went away on its next
+    write, and keep polling Jenkins until then.
+    """
+    return args.command in DAEMON_COMMANDS and not (
+        getattr(args, "wait", False) or getattr(args, "follow", False)
+    )
+
+
+# -- client side ----------------------------------------------------------------
+
+def forward(argv: list[str], stdout=None, stderr=None) -> int | None:
+    """Run *argv* in the daemon, copying its output to stdout/stderr.
+
+    Returns the exit code, or None if no daemon is running.
+    """
+    sock = _connect(SOCKET_PATH)
+    if sock is None:
+        return None
+    out = stdout or sys.stdout.buffer
+    err = stderr or sys.stderr.buffer
+    request = {"argv": argv, "stdout_tty": sys.stdout.isatty(), "stderr_tty": sys.stderr.isatty()}
+    with sock:
+        try:
+            _send(sock, REQUEST, json.dumps(request).encode())
+            while True:
+                kind, data = _recv(sock)
+                if kind == EXIT:
+                    return int(data)
+                stream = out if kind == STDOUT else err
+                stream.write(data)
+                stream.flush()
+        except ConnectionError:
+            print("Error: lost connection to zenkins daemon", file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            return 130
+        except BrokenPipeError:
+            # Output piped into e.g. `head` which has exited
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+            return 1
+
+
+# -- daemon side ----------------------------------------------------------------
+
+class _SocketStream:
+    """Text stream that sends what is written as frames of one kind."""
+
+    encoding = "utf-8"
+    errors = "replace"
+
+    def __init__(self, sock: socket.socket, kind: bytes, tty: bool, lock: threading.Lock) -> None:
+        self.sock = sock
+        self.kind = kind
+        self.tty = tty
+        self._lock = lock
+        self._parts: list[str] = []
+        self._size = 0
+
+    def write(self, text: str) -> int:
+        self._parts.append(text)
+        self._size += len(text)
+        if self.kind == STDERR or self._size >= BUFFER_SIZE or (self.tty and "\n" in text):
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if not self._parts:
+            return
+        data = "".join(self._parts).encode(self.encoding, self.errors)
+        self._parts.clear()
+        self._size = 0
+        with self._lock:
+            _send(self.sock, self.kind, data)
+
+    def isatty(self) -> bool:
+        return self.tty
+
+    def fileno(self) -> int:
+        raise io.UnsupportedOperation("fileno")
+
+
+class _Redirect:
+    """Stand-in for sys.stdout/sys.stderr that writes to a per-request target.
+
+    The target is a context variable, so worker threads started with a
+    copy of the request's context (see zenkins.parallel) write to the
+    same client.
+    """
+
+    def __init__(self, default, name: str) -> None:
+        self._default = default
+        self._stream: ContextVar = ContextVar(f"zenkins_{name}", default=None)
+
+    def set(self, stream) -> Token:
+        return self._stream.set(stream)
+
+    def reset(self, token: Token) -> None:
+        self._stream.reset(token)
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream.get() or self._default, name)
+
+
+def _watch(sock: socket.socket, gone: threading.Event) -> None:
+    """Set *gone* once the client closes its end of *sock*.
+
+    Clients send nothing after the request, so any read that returns
+    means the connection is done.
+    """
+    try:
+        while sock.recv(1024):
+            pass
+    except OSError:
+        pass
+    gone.set()
+
+
+def _run(argv: list[str]) -> int:
+    from zenkins import cli
+
+    args = cli.make_parser().parse_args(argv)
+    if not servable(args):
+        print(f"Error: '{' '.join(argv)}' is not served by the daemon", file=sys.stderr)
+        return 2
+    cli.run(args)
+    return 0
+
+
+def _exit_code(e: SystemExit) -> int:
+    if e.code is None or isinstance(e.code, int):
+        return e.code or 0
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "_Server"
+
+    def handle(self) -> None:
+        sock = self.request
+        try:
+            kind, data = _recv(sock)
+        except ConnectionError:
+            return
+        if kind == STOP:
+            threading.Thread(target=self.server.shutdown).start()
+            _send(sock, EXIT, b"0")
+            return
+
+        request = json.loads(data)
+        lock = threading.Lock()
+        out = _SocketStream(sock, STDOUT, request.get("stdout_tty", False), lock)
+        err = _SocketStream(sock, STDERR, request.get("stderr_tty", False), lock)
+        stdout, stderr = self.server.redirects
+        tokens = stdout.set(out), stderr.set(err)
+        # A client that disconnects (or is interrupted) cancels its command
+        gone = threading.Event()
+        threading.Thread(target=_watch, args=(sock, gone), daemon=True).start()
+        try:
+            try:
+                with cancellable(gone):
+                    code = _run(request["argv"])
+            except SystemExit as e:
+                code = _exit_code(e)
+            except (Cancelled, ConnectionError, io.UnsupportedOperation):
+                # The client went away (e.g. its output was piped into head)
+                return
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            out.flush()
+            err.flush()
+            _send(sock, EXIT, str(code).encode())
+        except OSError:
+            pass
+        finally:
+            stdout.reset(tokens[0])
+            stderr.reset(tokens[1])
+            # Wake the watcher if the client is still connected
+            try:
+                sock.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    redirects: tuple[_Redirect, _Redirect]
+
+
+def serve(path: Path | None = None, ready: threading.Event | None = None) -> None:
+    """Serve forwarded commands on *path* until stopped."""
+    path = Path(path or SOCKET_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    if path.exists():
+        sock = _connect(path)
+        if sock is not None:
+            sock.close()
+            raise SystemExit(f"Error: a zenkins daemon is already listening on {path}")
+        path.unlink()
+
+    # Import the command modules up front so the first request is fast too
+    from zenkins.cli import load_command
+
+    for name in DAEMON_COMMANDS:
+        load_command(name)
+
+    old_umask = os.umask(0o177)
+    try:
+        server = _Server(str(path), _Handler)
+    finally:
+        os.umask(old_umask)
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    server.redirects = (_Redirect(real_stdout, "stdout"), _Redirect(real_stderr, "stderr"))
+    sys.stdout, sys.stderr = server.redirects
+    try:
+        if ready:
+            ready.set()
+        server.serve_forever()
+    finally:
+        sys.stdout, sys.stderr = real_stdout, real_stderr
+        server.server_close()
+        path.unlink(missing_ok=True)
+
+
+def stop(path: Path | None = None) -> bool:
+    """Ask the daemon on *path* to exit. Returns False if none is running."""
+    sock = _connect(Path(path or SOCKET_PATH))
+    if sock is None:
+        return False
+    with sock:
+        _send(sock, STOP, b"")
+        try:
+            _recv(sock)
+        except ConnectionError:
+            pass
+    return True
+
+
+def daemon_command(args: argparse.Namespace) -> None:
+    """Run the daemon in the foreground, or stop a running one."""
+    if getattr(args, "stop", False):
+        if not stop():
+            print("No zenkins daemon running.", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    print(f"zenkins daemon listening on {SOCKET_PATH} (Ctrl-C to stop)", file=sys.stderr)
+    try:
+        serve()
+    except KeyboardInterrupt:
+        pass
@@ -1,44 +1,128 @@
 """zenkins failures <job> [build] - show failing tests."""
 
 import argparse
-from collections import Counter
+import json
+import sys
 
-from zenkins.client import api_get, job_path
+import requests
 
+from zenkins import cache, history, publishers, testreport
+from zenkins.client import api_get, job_path, set_pool_size
+from zenkins.matrix import OutcomeMatrix
+from zenkins.parallel import DEFAULT_JOBS, parallel_map
 
-def _get_failures(job: str, build: str) -> list[str]:
-    """Get all failing test names for a single build."""
-    base = f"{job_path(job)}/{build}"
+
+def _fetch_json(job: str, build: str, endpoint: str) -> dict:
+    """Fetch a build-level JSON endpoint through the cache ({} if missing)."""
+    data = cache.fetch(job, build, endpoint)
+    return json.loads(data) if data else {}
+
+
+def _fetch_report(job: str, build: str, tree: str) -> tuple[dict, list[dict]]:
+    """Stream a build's JUnit test report, keeping only non-passing cases.
+
+    Returns the report without cases (for its counts) and the failed
+    cases, or ({}, []) if the build has no test report.
+    """
+    chunks = cache.stream(job, build, f"testReport/api/json?tree={tree}")
+    if chunks is None:
+        return {}, []
+    return testreport.parse(chunks, testreport.failed)
+
+
+def _get_failures(job: str, build: str) -> list[history.CaseResult]:
+    """Get all failing tests of a single build."""
+    found = publishers.detect(job, build)
     failures = []
 
-    # JUnit / NUnit
-    try:
-        resp = api_get(f"{base}/testReport/api/json?tree=suites[cases[name,className,status]]")
-        data = resp.json()
-        for suite in data.get("suites", []):
-            for case in suite.get("cases", []):
-                if case["status"] not in ("PASSED", "SKIPPED", "FIXED"):
-                    failures.append(f"{case['className']}.{case['name']}")
-    except Exception:
-        pass
+    # JUnit / NUnit (and xUnit)
+    if "junit" in found:
+        _, cases = _fetch_report(job, build, "suites[cases[name,className,status,duration,errorDetails]]")
+        failures.extend(
+            history.CaseResult(
+                f"{case['className']}.{case['name']}", case["status"],
+                case.get("duration"), history.error_hash(case.get("errorDetails")),
+            )
+            for case in cases
+        )
 
     # Robot Framework
-    try:
-        resp = api_get(f"{base}/robot/api/json?tree=failedCases")
-        data = resp.json()
-        failures.extend(data.get("failedCases", []))
-    except Exception:
-        pass
+    if "robot" in found:
+        data = _fetch_json(job, build, "robot/api/json?tree=failedCases")
+        failures.extend(history.CaseResult(str(name), "FAILED") for name in data.get("failedCases", []))
 
     return failures
 
 
+# Builds fetched per job-level request when resolving a range
+BUILDS_PAGE = 100
+
+
+def _fetch_builds(job: str, fields: str, start: int, end: int) -> list[dict]:
+    """Fetch builds at positions [start, end) of a job's history, newest first.
+
+    Queries ``allBuilds`` with extra *fields*; ``builds`` would stop at
+    the newest 100.
+    """
+    extra = f",{fields}" if fields else ""
+    tree = f"allBuilds[number,building{extra}]{{{start},{end}}}"
+    resp = api_get(f"{job_path(job)}/api/json?tree={tree}")
+    builds = resp.json().get("allBuilds", [])
+    for b in builds:
+        if not b.get("building", False):
+            cache.mark_finished(job, str(b["number"]))
+    return builds
+
+
+def _fetch_span(job: str, fields: str, start: int, end: int) -> list[dict]:
+    """_fetch_builds() for [start, end) in requests of up to BUILDS_PAGE builds."""
+    builds = []
+    for lo in range(start, end, BUILDS_PAGE):
+        page = _fetch_builds(job, fields, lo, min(lo + BUILDS_PAGE, end))
+        builds.extend(page)
+        if len(page) < min(BUILDS_PAGE, end - lo):
+            break
+    return builds
+
+
 def _get_last_n_build_numbers(job: str, n: int) -> list[int]:
     """Get the last N build numbers for a job."""
-    tree = f"builds[number]{{{0},{n}}}"
-    resp = api_get(f"{job_path(job)}/api/json?tree={tree}")
-    data = resp.json()
-    return [b["number"] for b in data.get("builds", [])]
+    return [b["number"] for b in _fetch_builds(job, "", 0, n)]
+
+
+def _query_builds(job: str, fields: str, build: str | None, n: int | None) -> list[dict] | None:
+    """Resolve a multi-build spec like _resolve_builds, fetching *fields* too.
+
+    The builds and their fields come from job-level ``allBuilds`` tree
+    queries (one for -n, pages of BUILDS_PAGE for a range) instead of
+    one request per build. Returns build dicts in ascending order, or
+    None for a single build.
+    """
+    if n:
+        builds = _fetch_builds(job, fields, 0, n)
+        return sorted(builds, key=lambda b: b["number"]) or None
+    rng = _parse_build_range(build) if build else None
+    if not rng:
+        return None
+
+    resp = api_get(f"{job_path(job)}/api/json?tree=lastBuild[number]")
+    last = (resp.json().get("lastBuild") or {}).get("number")
+    if last is None or last < rng[0]:
+        return []
+    newest = min(rng[-1], last)
+
+    # Positions follow build numbers unless builds were deleted: build K
+    # is at most last - K places from the newest one
+    start, end = last - newest, last - rng[0] + 1
+    builds = _fetch_span(job, fields, start, end)
+    if start > 0 and (not builds or builds[0]["number"] != newest):
+        # Deleted builds moved part of the range closer to the front; find
+        # its real positions from a list of numbers only
+        numbers = [b["number"] for b in _fetch_builds(job, "", 0, start)]
+        ahead = [i for i, number in enumerate(numbers) if rng[0] <= number <= newest]
+        if ahead:
+            builds = _fetch_span(job, fields, ahead[0], ahead[-1] + 1) + builds
+    return sorted((b for b in builds if rng[0] <= b["number"] <= rng[-1]), key=lambda b: b["number"])
 
 
 def _parse_build_range(build_spec: str) -> list[int] | None:
@@ -55,80 +139,143 @@ def _parse_build_range(build_spec: str) -> list[int] | None:
 
 def _single_build(job: str, build: str) -> None:
     """Show failures for a single build."""
-    base = f"{job_path(job)}/{build}"
+    publishers_found = publishers.detect(job, build)
     found = False
 
     # JUnit / NUnit test report
-    try:
-        resp = api_get(f"{base}/testReport/api/json?tree=failCount,passCount,skipCount,suites[cases[name,className,status,errorDetails]]")
-        data = resp.json()
-        fail_count = data.get("failCount", 0)
-        pass_count = data.get("passCount", 0)
-        if fail_count:
-            print(f"JUnit: {fail_count} failed, {pass_count} passed\n")
-            for suite in data.get("suites", []):
-                for case in suite.get("cases", []):
-                    if case["status"] not in ("PASSED", "SKIPPED", "FIXED"):
-                        print(f"  FAIL: {case['className']}.{case['name']}")
-                        if case.get("errorDetails"):
-                            for line in case["errorDetails"].splitlines()[:3]:
-                                print(f"        {line}")
-                            print()
-            found = True
-        elif pass_count:
-            print(f"JUnit: all {pass_count} passed")
-            found = True
-    except Exception:
-        pass
+    data, cases = _fetch_report(
+        job, build, "failCount,passCount,skipCount,suites[cases[name,className,status,errorDetails]]"
+    ) if "junit" in publishers_found else ({}, [])
+    fail_count = data.get("failCount", 0)
+    pass_count = data.get("passCount", 0)
+    if fail_count:
+        print(f"JUnit: {fail_count} failed, {pass_count} passed\n")
+        for case in cases:
+            print(f"  FAIL: {case['className']}.{case['name']}")
+            if case.get("errorDetails"):
+                for line in case["errorDetails"].splitlines()[:3]:
+                    print(f"        {line}")
+                print()
+        found = True
+    elif pass_count:
+        print(f"JUnit: all {pass_count} passed")
+        found = True
 
     # Robot Framework
-    try:
-        resp = api_get(f"{base}/robot/api/json?tree=overallFailed,overallPassed,failedCases")
-        data = resp.json()
-        failed = data.get("overallFailed", 0)
-        passed = data.get("overallPassed", 0)
-        if failed:
-            print(f"Robot: {failed} failed, {passed} passed\n")
-            for case in data.get("failedCases", []):
-                print(f"  FAIL: {case}")
-            print()
-            found = True
-        elif passed:
-            print(f"Robot: all {passed} passed")
-            found = True
-    except Exception:
-        pass
+    data = _fetch_json(
+        job, build, "robot/api/json?tree=overallFailed,overallPassed,failedCases"
+    ) if "robot" in publishers_found else {}
+    failed = data.get("overallFailed", 0)
+    passed = data.get("overallPassed", 0)
+    if failed:
+        print(f"Robot: {failed} failed, {passed} passed\n")
+        for case in data.get("failedCases", []):
+            print(f"  FAIL: {case}")
+        print()
+        found = True
+    elif passed:
+        print(f"Robot: all {passed} passed")
+        found = True
 
     if not found:
         print("No test results found for this build.")
 
 
-def _multi_builds(job: str, builds: list[int]) -> None:
-    """Show failure summary across multiple builds."""
-    total = len(builds)
-    counts: Counter[str] = Counter()
-    build_failures: dict[str, list[int]] = {}
+# Listed with each build of a multi-build summary, to skip builds without failures
+BUILD_FIELDS = "actions[_class,failCount]"
 
-    for b in builds:
-        print(f"\r  Fetching build #{b}...", end="", flush=True)
-        failures = _get_failures(job, str(b))
+
+def _passed(build: dict) -> bool:
+    """Whether a listed build finished with no failed tests.
+
+    True when every test-result action of the build reports a failCount
+    of 0, including builds that published no results at all. Actions
+    that don't report a failCount are not trusted to be clean.
+    """
+    if build.get("building", False):
+        return False
+    actions = [a for a in build.get("actions", []) if a and publishers.from_actions([a])]
+    return all(a.get("failCount") == 0 for a in actions)
+
+
+def _multi_builds(job: str, builds: list[dict], jobs: int = DEFAULT_JOBS, flaky: bool = False) -> None:
+    """Show failure summary (or with *flaky*, a flakiness report) across builds.
+
+    *builds* are listed with BUILD_FIELDS. Builds that passed all their
+    tests are counted without fetching their test results, and builds
+    already in the local test history are not fetched again; finished
+    builds are added to the history.
+    """
+    numbers = [b["number"] for b in builds]
+    use_history = cache.is_enabled()
+    known = history.recorded(job, numbers) if use_history else set()
+    passed = [b["number"] for b in builds if b["number"] not in known and _passed(b)]
+    missing = [n for n in numbers if n not in known and n not in passed]
+    errors: dict[int, Exception] = {}
+    # The listing shows which test publishers the job uses
+    publishers.remember(job, publishers.from_actions(
+        [a for b in builds for a in b.get("actions", [])]
+    ))
+
+    def fetch(b: int) -> tuple[bool, list[history.CaseResult]] | requests.RequestException:
+        try:
+            # Checked first so that a build finishing mid-fetch is not recorded
+            finished = use_history and cache.is_finished(job, str(b))
+            return finished, _get_failures(job, str(b))
+        except requests.RequestException as e:
+            return e
+
+    def progress(b: int, done: int) -> None:
+        print(f"\r\033[K  Fetched build #{b} ({done}/{len(missing)})...", end="", flush=True)
+
+    results = parallel_map(fetch, missing, jobs, progress)
+    finished: dict[int, list[history.CaseResult]] = {b: [] for b in passed}
+    running: dict[int, list[history.CaseResult]] = {}
+    for b, result in zip(missing, results):
+        if isinstance(result, Exception):
+            errors[b] = result
+            continue
+        done, failures = result
+        (finished if done else running)[b] = failures
+    if use_history:
+        history.record(job, finished)
+        build_failures = history.failing_builds(job, known | finished.keys())
+    else:
+        running.update(finished)
+        build_failures = {}
+    for b, failures in sorted(running.items()):
         for f in failures:
-            counts[f] += 1
-            build_failures.setdefault(f, []).append(b)
+            build_failures.setdefault(f.name, []).append(b)
+
+    print(f"\r\033[K{len(numbers)} builds, #{min(numbers)}-#{max(numbers)}\n")
 
-    print(f"\r{total} builds, #{min(builds)}-#{max(builds)}                    \n")
+    if errors:
+        print(f"Warning: {len(errors)} build(s) could not be fetched; summary covers the rest:",
+              file=sys.stderr)
+        for b, e in errors.items():
+            print(f"  #{b}: {e}", file=sys.stderr)
+        print(file=sys.stderr)
 
-    if not counts:
+    matrix = OutcomeMatrix.from_failures((b for b in numbers if b not in errors), build_failures)
+    if not matrix:
         print("No test failures found.")
-        return
+    elif flaky:
+        _print_flaky(matrix)
+    else:
+        _print_summary(matrix)
 
-    persistent = [(name, c) for name, c in counts.items() if c == total]
+
+def _print_summary(matrix: OutcomeMatrix) -> None:
+    """Group failing tests into persistent, intermittent and one-off."""
+    total = len(matrix.builds)
+    counts = {name: matrix.failures(name) for name in matrix.rows}
+    persistent = [name for name in counts if matrix.is_persistent(name)]
     intermittent = [(name, c) for name, c in counts.items() if 1 < c < total]
-    oneoff = [(name, c) for name, c in counts.items() if c == 1]
+    oneoff = [name for name, c in counts.items() if c == 1]
 
     if persistent:
         print(f"Persistent ({total}/{total} builds):")
-        for name, _ in sorted(persistent):
+        for name in sorted(persistent):
             print(f"  {name}")
         print()
 
@@ -140,12 +287,47 @@ def _multi_builds(job: str, builds: list[int]) -> None:
 
     if oneoff:
         print("One-off:")
-        for name, _ in sorted(oneoff):
-            builds_str = ", ".join(f"#{b}" for b in build_failures[name])
+        for name in sorted(oneoff):
+            builds_str = ", ".join(f"#{b}" for b in matrix.failing_builds(name))
             print(f"  {name} ({builds_str})")
         print()
 
 
+def _print_flaky(matrix: OutcomeMatrix) -> None:
+    """Rank tests that flip between passing and failing by flakiness score.
+
+    Tests that changed state at most once are not flaky; those still
+    failing are listed separately with the build they broke in.
+    """
+    total = len(matrix.builds)
+    flaky = [name for name in matrix.rows if matrix.flips(name) > 1]
+    broken = [
+        (start, name) for name in matrix.rows
+        if matrix.flips(name) <= 1 and (start := matrix.streak_start(name)) is not None
+    ]
+
+    if flaky:
+        print("Flaky (score: recency-weighted flip rate):")
+        print(f"  {'SCORE':>5}  {'FLIPS':>5}  {'FAILED':>9}  {'STREAK':>6}  TEST")
+        for name in sorted(flaky, key=lambda t: (-matrix.flakiness(t), t)):
+            failed = f"{matrix.failures(name)}/{total}"
+            line = (f"  {matrix.flakiness(name):5.2f}  {matrix.flips(name):5}  {failed:>9}"
+                    f"  {matrix.longest_streak(name):6}  {name}")
+            start = matrix.streak_start(name)
+            if start is not None:
+                line += f" (failing since #{start})"
+            print(line)
+        print()
+    else:
+        print("No flaky tests found.\n")
+
+    if broken:
+        print("Failing since:")
+        for start, name in sorted(broken, key=lambda x: (-x[0], x[1])):
+            print(f"  #{start:<6} {name}")
+        print()
+
+
 def _resolve_builds(job: str, build: str | None, n: int | None) -> list[str] | None:
     """Resolve build spec + optional -n into a list of builds, or None for single."""
     if n:
@@ -162,8 +344,12 @@ def failures_command(args: argparse.Namespace) -> None:
     """Show failing tests for a build or range of builds."""
     job = args.job
 
-    builds = _resolve_builds(job, args.build, args.n)
+    builds = _query_builds(job, BUILD_FIELDS, args.build, args.n)
     if builds:
-        _multi_builds(job, [int(b) for b in builds])
+        jobs = getattr(args, "jobs", DEFAULT_JOBS)
+        set_pool_size(jobs)
+        _multi_builds(job, builds, jobs, getattr(args, "flaky", False))
+    elif builds is not None:
+        print(f"No builds of {job} in {args.build}")
     else:
         _single_build(job, args.build or "lastBuild")
@@ -0,0 +1,67 @@
+"""zenkins grep <job> PATTERN [build] [-n N] [-l] - search console logs."""
+
+import argparse
+import re
+import sys
+
+from zenkins import cache
+from zenkins.client import set_pool_size
+from zenkins.failures import _resolve_builds
+from zenkins.log import iter_lines
+from zenkins.parallel import DEFAULT_JOBS, parallel_map
+
+
+def _grep_build(job: str, build: str, regex: re.Pattern, first_only: bool) -> list[tuple[int, str]]:
+    """Return (line number, text) for every matching line of a build's log."""
+    chunks = cache.stream(job, build, "consoleText")
+    if chunks is None:
+        return []
+    matches = []
+    for lineno, line in enumerate(iter_lines(chunks), 1):
+        if regex.search(line):
+            matches.append((lineno, line))
+            if first_only:
+                chunks.close()
+                break
+    return matches
+
+
+def grep_command(args: argparse.Namespace) -> None:
+    """Search console logs of one or more builds for a regex."""
+    job = args.job
+    flags = re.IGNORECASE if args.ignore_case else 0
+    try:
+        regex = re.compile(args.pattern, flags)
+    except re.error as e:
+        raise SystemExit(f"Invalid pattern: {e}")
+
+    jobs = getattr(args, "jobs", DEFAULT_JOBS)
+    set_pool_size(jobs)
+    builds = _resolve_builds(job, args.build, args.n) or [args.build or "lastBuild"]
+    total = len(builds)
+    show_progress = total > 1 and sys.stderr.isatty()
+
+    def progress(b: str, done: int) -> None:
+        if show_progress:
+            print(f"\r\033[K  Searched build #{b} ({done}/{total})...", end="", file=sys.stderr, flush=True)
+
+    results = parallel_map(
+        lambda b: _grep_build(job, b, regex, args.files_with_matches),
+        builds, jobs, progress,
+    )
+    if show_progress:
+        print("\r\033[K", end="", file=sys.stderr, flush=True)
+
+    found = False
+    for build, matches in zip(builds, results):
+        if not matches:
+            continue
+        found = True
+        if args.files_with_matches:
+            print(f"#{build}")
+            continue
+        for lineno, line in matches:
+            print(f"#{build}:{lineno}: {line}")
+
+    if not found:
+        sys.exit(1)
@@ -0,0 +1,125 @@
+"""Local test history of finished builds.
+
+Test results of a finished build never change, so ``failures`` records
+each build it has analysed in a SQLite database under the user cache
+directory: the build itself, plus one row per non-passing test with its
+status, duration and a hash of the error details. Multi-build summaries
+then only fetch builds that are not recorded yet and answer the rest
+from the index, which keeps windows of thousands of builds cheap.
+
+Builds are keyed by Jenkins URL, job path and build number, like the
+build cache; ``--no-cache`` bypasses both.
+"""
+
+import hashlib
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+import platformdirs
+
+import zenkins.client as client
+
+HISTORY_DB = Path(platformdirs.user_cache_dir("zenkins", appauthor=False)) / "history.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    server TEXT NOT NULL,
+    job TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    UNIQUE (server, job, number)
+);
+CREATE TABLE IF NOT EXISTS results (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    test TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL,
+    error_hash TEXT,
+    PRIMARY KEY (build_id, test)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_test ON results (test);
+"""
+
+
+class CaseResult(NamedTuple):
+    """A non-passing test of one build."""
+
+    name: str
+    status: str
+    duration: float | None = None
+    error_hash: str | None = None
+
+
+def error_hash(details: str | None) -> str | None:
+    """Short stable hash of a test's error details (None if there are none)."""
+    if not details:
+        return None
+    return hashlib.sha1(details.strip().encode()).hexdigest()[:16]
+
+
+def _connect() -> sqlite3.Connection:
+    HISTORY_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(HISTORY_DB, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _key(job: str) -> tuple[str, str]:
+    return client.get_base_url(), client.job_path(job)
+
+
+def recorded(job: str, numbers: Iterable[int]) -> set[int]:
+    """The subset of build *numbers* of *job* already in the history."""
+    numbers = sorted(set(numbers))
+    if not numbers:
+        return set()
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT number FROM builds WHERE server = ? AND job = ? AND number BETWEEN ? AND ?",
+            (*_key(job), numbers[0], numbers[-1]),
+        )
+        return {n for (n,) in rows} & set(numbers)
+
+
+def record(job: str, builds: dict[int, list[CaseResult]]) -> None:
+    """Store the non-passing results of finished *builds* of *job*."""
+    if not builds:
+        return
+    server, path = _key(job)
+    with closing(_connect()) as conn, conn:
+        for number, results in builds.items():
+            conn.execute(
+                "DELETE FROM builds WHERE server = ? AND job = ? AND number = ?", (server, path, number)
+            )
+            build_id = conn.execute(
+                "INSERT INTO builds (server, job, number) VALUES (?, ?, ?)", (server, path, number)
+            ).lastrowid
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (build_id, test, status, duration, error_hash)"
+                " VALUES (?, ?, ?, ?, ?)",
+                ((build_id, *r) for r in results),
+            )
+
+
+def failing_builds(job: str, numbers: Iterable[int]) -> dict[str, list[int]]:
+    """Map each test failing in any of the recorded *numbers* to those builds."""
+    numbers = sorted(set(numbers))
+    if not numbers:
+        return {}
+    wanted = set(numbers)
+    failing: dict[str, list[int]] = {}
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT r.test, b.number FROM results r JOIN builds b ON b.id = r.build_id"
+            " WHERE b.server = ? AND b.job = ? AND b.number BETWEEN ? AND ?"
+            " ORDER BY b.number",
+            (*_key(job), numbers[0], numbers[-1]),
+        )
+        for test, number in rows:
+            if number in wanted:
+                failing.setdefault(test, []).append(number)
+    return failing
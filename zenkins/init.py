@@ -3,12 +3,12 @@
 import argparse
 import sys
 
-from zenkins.client import CONFIG_FILE, load_credentials, api_get, _active_profile
+from zenkins.client import CONFIG_FILE, load_credentials, api_get, get_profile
 
 
 def init_command(args: argparse.Namespace) -> None:
     """Verify Jenkins credentials and connectivity."""
-    profile = _active_profile
+    profile = get_profile()
     print(f"Config file: {CONFIG_FILE}")
     if profile:
         print(f"Profile:     {profile}")
@@ -19,6 +19,9 @@ def init_command(args: argparse.Namespace) -> None:
             'url = "http://your-jenkins.example.com"\n'
             'user = "your-username"\n'
             'token = "your-api-token"\n'
+            '\n# Optional host-wide request budget shared by all zenkins processes:\n'
+            '# rate_limit = 10      # requests per second\n'
+            '# max_in_flight = 4\n'
             '\n# Example named profile:\n'
             '# [profile.deployment]\n'
             '# url = "https://deployment-jenkins.example.com"\n'
@@ -1,8 +1,11 @@
-"""zenkins jobs - list all jobs with status."""
+"""zenkins jobs [folder] [-r] - list all jobs with status."""
 
 import argparse
 
-from zenkins.client import api_get
+from zenkins import conditional
+from zenkins.aclient import AsyncClient, gather, run
+from zenkins.client import job_path
+from zenkins.parallel import DEFAULT_JOBS
 
 # ANSI colors
 GREEN = "\033[32m"
@@ -42,19 +45,43 @@ STATUS_MAP = {
 }
 
 
+async def _walk(client: AsyncClient, folder: str | None) -> list[dict]:
+    """List jobs under *folder*, descending into sub-folders concurrently.
+
+    Returned jobs have their ``name`` replaced by the full path.
+    """
+    base = job_path(folder) if folder else ""
+    # Only folders have a "jobs" key, which tells them apart from jobs
+    data = await client.get_json(f"{base}/api/json?tree=jobs[name,color,url,jobs[name]]")
+    prefix = f"{folder}/" if folder else ""
+    jobs = []
+    folders = []
+    for j in data.get("jobs", []):
+        if "jobs" in j:
+            folders.append(prefix + j["name"])
+        else:
+            jobs.append({**j, "name": prefix + j["name"]})
+    for sub in await gather(_walk(client, f) for f in folders):
+        jobs.extend(sub)
+    return jobs
+
+
+async def _walk_all(folder: str | None, limit: int) -> list[dict]:
+    async with AsyncClient(limit) as client:
+        return await _walk(client, folder)
+
+
 def jobs_command(args: argparse.Namespace) -> None:
     """List all jobs with their current status."""
-    from zenkins.client import job_path
-
     tree = "jobs[name,color,url]"
     folder = getattr(args, "folder", None)
-    if folder:
-        base = job_path(folder)
+    if getattr(args, "recursive", False):
+        jobs = run(_walk_all(folder, getattr(args, "jobs", DEFAULT_JOBS)))
     else:
-        base = ""
-    resp = api_get(f"{base}/api/json?tree={tree}")
-    data = resp.json()
-    jobs = data.get("jobs", [])
+        base = job_path(folder) if folder else ""
+        # Revalidated against the copy kept on disk, since dashboards poll this
+        data, _ = conditional.get_json(f"{base}/api/json?tree={tree}", persist=True)
+        jobs = data.get("jobs", [])
 
     if not jobs:
         print("No jobs found.")
@@ -1,8 +1,176 @@
-"""zenkins log <job> [build] - console output."""
+"""zenkins log <job> [build] [-f | --head N | --tail N] - console output."""
 
 import argparse
+import codecs
+import io
+import os
+import sys
+import time
+from typing import Iterator
 
-from zenkins.client import api_get, job_path
+from zenkins import cache
+from zenkins.client import api_get, get_base_url, job_path, request
+
+FOLLOW_INTERVAL = 2
+# Initial window for --tail; doubled until it holds enough lines
+TAIL_WINDOW = 64 * 1024
+# Longest partial line iter_lines() buffers before yielding it
+MAX_LINE = 1024 * 1024
+
+# Exit codes for `log --follow`, by build result
+RESULT_EXIT_CODES = {
+    "SUCCESS": 0,
+    "FAILURE": 1,
+    "UNSTABLE": 2,
+    "ABORTED": 3,
+    "NOT_BUILT": 4,
+}
+
+
+def write_stream(chunks: Iterator[bytes]) -> None:
+    """Decode UTF-8 chunks incrementally and write them straight to stdout."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        for chunk in chunks:
+            sys.stdout.write(decoder.decode(chunk))
+            sys.stdout.flush()
+        sys.stdout.write(decoder.decode(b"", final=True))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Output piped into e.g. `head` which has exited; stop quietly.
+        # Point stdout at devnull so the interpreter's final flush doesn't
+        # fail too, unless it is no real file (output sent to the daemon)
+        try:
+            fd = sys.stdout.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            sys.exit(1)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, fd)
+        os.close(devnull)
+        sys.exit(1)
+
+
+def iter_lines(chunks: Iterator[bytes]) -> Iterator[str]:
+    """Decode UTF-8 chunks incrementally and yield lines without line endings.
+
+    Lines longer than MAX_LINE (e.g. a log of nothing but progress bars
+    redrawn with carriage returns) are yielded in pieces of MAX_LINE
+    characters, so memory stays bounded.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+        while len(pending) > MAX_LINE:
+            yield pending[:MAX_LINE]
+            pending = pending[MAX_LINE:]
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _resolve_number(job: str, build: str) -> str:
+    """Pin a symbolic build like 'lastBuild' to its number."""
+    if build.isdigit():
+        return build
+    resp = api_get(f"{job_path(job)}/{build}/api/json?tree=number")
+    return str(resp.json()["number"])
+
+
+def _progressive_chunks(job: str, build: str) -> Iterator[bytes]:
+    """Yield console output as it is produced, fetching only new bytes.
+
+    Each poll asks progressiveText for output from the last offset on;
+    Jenkins reports the new offset in X-Text-Size and sets X-More-Data
+    while the build is still writing to the log.
+    """
+    base = f"{job_path(job)}/{build}/logText/progressiveText"
+    start = 0
+    while True:
+        resp = api_get(f"{base}?start={start}", stream=True)
+        try:
+            yield from resp.iter_content(cache.CHUNK_SIZE)
+        finally:
+            resp.close()
+        start = int(resp.headers.get("X-Text-Size", start))
+        if resp.headers.get("X-More-Data", "").lower() != "true":
+            return
+        time.sleep(FOLLOW_INTERVAL)
+
+
+def _build_result(job: str, build: str) -> str | None:
+    """Get the result of a build, waiting briefly while it is finalized."""
+    for _ in range(5):
+        resp = api_get(f"{job_path(job)}/{build}/api/json?tree=result")
+        result = resp.json().get("result")
+        if result:
+            return result
+        time.sleep(FOLLOW_INTERVAL)
+    return None
+
+
+def _head_chunks(chunks: Iterator[bytes], n: int) -> Iterator[bytes]:
+    """Yield chunks up to and including the Nth newline, then stop reading."""
+    try:
+        for chunk in chunks:
+            count = chunk.count(b"\n")
+            if count >= n:
+                pos = -1
+                for _ in range(n):
+                    pos = chunk.index(b"\n", pos + 1)
+                yield chunk[:pos + 1]
+                return
+            n -= count
+            yield chunk
+    finally:
+        # Closing the stream aborts the download of the rest of the log
+        chunks.close()
+
+
+def _progressive_size(path: str) -> int:
+    """Get the current log size from progressiveText headers without the body.
+
+    A HEAD request: on a GET, Jenkins starts sending the whole log before
+    the client could close the stream. Without the header the size reads
+    as 0, i.e. the whole log is fetched.
+    """
+    resp = request("head", get_base_url() + path)
+    return int(resp.headers.get("X-Text-Size", 0))
+
+
+def tail_log(job: str, build: str, n: int) -> bytes:
+    """Fetch the last N lines of a build's log.
+
+    Only the end of the log is requested, using progressiveText with a
+    start offset. The window is doubled until it contains N full lines
+    or reaches the beginning of the log.
+    """
+    path = f"{job_path(job)}/{build}/logText/progressiveText"
+    size = _progressive_size(f"{path}?start=0")
+    window = TAIL_WINDOW
+    while True:
+        start = max(0, size - window)
+        data = api_get(f"{path}?start={start}").content
+        if start == 0 or data.count(b"\n") > n:
+            break
+        window *= 2
+    lines = data.splitlines(keepends=True)
+    return b"".join(lines[-n:]) if n else b""
+
+
+def follow_log(job: str, build: str) -> int:
+    """Stream a build's log until it finishes. Returns the exit code."""
+    build = _resolve_number(job, build)
+    try:
+        write_stream(_progressive_chunks(job, build))
+        result = _build_result(job, build)
+    except KeyboardInterrupt:
+        print()
+        return 130
+    return RESULT_EXIT_CODES.get(result, 1)
 
 
 def log_command(args: argparse.Namespace) -> None:
@@ -10,5 +178,19 @@ def log_command(args: argparse.Namespace) -> None:
     job = args.job
     build = args.build or "lastBuild"
 
-    resp = api_get(f"{job_path(job)}/{build}/consoleText")
-    print(resp.text)
+    if getattr(args, "follow", False):
+        sys.exit(follow_log(job, build))
+
+    tail = getattr(args, "tail", None)
+    if tail is not None:
+        write_stream(iter([tail_log(job, build, tail)]))
+        return
+
+    chunks = cache.stream(job, build, "consoleText")
+    if chunks is None:
+        print(f"No console output for {job} #{build}", file=sys.stderr)
+        sys.exit(1)
+    head = getattr(args, "head", None)
+    if head is not None:
+        chunks = _head_chunks(chunks, head)
+    write_stream(chunks)
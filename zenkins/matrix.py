@@ -0,0 +1,114 @@
+"""Test x build outcome matrix for multi-build failure analysis.
+
+Each test's outcomes across a window of builds are kept as one Python
+int used as a bitset: bit ``i`` is set when the test failed in the i-th
+build of the window (oldest first). Queries are then a handful of
+big-integer operations per test (popcount, shifts, xor) rather than
+loops over builds, and memory is one bit per test and build, so windows
+of thousands of builds and tens of thousands of tests stay small.
+"""
+
+from typing import Iterable
+
+# Weight of a transition relative to the next newer one in flakiness()
+DECAY = 0.95
+
+
+class OutcomeMatrix:
+    """Failing tests of a sequence of builds as per-test bitsets."""
+
+    def __init__(self, builds: Iterable[int]) -> None:
+        self.builds = sorted(builds)
+        self._column = {b: i for i, b in enumerate(self.builds)}
+        self._full = (1 << len(self.builds)) - 1
+        self.rows: dict[str, int] = {}
+
+    @classmethod
+    def from_failures(cls, builds: Iterable[int], failing: dict[str, list[int]]) -> "OutcomeMatrix":
+        """Build a matrix from test -> failing build numbers."""
+        m = cls(builds)
+        for test, numbers in failing.items():
+            for b in numbers:
+                m.add(test, b)
+        return m
+
+    def add(self, test: str, build: int) -> None:
+        """Record that *test* failed in *build*."""
+        self.rows[test] = self.rows.get(test, 0) | (1 << self._column[build])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def failures(self, test: str) -> int:
+        """Number of builds *test* failed in."""
+        return self.rows.get(test, 0).bit_count()
+
+    def failing_builds(self, test: str) -> list[int]:
+        """Build numbers *test* failed in, oldest first."""
+        bits = self.rows.get(test, 0)
+        out = []
+        while bits:
+            low = bits & -bits
+            out.append(self.builds[low.bit_length() - 1])
+            bits ^= low
+        return out
+
+    def is_persistent(self, test: str) -> bool:
+        """Whether *test* failed in every build."""
+        return bool(self.builds) and self.rows.get(test, 0) == self._full
+
+    def _flip_bits(self, test: str) -> int:
+        # Bit i (i >= 1) is set when the outcome changed from build i-1 to i
+        bits = self.rows.get(test, 0)
+        return (bits ^ (bits << 1)) & self._full & ~1
+
+    def flips(self, test: str) -> int:
+        """Number of pass <-> fail transitions between consecutive builds."""
+        return self._flip_bits(test).bit_count()
+
+    def flip_rate(self, test: str) -> float:
+        """Transitions per pair of consecutive builds (0.0 to 1.0)."""
+        pairs = len(self.builds) - 1
+        return self.flips(test) / pairs if pairs > 0 else 0.0
+
+    def longest_streak(self, test: str) -> int:
+        """Length of the longest run of consecutive failing builds."""
+        bits = self.rows.get(test, 0)
+        n = 0
+        while bits:
+            bits &= bits >> 1
+            n += 1
+        return n
+
+    def streak_start(self, test: str) -> int | None:
+        """Build where *test*'s current failing streak began.
+
+        None if the test passed in the newest build.
+        """
+        bits = self.rows.get(test, 0)
+        if not self.builds or not bits >> (len(self.builds) - 1):
+            return None
+        # Lowest bit of the run of ones at the top of the window
+        passing = ~bits & self._full
+        return self.builds[passing.bit_length()]
+
+    def flakiness(self, test: str, decay: float = DECAY) -> float:
+        """Recency-weighted flip rate (0.0 to 1.0).
+
+        Each transition is weighted by ``decay ** age`` (age 0 for the
+        newest pair of builds), so a test that used to be flaky and has
+        since stabilised scores lower than one that flips now. A test
+        that broke once and stayed broken scores at most one transition.
+        """
+        pairs = len(self.builds) - 1
+        if pairs <= 0:
+            return 0.0
+        flips = self._flip_bits(test)
+        top = len(self.builds) - 1
+        weighted = 0.0
+        while flips:
+            low = flips & -flips
+            weighted += decay ** (top - (low.bit_length() - 1))
+            flips ^= low
+        total = (1 - decay ** pairs) / (1 - decay) if decay != 1 else pairs
+        return weighted / total
@@ -0,0 +1,47 @@
+"""Bounded worker pool for fetching many builds concurrently."""
+
+import contextvars
+from typing import Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_JOBS = 8
+
+
+def parallel_map(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    jobs: int = DEFAULT_JOBS,
+    on_done: Callable[[T, int], None] | None = None,
+) -> list[R]:
+    """Apply *fn* to every item using at most *jobs* worker threads.
+
+    Results are returned in input order regardless of completion order.
+    *on_done* is called from the calling thread as ``on_done(item, done)``
+    each time an item finishes, which is handy for progress output.
+    The first exception raised by *fn* is re-raised after cancelling
+    any work that has not started yet. Workers run in a copy of the
+    caller's context, so the active client profile carries over.
+    """
+    # Imported here so that the CLI can read DEFAULT_JOBS at startup cheaply
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    items = list(items)
+    results: list[R | None] = [None] * len(items)
+    pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+    try:
+        futures = {
+            pool.submit(contextvars.copy_context().run, fn, item): i
+            for i, item in enumerate(items)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            if on_done:
+                on_done(items[i], done)
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return results  # type: ignore[return-value]
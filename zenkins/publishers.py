@@ -0,0 +1,138 @@
+"""Which test-result publishers a job uses.
+
+Every plugin that publishes test results attaches an action to the
+build (``hudson.tasks.junit.TestResultAction`` for JUnit, and so on), so
+one ``actions[_class]`` query tells which result endpoints exist instead
+of probing each and getting a 404 from the others. The answer is
+remembered per job, in memory and on disk for PUBLISHER_TTL, and
+refreshed after that in case the job's configuration changed.
+
+Publishers are looked up in PUBLISHERS and register() adds more, e.g.
+the Cucumber test-result plugin's ``CucumberTestResultAction``; a
+publisher is only queried by commands that know how to read its
+results. The xUnit plugin converts its reports to JUnit and is detected
+as JUnit.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import platformdirs
+
+import zenkins.client as client
+from zenkins import cache
+
+PUBLISHERS_FILE = Path(platformdirs.user_cache_dir("zenkins", appauthor=False)) / "publishers.json"
+# How long a job's detected publishers are trusted before detecting again
+PUBLISHER_TTL = 24 * 3600
+
+
+@dataclass(frozen=True)
+class Publisher:
+    """A test-result plugin, recognised by the classes of its build actions."""
+
+    name: str
+    action_classes: frozenset[str]
+
+
+PUBLISHERS: dict[str, Publisher] = {}
+
+
+def register(publisher: Publisher) -> None:
+    """Add (or replace) a publisher in the registry."""
+    PUBLISHERS[publisher.name] = publisher
+
+
+register(Publisher("junit", frozenset({
+    "hudson.tasks.junit.TestResultAction",
+    "hudson.tasks.test.AggregatedTestResultAction",
+    "hudson.tasks.test.MatrixTestResultAction",
+})))
+register(Publisher("robot", frozenset({"hudson.plugins.robot.RobotBuildAction"})))
+
+_remembered: dict[str, tuple[float, frozenset[str]]] = {}
+_lock = threading.Lock()
+
+
+def _key(job: str) -> str:
+    return f"{client.get_base_url()}\n{client.job_path(job)}"
+
+
+def _load() -> dict:
+    try:
+        return json.loads(PUBLISHERS_FILE.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save(key: str, detected_at: float, names: frozenset[str]) -> None:
+    data = _load()
+    data[key] = {"time": detected_at, "publishers": sorted(names)}
+    PUBLISHERS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=PUBLISHERS_FILE.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, PUBLISHERS_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _recall(key: str) -> frozenset[str] | None:
+    with _lock:
+        entry = _remembered.get(key)
+    if entry is None and cache.is_enabled():
+        stored = _load().get(key)
+        if stored:
+            entry = (stored["time"], frozenset(stored["publishers"]))
+            with _lock:
+                _remembered[key] = entry
+    if entry and time.time() - entry[0] < PUBLISHER_TTL:
+        return entry[1]
+    return None
+
+
+def from_actions(actions: list[dict | None]) -> frozenset[str]:
+    """Names of the registered publishers among a build's *actions*."""
+    classes = {a.get("_class") for a in actions if a}
+    return frozenset(p.name for p in PUBLISHERS.values() if p.action_classes & classes)
+
+
+def remember(job: str, names: frozenset[str]) -> None:
+    """Record the publishers seen on a build of *job*."""
+    # A build that failed before publishing says nothing about the job
+    if not names:
+        return
+    key = _key(job)
+    now = time.time()
+    with _lock:
+        _remembered[key] = (now, names)
+    if cache.is_enabled():
+        _save(key, now, names)
+
+
+def detect(job: str, build: str) -> frozenset[str]:
+    """Publishers of *job*, detected from *build* unless already known."""
+    key = _key(job)
+    names = _recall(key)
+    if names is not None:
+        return names
+    resp = client.api_get(f"{client.job_path(job)}/{build}/api/json?tree=building,actions[_class]")
+    data = resp.json()
+    if not data.get("building", False):
+        cache.mark_finished(job, build)
+    names = from_actions(data.get("actions", []))
+    remember(job, names)
+    return names
+
+
+def clear() -> None:
+    """Forget all in-memory detections."""
+    with _lock:
+        _remembered.clear()
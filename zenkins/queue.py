@@ -2,7 +2,7 @@
 
 import argparse
 
-from zenkins.client import api_get
+from zenkins import conditional
 
 YELLOW = "\033[33m"
 RED = "\033[31m"
@@ -12,8 +12,10 @@ RESET = "\033[0m"
 
 def queue_command(args: argparse.Namespace) -> None:
     """Show the Jenkins build queue."""
-    resp = api_get("/queue/api/json?tree=items[id,task[name],why,stuck,blocked,buildable]")
-    data = resp.json()
+    # Revalidated against the copy kept on disk, since dashboards poll this
+    data, _ = conditional.get_json(
+        "/queue/api/json?tree=items[id,task[name],why,stuck,blocked,buildable]", persist=True
+    )
 
     items = data.get("items", [])
     if not items:
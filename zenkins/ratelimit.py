@@ -0,0 +1,149 @@
+"""Host-wide request budget shared by concurrent zenkins processes.
+
+A profile can set ``rate_limit`` (requests per second) and
+``max_in_flight`` in config.toml. The budget is kept in lock files under
+the user cache directory, so every zenkins process on the machine that
+talks to the same controller draws from the same budget:
+
+- the token bucket state lives in a small file updated under an
+  exclusive ``flock``;
+- in-flight requests each hold a lock on one of ``max_in_flight`` slot
+  files, which the OS releases even if a process dies.
+
+On platforms without ``fcntl`` (Windows) the budget is per process.
+"""
+
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import platformdirs
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+LOCK_DIR = Path(platformdirs.user_cache_dir("zenkins", appauthor=False)) / "ratelimit"
+# Poll interval while all in-flight slots are taken
+SLOT_POLL = 0.02
+
+
+class HostBudget:
+    """Token bucket plus in-flight cap for one controller, across processes."""
+
+    def __init__(self, key: str, rate: float | None = None, max_in_flight: int | None = None) -> None:
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        # Up to one second's worth of requests may go out in a burst
+        self.burst = max(float(rate or 0), 1.0)
+        self.dir = LOCK_DIR / hashlib.sha256(key.encode()).hexdigest()[:16]
+        self._lock = threading.Lock()
+        # Fallbacks used without fcntl
+        self._tokens = self.burst
+        self._last = time.time()
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    @contextmanager
+    def _locked(self, name: str) -> Iterator[Path]:
+        path = self.dir / name
+        if fcntl is None:
+            with self._lock:
+                yield path
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.dir / f"{name}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _take_token(self) -> float:
+        """Take a token if available; otherwise return seconds to wait."""
+        with self._locked("bucket") as path:
+            now = time.time()
+            if fcntl is None:
+                tokens, last = self._tokens, self._last
+            else:
+                try:
+                    tokens, last = map(float, path.read_text().split())
+                except (FileNotFoundError, ValueError):
+                    tokens, last = self.burst, now
+            tokens = min(self.burst, tokens + max(0.0, now - last) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            if fcntl is None:
+                self._tokens, self._last = tokens, now
+            else:
+                path.write_text(f"{tokens} {now}")
+            return wait
+
+    def _take_slot(self):
+        if fcntl is None:
+            self._slots.acquire()
+            return self._slots
+        self.dir.mkdir(parents=True, exist_ok=True)
+        while True:
+            for i in range(self.max_in_flight):
+                f = open(self.dir / f"slot-{i}.lock", "a")
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    f.close()
+                    continue
+                return f
+            time.sleep(SLOT_POLL)
+
+    def acquire(self):
+        """Take one unit of the budget, waiting for it. Pass the result to release()."""
+        slot = self._take_slot() if self.max_in_flight else None
+        try:
+            if self.rate:
+                while (wait := self._take_token()) > 0:
+                    time.sleep(wait)
+        except BaseException:
+            self.release(slot)
+            raise
+        return slot
+
+    def release(self, slot) -> None:
+        """Give back a unit taken by acquire()."""
+        if slot is None:
+            pass
+        elif fcntl is None:
+            slot.release()
+        else:
+            # Closing the file drops its flock
+            slot.close()
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        """Hold one unit of the budget for the duration of a request."""
+        slot = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(slot)
+
+
+_budgets: dict[tuple, HostBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_budget(base_url: str, rate: float | None, max_in_flight: int | None) -> HostBudget | None:
+    """The shared budget for a controller, or None if no limits are set."""
+    if not rate and not max_in_flight:
+        return None
+    key = (base_url, rate, max_in_flight)
+    with _budgets_lock:
+        budget = _budgets.get(key)
+        if budget is None:
+            budget = _budgets[key] = HostBudget(base_url, rate, max_in_flight)
+    return budget
@@ -1,11 +1,14 @@
-"""zenkins status <job> - last build info."""
+"""zenkins status <job>... - last build info."""
 
 import argparse
 import sys
 import time
 from datetime import datetime, timezone
 
-from zenkins.client import api_get, job_path
+from zenkins import conditional
+from zenkins.aclient import AsyncClient, gather, run
+from zenkins.client import job_path
+from zenkins.parallel import DEFAULT_JOBS
 
 GREEN = "\033[32m"
 RED = "\033[31m"
@@ -45,10 +48,26 @@ def format_timestamp(ts: int) -> str:
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
 
+LAST_BUILD_TREE = "lastBuild[number,result,timestamp,duration,building,displayName,description]"
+
+
+def poll_last_build(job: str) -> tuple[dict | None, bool]:
+    """The job's last build, and whether it changed since the previous poll."""
+    data, changed = conditional.get_json(f"{job_path(job)}/api/json?tree={LAST_BUILD_TREE}")
+    return data.get("lastBuild"), changed
+
+
 def fetch_last_build(job: str) -> dict | None:
-    tree = "lastBuild[number,result,timestamp,duration,building,displayName,description]"
-    resp = api_get(f"{job_path(job)}/api/json?tree={tree}")
-    return resp.json().get("lastBuild")
+    return poll_last_build(job)[0]
+
+
+async def _fetch_last_builds(jobs: list[str], limit: int = DEFAULT_JOBS) -> list[dict | None]:
+    """Fetch the last build of several jobs, at most *limit* at a time."""
+    async with AsyncClient(min(len(jobs), limit)) as client:
+        data = await gather(
+            client.get_json(f"{job_path(job)}/api/json?tree={LAST_BUILD_TREE}") for job in jobs
+        )
+    return [d.get("lastBuild") for d in data]
 
 
 def print_status(job: str, build: dict) -> None:
@@ -73,10 +92,22 @@ def print_status(job: str, build: dict) -> None:
 
 
 def status_command(args: argparse.Namespace) -> None:
-    """Show status of the last build for a job."""
-    job = args.job
+    """Show status of the last build for one or more jobs."""
+    jobs = [args.job] if isinstance(args.job, str) else args.job
     wait = getattr(args, "wait", False)
 
+    if len(jobs) > 1:
+        if wait:
+            raise SystemExit("--wait works with a single job")
+        limit = getattr(args, "jobs", DEFAULT_JOBS)
+        for job, build in zip(jobs, run(_fetch_last_builds(jobs, limit))):
+            if build:
+                print_status(job, build)
+            else:
+                print(f"No builds found for {job}")
+        return
+
+    job = jobs[0]
     build = fetch_last_build(job)
     if not build:
         print(f"No builds found for {job}")
@@ -86,13 +117,15 @@ def status_command(args: argparse.Namespace) -> None:
         print_status(job, build)
         return
 
-    # Poll until finished
+    # Poll until finished; unchanged responses are not decoded or redrawn
+    changed = True
     try:
         while build.get("building", False):
-            elapsed = format_duration(build["duration"])
-            print(f"\r\033[K  {YELLOW}BUILDING{RESET}  #{build['number']}  {elapsed}", end="", flush=True)
+            if changed:
+                elapsed = format_duration(build["duration"])
+                print(f"\r\033[K  {YELLOW}BUILDING{RESET}  #{build['number']}  {elapsed}", end="", flush=True)
             time.sleep(POLL_INTERVAL)
-            build = fetch_last_build(job)
+            build, changed = poll_last_build(job)
             if not build:
                 print(f"\nBuild disappeared for {job}")
                 return
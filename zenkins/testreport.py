@@ -0,0 +1,156 @@
+"""Incremental parsing of large JUnit test reports.
+
+A ``testReport`` of a big suite is hundreds of megabytes of JSON, almost
+all of it passing test cases. Instead of decoding the whole document,
+parse() scans the streamed body for each ``"cases":[`` array and decodes
+its elements one at a time, keeping only those the caller asks for.
+Of everything else, only the top level of the report (the counts) is
+kept: nested lists and objects such as ``suites`` are emptied as they
+stream past. Peak memory is then bounded by the kept cases and the
+largest single case, not by the size of the report or its number of
+suites.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Callable, Iterable
+
+_CASES = re.compile(r'"cases"\s*:\s*\[')
+# Longest text that may hold an incomplete match of _CASES at a chunk boundary
+_OVERLAP = 32
+_SPACE = re.compile(r"[\s,]*")
+
+_SPECIAL = re.compile(r'["\\\[\]{}]')
+
+_decoder = json.JSONDecoder()
+
+
+class _Outline:
+    """Collects the top level of a JSON document fed to it in pieces.
+
+    Lists and objects nested inside the top-level value are reduced to
+    ``[]`` and ``{}``, so the result stays small however long they are.
+    """
+
+    def __init__(self) -> None:
+        self.parts: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        # Characters of the next piece to skip (the rest of an escape)
+        self._skip = 0
+
+    def feed(self, text: str) -> None:
+        keep_from = 0 if self._depth <= 1 else None
+        i = self._skip
+        while m := _SPECIAL.search(text, i):
+            k = m.start()
+            c = text[k]
+            i = k + 1
+            if self._in_string:
+                if c == "\\":
+                    i = k + 2
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "[{":
+                self._depth += 1
+                if self._depth == 2:
+                    self.parts.append(text[keep_from:k + 1])
+                    keep_from = None
+            else:
+                self._depth -= 1
+                if self._depth == 1:
+                    keep_from = k
+        self._skip = max(0, i - len(text))
+        if keep_from is not None:
+            self.parts.append(text[keep_from:])
+
+    def decode(self) -> Any:
+        return json.loads("".join(self.parts))
+
+
+def parse(chunks: Iterable[bytes], keep: Callable[[dict], bool]) -> tuple[dict, list[dict]]:
+    """Parse a test report from *chunks* of JSON.
+
+    Returns the report's top level (its counts, with ``suites`` and
+    other nested values emptied), and the cases for which ``keep(case)``
+    is true, in document order.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    skeleton = _Outline()
+    kept: list[dict] = []
+    # Unconsumed text is buf[pos:]; it only ever holds about one chunk
+    # plus a case that spans chunks
+    buf = ""
+    pos = 0
+    in_cases = False
+    # Don't retry decoding a partial case until the buffer has grown this far,
+    # so that a case spanning many chunks is not re-parsed once per chunk
+    want = 0
+    eof = False
+    it = iter(chunks)
+
+    def more() -> bool:
+        """Append the next chunk to the unconsumed text; False at the end."""
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = next(it, None)
+        if chunk is None:
+            eof = True
+            text = utf8.decode(b"", final=True)
+        else:
+            text = utf8.decode(chunk)
+        buf = buf[pos:] + text
+        pos = 0
+        return True
+
+    while True:
+        if not in_cases:
+            m = _CASES.search(buf, pos)
+            if m:
+                skeleton.feed(buf[pos:m.end()])
+                pos = m.end()
+                in_cases = True
+                continue
+            # Hold back a tail that may be the start of a split match
+            cut = len(buf) if eof else max(pos, len(buf) - _OVERLAP)
+            skeleton.feed(buf[pos:cut])
+            pos = cut
+            if not more():
+                break
+            continue
+
+        pos = _SPACE.match(buf, pos).end()
+        if pos >= len(buf):
+            if not more():
+                raise ValueError("test report ends inside a cases list")
+            continue
+        if buf[pos] == "]":
+            skeleton.feed("]")
+            pos += 1
+            in_cases = False
+            continue
+        if len(buf) - pos < want and more():
+            continue
+        try:
+            case, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            want = 2 * (len(buf) - pos)
+            more()
+            continue
+        want = 0
+        pos = end
+        if keep(case):
+            kept.append(case)
+
+    return skeleton.decode(), kept
+
+
+def failed(case: dict[str, Any]) -> bool:
+    """Whether a test case did not pass (the cases ``failures`` reports)."""
+    return case.get("status") not in ("PASSED", "SKIPPED", "FIXED")
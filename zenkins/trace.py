@@ -0,0 +1,202 @@
+"""HTTP tracing and per-command request statistics (``--trace-http``).
+
+When enabled, every request sent through ``client.request()`` is logged
+to stderr with its method, path, status, size, time to first byte and
+total time. At exit a summary with request count, bytes, p50/p95 latency
+and the slowest endpoints is printed, and optionally a Chrome trace
+(load it in chrome://tracing or Perfetto) is written.
+"""
+
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import requests
+
+
+@dataclass
+class Record:
+    method: str
+    path: str
+    status: int | str
+    bytes: int
+    start: float
+    ttfb: float
+    total: float
+    thread: int
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _endpoint(path: str) -> str:
+    """Group paths by endpoint: build numbers become N, query is dropped."""
+    return re.sub(r"/\d+(?=/|$)", "/N", path.split("?", 1)[0])
+
+
+def _size(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+class Tracer:
+    """Collects request records for one process."""
+
+    def __init__(self, chrome_file: str | None = None, log: bool = True) -> None:
+        self.chrome_file = chrome_file
+        self.log = log
+        self.records: list[Record] = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _add(self, record: Record) -> None:
+        with self._lock:
+            self.records.append(record)
+        if self.log:
+            print(
+                f"[http] {record.method} {record.path} {record.status} {_size(record.bytes)} "
+                f"ttfb={record.ttfb * 1000:.0f}ms total={record.total * 1000:.0f}ms",
+                file=sys.stderr,
+            )
+
+    def failed(self, method: str, url: str, start: float, error: Exception) -> None:
+        """Record a request that got no response."""
+        elapsed = time.perf_counter() - start
+        self._add(Record(method.upper(), _path(url), type(error).__name__, 0,
+                         start - self.origin, elapsed, elapsed, threading.get_ident()))
+
+    def observe(self, method: str, url: str, resp: "requests.Response", start: float, stream: bool) -> None:
+        """Record a response; streamed bodies are recorded once consumed or closed."""
+        # requests measures elapsed up to the parsed response headers
+        elapsed = getattr(resp, "elapsed", None)
+        ttfb = elapsed.total_seconds() if isinstance(elapsed, timedelta) else time.perf_counter() - start
+        thread = threading.get_ident()
+
+        def finish(size: int) -> None:
+            self._add(Record(method.upper(), _path(url), resp.status_code, size,
+                             start - self.origin, ttfb, time.perf_counter() - start, thread))
+
+        if not stream:
+            finish(len(resp.content or b""))
+            return
+        if resp.status_code >= 400:
+            # Error bodies of streamed requests are usually never read
+            finish(0)
+            return
+
+        state = {"bytes": 0, "done": False}
+        iter_content = resp.iter_content
+        close = resp.close
+
+        def done() -> None:
+            if not state["done"]:
+                state["done"] = True
+                finish(state["bytes"])
+
+        def counting_iter(*args, **kwargs):
+            try:
+                for chunk in iter_content(*args, **kwargs):
+                    state["bytes"] += len(chunk)
+                    yield chunk
+            finally:
+                done()
+
+        def counting_close() -> None:
+            close()
+            done()
+
+        resp.iter_content = counting_iter
+        resp.close = counting_close
+
+    def summary(self) -> None:
+        """Print request statistics to stderr."""
+        records = self.records
+        if not records:
+            print("[http] no requests", file=sys.stderr)
+            return
+        totals = [r.total for r in records]
+        print(
+            f"[http] {len(records)} requests, {_size(sum(r.bytes for r in records))}, "
+            f"p50 {_percentile(totals, 50) * 1000:.0f}ms, p95 {_percentile(totals, 95) * 1000:.0f}ms",
+            file=sys.stderr,
+        )
+        by_endpoint: dict[str, list[Record]] = {}
+        for r in records:
+            by_endpoint.setdefault(f"{r.method} {_endpoint(r.path)}", []).append(r)
+        slowest = sorted(by_endpoint.items(), key=lambda kv: -sum(r.total for r in kv[1]))[:5]
+        print("[http] slowest endpoints (total time):", file=sys.stderr)
+        for name, rs in slowest:
+            total = sum(r.total for r in rs)
+            print(f"[http]   {total:8.2f}s  {len(rs):4}x  max {max(r.total for r in rs):.2f}s  {name}",
+                  file=sys.stderr)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write records as Chrome trace-event JSON."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": f"{r.method} {r.path}",
+                "cat": "http",
+                "ph": "X",
+                "ts": r.start * 1e6,
+                "dur": r.total * 1e6,
+                "pid": pid,
+                "tid": r.thread,
+                "args": {"status": r.status, "bytes": r.bytes, "ttfb_ms": round(r.ttfb * 1000, 1)},
+            }
+            for r in self.records
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def finish(self) -> None:
+        self.summary()
+        if self.chrome_file:
+            self.write_chrome_trace(self.chrome_file)
+            print(f"[http] trace written to {self.chrome_file}", file=sys.stderr)
+
+
+def _path(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+_tracer: Tracer | None = None
+
+
+def enable(chrome_file: str | None = None) -> Tracer:
+    """Start tracing requests; the summary is printed at exit."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(chrome_file)
+        atexit.register(_tracer.finish)
+    elif chrome_file:
+        _tracer.chrome_file = chrome_file
+    return _tracer
+
+
+def enable_from_env() -> None:
+    """Honor ZENKINS_TRACE: "1" enables tracing, a *.json value also writes a trace file."""
+    value = os.environ.get("ZENKINS_TRACE", "")
+    if value and value != "0":
+        enable(value if value.endswith(".json") else None)
+
+
+def active() -> Tracer | None:
+    return _tracer